@@ -0,0 +1,53 @@
+import ipaddress
+from typing import List, Optional, Union
+
+from app.core.config import settings
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def parse_trusted_proxies(value: str) -> List[Network]:
+    """"10.0.0.0/8, 127.0.0.1" -> list ของ network (IP เดี่ยวเป็น /32 หรือ /128)"""
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+TRUSTED_PROXIES = parse_trusted_proxies(settings.TRUSTED_PROXIES)
+
+def _parse_ip(value: Optional[str]):
+    try:
+        return ipaddress.ip_address(value.strip()) if value else None
+    except ValueError:
+        return None
+
+def _is_trusted(address, proxies: List[Network]) -> bool:
+    return any(address in network for network in proxies)
+
+def resolve_client_ip(
+    peer: Optional[str],
+    forwarded_for: Optional[str],
+    real_ip: Optional[str],
+    proxies: List[Network] = TRUSTED_PROXIES,
+) -> str:
+    """IP ของ client จริงสำหรับ log/rate limit
+
+    เชื่อ X-Forwarded-For / X-Real-IP เฉพาะเมื่อ peer ของ connection เป็น proxy ใน TRUSTED_PROXIES
+    X-Forwarded-For อ่านจากขวาไปซ้าย ข้าม hop ที่เป็น proxy ของเรา คืน hop แรกที่ไม่ใช่
+    (hop ซ้ายกว่านั้น client เขียนเองได้) เจอค่าที่ไม่ใช่ IP ก็หยุดแล้วคืน hop ล่าสุดที่เชื่อได้
+    """
+    peer_ip = _parse_ip(peer)
+    if peer_ip is None:
+        return peer or "unknown"
+    if not _is_trusted(peer_ip, proxies):
+        return str(peer_ip)
+
+    if forwarded_for:
+        last = peer_ip
+        for hop in reversed(forwarded_for.split(",")):
+            hop_ip = _parse_ip(hop)
+            if hop_ip is None:
+                break
+            if not _is_trusted(hop_ip, proxies):
+                return str(hop_ip)
+            last = hop_ip
+        return str(last)
+
+    real = _parse_ip(real_ip)
+    return str(real) if real is not None else str(peer_ip)
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path="/backend/.env")
@@ -9,6 +10,13 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int 
     ALGORITHM: str
 
+    # pool ของ engine เดียวของแต่ละ worker (app/db/database.py)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 = ไม่จำกัด
+
     MINIO_ENDPOINT: str
     MINIO_ACCESS_KEY: str
     MINIO_SECRET_KEY: str
@@ -16,6 +24,86 @@ class Settings(BaseSettings):
     
     MINIO_ARTICLE_BUCKET: str
     MINIO_AVATAR_BUCKET: str
+    MINIO_REGION: str = "us-east-1"
+
+    # URL ดาวน์โหลด media ที่ส่งให้ client (app/services/media_urls.py)
+    MINIO_PUBLIC_URL: Optional[str] = None  # เช่น https://cdn.example.com (ชนะ MINIO_PUBLIC_HOST)
+    MINIO_PUBLIC_HOST: Optional[str] = None  # host:port ของ MinIO ที่ browser เข้าถึงได้ ใช้เซ็น presigned URL
+    MEDIA_URL_MODE: str = "presigned"  # presigned | public (bucket เปิดอ่านได้)
+    MEDIA_SIGNED_URL_TTL_SECONDS: int = 21600
+    MEDIA_SIGNED_URL_MARGIN_SECONDS: int = 3600  # URL ที่ส่งออกไปเหลืออายุอย่างน้อยเท่านี้
+    MEDIA_SIGNED_URL_CACHE_MAX_ENTRIES: int = 50000
+
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VIEW_FLUSH_MAX_BATCH: int = 1000
+    VIEW_BUFFER_MAX_PENDING: int = 100000  # view ที่รอ flush สูงสุด (เช่นตอน DB ล่ม) เกินนี้ทิ้งและนับใน dropped
+    VIEW_DEDUP_MAX_KEYS: int = 200000
+    VIEW_LOG_RETENTION_MONTHS: int = 6
+    VIEW_LOG_PARTITIONS_AHEAD: int = 2
+    VIEW_LOG_MAINTENANCE_INTERVAL_SECONDS: float = 300.0
+
+    # เปลี่ยน tokenizer/config แล้วต้อง UPDATE article SET search_vector = NULL เพื่อให้ backfill ใหม่ตอน start
+    SEARCH_TS_CONFIG: str = "simple"
+    SEARCH_THAI_TOKENIZER: str = "ngram"  # ngram | pythainlp
+    SEARCH_NGRAM_SIZE: int = 2
+
+    SESSION_CACHE_TTL_SECONDS: float = 30.0  # 0 = ปิด cache
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    # get_current_user เชื่อ signature + exp ของ access token แล้วเช็กแค่รายการ session ที่ถูกเพิกถอนใน memory
+    # (app/core/session_revocation.py) ไม่ query user_sessions ต่อ request, sync รายการระหว่าง worker ด้วย LISTEN/NOTIFY
+    AUTH_STATELESS_TOKENS: bool = False
+    SESSION_REVOCATION_SYNC_INTERVAL_SECONDS: float = 30.0  # โหลดรายการใหม่ทั้งหมดทุกเท่านี้ เผื่อ notification หลุด
+    # งานเบื้องหลังปิด session ที่หมดอายุและลบแถวที่ไม่ active ออกจาก user_sessions ทีละ batch
+    SESSION_JANITOR_INTERVAL_SECONDS: float = 600.0
+    SESSION_JANITOR_BATCH_SIZE: int = 1000
+    SESSION_JANITOR_MAX_BATCHES: int = 50  # ต่อรอบ ที่เหลือไปต่อรอบหน้า
+    SESSION_INACTIVE_RETENTION_HOURS: float = 24.0  # เก็บ session ที่ logout/หมดอายุไว้ดูย้อนหลังนานเท่านี้
+
+    PERMISSION_CACHE_TTL_SECONDS: float = 60.0  # map role -> permission ต่อ worker โหลดใหม่ทุกเท่านี้, 0 = ไม่หมดอายุ
+
+    LABEL_ID_CACHE_MAX_ENTRIES: int = 10000  # cache name -> id ของ tag/hashtag, 0 = ปิด
+
+    # cache response ของ GET ที่อ่านบ่อย (app/core/response_cache.py) ต่อ process, 0 = ปิด
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+
+    MEDIA_UPLOAD_CONCURRENCY: int = 8  # จำนวน put_object ไป MinIO พร้อมกันสูงสุดต่อ process
+
+    # อัปโหลดตรงเข้า MinIO ด้วย presigned URL (app/routes/uploads.py)
+    UPLOAD_SESSION_EXPIRY_SECONDS: int = 900
+    UPLOAD_SESSION_CLEANUP_INTERVAL_SECONDS: float = 3600.0
+    UPLOAD_MAX_SIZE_MB: int = 100  # ต่อไฟล์ของบทความ
+
+    # ย่อ avatar เป็นหลายขนาดใน process แยก (app/services/avatar_pipeline.py), 0 = ย่อใน thread ของงาน
+    AVATAR_PROCESS_WORKERS: int = 1
+    AVATAR_QUEUE_SIZE: int = 32
+    AVATAR_MAX_SIZE_MB: int = 5
+
+    # token bucket ต่อ client (app/core/rate_limit.py), postgres = ใช้ bucket ร่วมกันทุก worker
+    RATE_LIMIT_ENABLED: bool = True
+    # memory = bucket แยกต่อ process ใช้ได้แค่ตอนรัน worker เดียว (หลาย worker จะได้ limit คูณจำนวน worker)
+    RATE_LIMIT_BACKEND: str = "postgres"  # postgres | memory
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # backend postgres ใช้ pool แยกของตัวเอง (ไม่กิน DB_POOL_SIZE ของ handler)
+    RATE_LIMIT_DB_POOL_SIZE: int = 4
+    RATE_LIMIT_DB_POOL_TIMEOUT_SECONDS: float = 0.5
+    RATE_LIMIT_IDLE_SECONDS: float = 3600.0
+    RATE_LIMIT_DEFAULT_CAPACITY: int = 120
+    RATE_LIMIT_DEFAULT_PER_SECOND: float = 10.0
+    RATE_LIMIT_LOGIN_CAPACITY: int = 5
+    RATE_LIMIT_LOGIN_PER_MINUTE: float = 5.0
+
+    # IP/CIDR ของ reverse proxy (คั่นด้วย ,) ที่เชื่อ X-Forwarded-For / X-Real-IP ได้ (app/core/client_ip.py)
+    TRUSTED_PROXIES: str = "127.0.0.1,::1"
+
+    # true = GET ของ articles/categories วิ่งบน router async def + asyncpg (app/routes/async_*.py)
+    # เฉพาะ GET เท่านั้น: route เขียนข้อมูลและ router อื่นยังเป็น sync บน threadpool + psycopg2
+    DB_ASYNC: bool = False
+
+    # แต่ละ worker ของ pool ใช้ RAM ~argon2 memory_cost (64MB) ต่อการ hash หนึ่งครั้ง
+    PASSWORD_HASH_WORKERS: int = 2  # 0 = hash ใน thread ของ request
+    PASSWORD_HASH_QUEUE_SIZE: int = 16
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 10.0
     
     class Config:
         env_file = "/backend/.env"
@@ -0,0 +1,148 @@
+import inspect
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# หลาย worker (uvicorn/gunicorn --workers) ต้องตั้ง env PROMETHEUS_MULTIPROC_DIR เป็น directory ว่าง
+# ก่อน start process แม่ แต่ละ worker จะเขียนค่าลงไฟล์ใน directory นั้น และ /metrics จะรวมค่าของทุก worker
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response body is sent",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements while handling one request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+MINIO_LATENCY = Histogram(
+    "minio_call_duration_seconds",
+    "Latency of MinIO client calls",
+    ["operation", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+VIEWS_BUFFERED = Counter("article_views_buffered_total", "Unique article views accepted into the write-behind buffer")
+VIEWS_DUPLICATE = Counter("article_views_duplicate_total", "Article views skipped as duplicates of the same (article, ip, hour)")
+VIEWS_FLUSHED = Counter("article_views_flushed_total", "Article views written to article_view_log and view_count")
+VIEWS_DROPPED = Counter(
+    "article_views_dropped_total",
+    "Article views discarded because the buffer was full or the database rejected the row",
+    ["reason"],
+)
+VIEW_FLUSH_FAILURES = Counter("article_view_flush_failures_total", "Article view flushes that failed and were requeued")
+VIEWS_PENDING = Gauge(
+    "article_views_pending",
+    "Article views waiting in the write-behind buffer",
+    multiprocess_mode="livesum",
+)
+SESSION_REVOCATION_LAG = Histogram(
+    "session_revocation_propagation_seconds",
+    "Delay between revoking a session and a worker receiving it (AUTH_STATELESS_TOKENS)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+# ตั้งโดย MetricsMiddleware ต่อ request, route sync ที่รันใน threadpool ได้ context ที่ copy ไปจึงเห็น object เดียวกัน
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+def instrument_query_timing(engine: Engine):
+    """นับจำนวน/เวลา SQL ของ request ปัจจุบัน (ไม่มีผลกับงานนอก request เช่น flush view/maintenance)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = request_db_stats.get()
+        started = getattr(context, "_query_started_at", None)
+        if stats is not None and started is not None:
+            stats.queries += 1
+            stats.seconds += time.perf_counter() - started
+
+class TimedClient:
+    """ห่อ client (เช่น Minio) ให้ทุก method call ถูกจับเวลาลง histogram ตามชื่อ method"""
+
+    def __init__(self, client, histogram: Histogram = MINIO_LATENCY):
+        self._client = client
+        self._histogram = histogram
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                self._observe(name, "error", started)
+                raise
+            if inspect.isgenerator(result):
+                # remove_objects/list_objects คืน generator ที่ยังไม่ได้ยิง request จนกว่าจะวนอ่าน
+                return self._timed_generator(name, result, started)
+            self._observe(name, "ok", started)
+            return result
+
+        return timed
+
+    def _observe(self, name: str, outcome: str, started: float):
+        self._histogram.labels(name, outcome).observe(time.perf_counter() - started)
+
+    def _timed_generator(self, name: str, generator, started: float):
+        """จับเวลาตั้งแต่เรียก method จนวนอ่านจบ (หรือเลิกอ่าน) นับเป็นหนึ่ง call"""
+        outcome = "error"
+        try:
+            yield from generator
+            outcome = "ok"
+        except GeneratorExit:
+            outcome = "ok"
+            raise
+        finally:
+            self._observe(name, outcome, started)
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead():
+    # ให้ค่า gauge แบบ livesum ของ worker ที่ปิดไปแล้วหายจากผลรวม
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,126 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ฟังก์ชันที่รันใน process ลูก ต้องอยู่ระดับ module เพื่อให้ pickle ได้
+def _hash(password: str) -> str:
+    from app.core.security import pwd_context
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    from app.core.security import pwd_context
+    return pwd_context.verify_and_update(password, hashed)
+
+class PasswordHashPool:
+    """process pool สำหรับ hash/verify รหัสผ่าน (argon2 ใช้ CPU และ RAM 64MB ต่อครั้ง)
+
+    - จำนวน process จำกัดที่ workers จึงใช้ RAM สูงสุด ~workers x memory_cost
+    - รับงานค้างได้ไม่เกิน workers + queue_size ถ้าเต็มตอบ 503 ทันทีแทนที่จะให้ request รอคิวยาว
+    - workers = 0 คือ hash ใน thread ที่เรียกเลย (ไม่มี pool)
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self.capacity = max(workers, 1) + queue_size
+        self.in_flight = 0
+        self._slots_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.rejected_total = 0
+        self.timeout_total = 0
+
+    def _acquire(self) -> bool:
+        with self._slots_lock:
+            if self.in_flight >= self.capacity:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self):
+        with self._slots_lock:
+            self.in_flight -= 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn แทน fork เพราะ process หลักมี thread อื่น (threadpool, periodic task) วิ่งอยู่
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Password hash pool started with {self.workers} workers")
+            return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._acquire():
+            self.rejected_total += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            if self.workers <= 0:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # slot คืนเมื่องานเสร็จจริง ไม่ใช่ตอน request เลิกรอ (process ยังใช้ CPU/RAM อยู่)
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _timed_out(self) -> HTTPException:
+        self.timeout_total += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is taking too long, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    def _result(self, future: Future):
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            raise self._timed_out() from None
+
+    def hash(self, password: str) -> str:
+        return self._result(self._submit(_hash, password))
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._result(self._submit(_verify_and_update, password, hashed))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected_total": self.rejected_total,
+            "timeout_total": self.timeout_total,
+        }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+password_hasher = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
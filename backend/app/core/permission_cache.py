@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Dict, FrozenSet, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.permission import Permission
+from app.models.role_permission import RolePermission
+
+class RolePermissionCache:
+    """map role_id -> frozenset(ชื่อ permission) ทั้งตาราง โหลดด้วย query เดียวตอน startup
+
+    การเขียนใน crud/role_permission.py (และลบ/เปลี่ยนชื่อ role, permission) เรียก invalidate หลัง commit
+    แล้วโหลดใหม่ครั้งเดียวตอนตรวจสิทธิ์ครั้งถัดไป worker อื่นเห็นผลช้าสุดไม่เกิน ttl วินาที
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._roles: Optional[Dict[int, FrozenSet[str]]] = None
+        self._expires_at = 0.0
+        # เพิ่มทุกครั้งที่ invalidate กันไม่ให้ load ที่เริ่มก่อนหน้านั้นเขียนค่าเก่าทับ
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def permissions_for(self, db: Session, role_id: Optional[int]) -> FrozenSet[str]:
+        roles = self._roles
+        if roles is None or (self.ttl > 0 and self._expires_at <= time.monotonic()):
+            roles = self.load(db)
+        return roles.get(role_id, frozenset()) if role_id is not None else frozenset()
+
+    def load(self, db: Session) -> Dict[int, FrozenSet[str]]:
+        generation = self._generation
+        rows = db.execute(
+            select(RolePermission.role_id, Permission.name)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+        ).all()
+
+        grouped: Dict[int, set] = {}
+        for role_id, name in rows:
+            grouped.setdefault(role_id, set()).add(name)
+        roles = {role_id: frozenset(names) for role_id, names in grouped.items()}
+
+        with self._lock:
+            self.loads += 1
+            if generation == self._generation:
+                self._roles = roles
+                self._expires_at = time.monotonic() + self.ttl
+        return roles
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._roles = None
+
+    def stats(self) -> dict:
+        roles = self._roles
+        return {
+            "loaded": roles is not None,
+            "roles": len(roles) if roles is not None else 0,
+            "loads": self.loads,
+        }
+
+role_permission_cache = RolePermissionCache(ttl=settings.PERMISSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,200 @@
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RateLimitPolicy:
+    """token bucket: เก็บได้สูงสุด capacity token เติมคืน refill_per_second ต่อวินาที หนึ่ง request ใช้หนึ่ง token
+
+    per_user=True นับแยกตาม username ใน access token (ไม่มี token ถึงนับตาม IP)
+    """
+
+    def __init__(self, name: str, capacity: int, refill_per_second: float, per_user: bool = True):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.per_user = per_user
+
+class RateLimitBackend(ABC):
+    """ที่เก็บสถานะของ bucket ต่อ key, implement take() เพื่อต่อกับ store อื่น"""
+
+    @abstractmethod
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        """ใช้ 1 token คืน (allowed, retry_after วินาที)"""
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """bucket ใน process นี้ (จำกัดจำนวน key แบบ LRU) ใช้กับ worker เดียวหรือเป็นตัวแทน store ร่วมตอนทดสอบ"""
+
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        now = self.clock()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (policy.capacity, now))
+            tokens = min(policy.capacity, tokens + (now - updated_at) * policy.refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # client ที่เงียบไปนานสุดหลุดก่อน (bucket ของมันเต็มอยู่แล้วถ้ากลับมาใหม่ก็ได้ค่าเท่าเดิม)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, _retry_after(tokens, policy, allowed)
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """bucket ร่วมกันทุก worker ในตาราง UNLOGGED rate_limit_bucket อัปเดตแบบ atomic ด้วยคำสั่งเดียว"""
+
+    TAKE = text("""
+        INSERT INTO rate_limit_bucket AS b (key, tokens, allowed, updated_at)
+        VALUES (:key, :capacity - 1, true, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE SET
+            allowed = LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= 1,
+            tokens = LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)
+                     - CASE WHEN LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= 1
+                            THEN 1 ELSE 0 END,
+            updated_at = clock_timestamp()
+        RETURNING allowed, tokens
+    """)
+
+    def __init__(self, engine_factory: Callable[[], Engine], idle_seconds: float):
+        self._engine_factory = engine_factory
+        self.idle_seconds = idle_seconds
+
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        with self._engine_factory().begin() as conn:
+            allowed, tokens = conn.execute(
+                self.TAKE, {"key": key, "capacity": policy.capacity, "rate": policy.refill_per_second}
+            ).one()
+        return allowed, _retry_after(tokens, policy, allowed)
+
+    def purge_idle(self) -> int:
+        """ลบ bucket ที่ไม่มี request นานพอจะเติมเต็มแล้ว (ลบแล้วได้ค่าเท่าเดิม)"""
+        with self._engine_factory().begin() as conn:
+            result = conn.execute(
+                text("DELETE FROM rate_limit_bucket WHERE updated_at < clock_timestamp() - make_interval(secs => :idle)"),
+                {"idle": self.idle_seconds},
+            )
+        return result.rowcount
+
+CREATE_BUCKET_TABLE = """
+    CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_bucket (
+        key text PRIMARY KEY,
+        tokens double precision NOT NULL,
+        allowed boolean NOT NULL,
+        updated_at timestamptz NOT NULL
+    )
+"""
+
+def _retry_after(tokens: float, policy: RateLimitPolicy, allowed: bool) -> float:
+    if allowed or policy.refill_per_second <= 0:
+        return 0.0
+    return (1 - tokens) / policy.refill_per_second
+
+class RateLimiter:
+    """เลือก policy ตาม method + path prefix (ตัวแรกที่ match) แล้วหัก token จาก backend"""
+
+    def __init__(self, backend: RateLimitBackend, default_policy: RateLimitPolicy,
+                 route_policies: List[Tuple[str, str, RateLimitPolicy]], exempt_prefixes: Tuple[str, ...] = ()):
+        self.backend = backend
+        self.default_policy = default_policy
+        self.route_policies = route_policies
+        self.exempt_prefixes = exempt_prefixes
+
+    def policy_for(self, method: str, path: str) -> Optional[RateLimitPolicy]:
+        # CORS preflight ไม่ใช่ request จริงของ client ไม่หัก token
+        if method == "OPTIONS" or path.startswith(self.exempt_prefixes):
+            return None
+        for policy_method, prefix, policy in self.route_policies:
+            if method == policy_method and path.startswith(prefix):
+                return policy
+        return self.default_policy
+
+    def client_key(self, policy: RateLimitPolicy, client_ip: str, authorization: Optional[str]) -> str:
+        if policy.per_user and authorization and authorization.lower().startswith("bearer "):
+            try:
+                # ตรวจลายเซ็นด้วย กัน client ปลอม sub เพื่อหนี/แย่ง bucket ของคนอื่น (ไม่เช็ค session ที่นี่)
+                payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+                if payload.get("sub"):
+                    return f"{policy.name}:user:{payload['sub']}"
+            except JWTError:
+                pass
+        return f"{policy.name}:ip:{client_ip}"
+
+    def take(self, key: str, policy: RateLimitPolicy) -> Tuple[bool, float]:
+        try:
+            return self.backend.take(key, policy)
+        except Exception as e:
+            # store ร่วมล่ม ไม่ควรทำให้ทั้ง API ล่มตาม ปล่อยผ่าน
+            logger.error(f"Rate limit backend failed, allowing request: {e}")
+            return True, 0.0
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+def _default_engine() -> Engine:
+    """engine เล็กของ limiter เอง ไม่แย่ง pool ของ handler (ทุก request เขียน bucket หนึ่งครั้ง)
+
+    pool เต็มเกิน RATE_LIMIT_DB_POOL_TIMEOUT_SECONDS ถือว่า store ล่ม RateLimiter.take ปล่อยผ่าน
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from sqlalchemy import create_engine
+            from app.db.database import statement_timeout_options
+            from sqlalchemy.pool import QueuePool
+            from app.db.pool_metrics import instrumented_pool_class, track_checkout_duration
+
+            _engine = create_engine(
+                settings.DATABASE_URL,
+                poolclass=instrumented_pool_class(QueuePool, "rate_limit"),
+                pool_size=settings.RATE_LIMIT_DB_POOL_SIZE,
+                max_overflow=0,
+                pool_timeout=settings.RATE_LIMIT_DB_POOL_TIMEOUT_SECONDS,
+                pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+                pool_pre_ping=True,
+                connect_args={"options": statement_timeout_options()},
+            )
+            track_checkout_duration(_engine, "rate_limit")
+        return _engine
+
+def build_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "postgres":
+        backend = PostgresRateLimitBackend(_default_engine, idle_seconds=settings.RATE_LIMIT_IDLE_SECONDS)
+    else:
+        backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+    login = RateLimitPolicy(
+        "login", settings.RATE_LIMIT_LOGIN_CAPACITY, settings.RATE_LIMIT_LOGIN_PER_MINUTE / 60, per_user=False
+    )
+    return RateLimiter(
+        backend=backend,
+        default_policy=RateLimitPolicy(
+            "default", settings.RATE_LIMIT_DEFAULT_CAPACITY, settings.RATE_LIMIT_DEFAULT_PER_SECOND
+        ),
+        route_policies=[
+            ("POST", "/v1/api/auth/login", login),
+            ("POST", "/v1/api/auth/register", login),
+            ("POST", "/v1/api/users/change-password", login),
+            ("POST", "/v1/api/auth/refresh", RateLimitPolicy("refresh", 20, 20 / 60, per_user=False)),
+        ],
+        exempt_prefixes=("/metrics", "/v1/api/health"),
+    )
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Response cache lookups",
+    ["name", "result"],
+)
+
+class CachedResponse:
+    """body JSON ที่ serialize แล้วพร้อม strong ETag (sha256 ของ body)"""
+
+    __slots__ = ("body", "etag", "meta")
+
+    def __init__(self, body: bytes, meta: Optional[dict] = None):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.meta = meta or {}
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # รับทั้ง "abc" และ W/"abc" (weak comparison ตาม RFC 9110 สำหรับ If-None-Match)
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+class ResponseCache:
+    """cache response ของ GET ที่อ่านบ่อยแต่เปลี่ยนน้อย (TTL + LRU) ต่อ process
+
+    แต่ละ entry ผูกกับ tag เช่น "categories", "article:42" ฟังก์ชันเขียนใน crud เรียก invalidate(tag) หลัง commit
+    worker อื่นยังเห็นค่าเก่าได้ไม่เกิน ttl วินาที
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, CachedResponse, frozenset]]" = OrderedDict()
+        self._by_tag: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(name: str, request: Request, scope: Any = None) -> tuple:
+        # scope แยก cache ตามสิทธิ์ของผู้เรียก (default คือ role ที่ get_current_user ตั้งไว้)
+        if scope is None:
+            scope = getattr(request.state, "current_role_id", None)
+        return (name, request.url.path, tuple(sorted(request.query_params.multi_items())), scope)
+
+    def lookup(self, key: tuple) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        RESPONSE_CACHE_REQUESTS.labels(key[0], "miss" if entry is None else "hit").inc()
+        return entry[1] if entry is not None else None
+
+    def store(self, key: tuple, value: Any, response_model: Any, tags: Iterable[str] = (),
+              meta: Optional[dict] = None) -> CachedResponse:
+        """serialize value ตาม response_model (from_attributes) แล้วเก็บ คืน CachedResponse ไว้ตอบ request นี้"""
+        adapter = _adapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+        cached = CachedResponse(body, meta)
+        if self.ttl <= 0:
+            return cached
+
+        tags = frozenset(tags) | {key[0]}
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, cached, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        return cached
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def _drop(self, key: Hashable):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+def _adapter(response_model: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter
+
+response_cache = ResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+)
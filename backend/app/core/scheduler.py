@@ -0,0 +1,51 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """รันฟังก์ชันซ้ำทุก ๆ interval วินาทีบน daemon thread ของ process นี้"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Periodic task '{self.name}' started (every {self.interval}s)")
+
+    def wake(self):
+        """ให้รอบถัดไปรันทันทีโดยไม่ต้องรอครบ interval"""
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        logger.info(f"Periodic task '{self.name}' stopped")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                self.func()
+            except Exception as e:
+                logger.error(f"Periodic task '{self.name}' failed: {e}")
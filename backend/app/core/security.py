@@ -1,12 +1,13 @@
 import hashlib
 import secrets
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import UUID
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from .config import settings
+from .password_hashing import password_hasher
 
 pwd_context = CryptContext(
     schemes=["argon2", "bcrypt"], #กำหนดว่าใช้วิธีการเข้ารหัสแบบ "argon2", "bcrypt"
@@ -17,13 +18,18 @@ pwd_context = CryptContext(
     bcrypt__rounds=12 #จำนวนรอบของ bcrypt (รอบมากขึ้น → ปลอดภัยขึ้นแต่ช้าขึ้น)
 )
 
+# hash/verify ทั้งหมดวิ่งผ่าน password_hasher (process pool) ไม่กิน CPU ของ worker ที่รับ request
 #ตรวจสอบว่า plaintext password ตรงกับ hashed password หรือไม่
 def verify_password(plain_password: str, hashed_password: str) -> bool: 
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
+
+#ตรวจรหัสผ่านพร้อมคืน hash ใหม่ถ้า hash เดิมใช้ค่า/อัลกอริทึมที่เก่ากว่า pwd_context ปัจจุบัน (needs_update)
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return password_hasher.verify_and_update(plain_password, hashed_password)
 
 #แปลงรหัสผ่านธรรมดาเป็นแบบเข้ารหัส (hash) เพื่อเก็บในฐานข้อมูล
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 #สร้าง token ใช้เป็น refresh token, session token
 def generate_secure_token(length: int = 32) -> str:
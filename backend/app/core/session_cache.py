@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+
+class SessionCache:
+    """cache ผลตรวจ session ของ get_current_user: session_id -> snapshot ของ user (TTL + จำกัดจำนวน, LRU)
+
+    เก็บเฉพาะ session ที่ active อยู่ การ logout/เปลี่ยนรหัส/ลบ user ต้องเรียก invalidate ให้หลุดจาก cache ทันที
+    ส่วน worker อื่นจะเห็นผลช้าสุดไม่เกิน ttl วินาที
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: UUID) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[session_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, session_id: UUID, snapshot: dict):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: UUID):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            stale = [sid for sid, (_, snap) in self._entries.items() if snap["user_id"] == user_id]
+            for sid in stale:
+                del self._entries[sid]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+session_cache = SessionCache(
+    ttl=settings.SESSION_CACHE_TTL_SECONDS,
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,188 @@
+import json
+import logging
+import select
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import SESSION_REVOCATION_LAG
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "session_revoked"
+
+# payload ของ NOTIFY ได้ไม่เกิน 8000 bytes แบ่ง id (36 ตัวอักษร) เป็นชุดละไม่เกินเท่านี้
+NOTIFY_CHUNK_SIZE = 150
+
+CREATE_REVOCATION_TABLE = """
+    CREATE TABLE IF NOT EXISTS session_revocation (
+        session_id uuid PRIMARY KEY,
+        expires_at timestamptz NOT NULL
+    )
+"""
+
+INSERT_REVOCATIONS = text("""
+    INSERT INTO session_revocation (session_id, expires_at)
+    SELECT unnest(CAST(:session_ids AS uuid[])), now() + make_interval(secs => :lifetime)
+    ON CONFLICT (session_id) DO UPDATE SET expires_at = EXCLUDED.expires_at
+""")
+
+class SessionRevocationList:
+    """session ที่ถูกเพิกถอนแล้วแต่ access token อาจยังไม่หมดอายุ สำหรับโหมด AUTH_STATELESS_TOKENS
+
+    get_current_user เชื่อ signature + exp ของ JWT แล้วเช็กแค่ set นี้ใน memory (ไม่ query user_sessions)
+    - record() เขียนลงตาราง session_revocation และ NOTIFY ใน transaction ของผู้เรียก (ส่งถึง worker อื่นตอน commit)
+    - แต่ละ worker มี thread LISTEN รับ id ใหม่ และโหลดทั้งตารางใหม่ทุก sync_interval กันกรณีหลุด notification
+    - แถวหมดอายุเมื่อ access token ที่ออกก่อนเพิกถอนหมดอายุหมดแล้ว ตารางจึงเล็กเสมอ
+    """
+
+    def __init__(self, enabled: bool, token_lifetime: float, sync_interval: float):
+        self.enabled = enabled
+        self.token_lifetime = token_lifetime
+        self.sync_interval = sync_interval
+        self._revoked: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = False
+        self.notifications = 0
+        self.reloads = 0
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+
+    def is_revoked(self, session_id: UUID) -> bool:
+        expires_at = self._revoked.get(session_id)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, session_ids: Iterable[UUID], expires_at: Optional[float] = None):
+        expires_at = expires_at or time.time() + self.token_lifetime
+        with self._lock:
+            for session_id in session_ids:
+                self._revoked[session_id] = expires_at
+
+    def record(self, db: Session, session_ids: List[UUID]):
+        """เพิกถอน session_ids ใน transaction ของ db (เรียกก่อน commit) และเพิ่มเข้า set ของ worker นี้ทันที"""
+        if not self.enabled or not session_ids:
+            return
+        db.execute(INSERT_REVOCATIONS, {"session_ids": [str(s) for s in session_ids], "lifetime": self.token_lifetime})
+        revoked_at = time.time()
+        for i in range(0, len(session_ids), NOTIFY_CHUNK_SIZE):
+            payload = json.dumps({"t": revoked_at, "ids": [str(s) for s in session_ids[i:i + NOTIFY_CHUNK_SIZE]]})
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+        self.add(session_ids)
+
+    def reload(self):
+        """โหลดทั้งตารางแทน set เดิม (ตัดแถวที่หมดอายุทิ้งไปด้วย)"""
+        from app.db.database import engine
+
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT session_id, extract(epoch FROM expires_at) FROM session_revocation WHERE expires_at > now()"
+            )).all()
+        revoked = {session_id if isinstance(session_id, UUID) else UUID(str(session_id)): float(expires_at)
+                   for session_id, expires_at in rows}
+        with self._lock:
+            self._revoked = revoked
+        self.reloads += 1
+
+    def purge_expired(self):
+        from app.db.database import engine
+        from app.db.advisory_lock import try_advisory_xact_lock
+
+        with engine.begin() as conn:
+            if try_advisory_xact_lock(conn, "session_revocation_purge"):
+                conn.execute(text("DELETE FROM session_revocation WHERE expires_at <= now()"))
+
+    def sync(self):
+        """งานเบื้องหลังทุก sync_interval: ล้างแถวที่หมดอายุแล้วโหลดใหม่ทั้งหมด"""
+        self.purge_expired()
+        self.reload()
+
+    def _handle(self, payload: str):
+        try:
+            message = json.loads(payload)
+            session_ids = [UUID(s) for s in message["ids"]]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed {CHANNEL} notification")
+            return
+        self.add(session_ids)
+        # เวลาตั้งแต่เพิกถอนจนถึง worker นี้ (ใช้นาฬิกาของแต่ละเครื่อง)
+        lag = max(time.time() - float(message.get("t", time.time())), 0.0)
+        self.notifications += 1
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        SESSION_REVOCATION_LAG.observe(lag)
+
+    def _listen(self):
+        from app.db.database import engine
+
+        backoff = 1.0
+        while not self._stopping.is_set():
+            raw = None
+            try:
+                # connection แยกจาก pool ค้างไว้ LISTEN ตลอด (ไม่คืนเข้า pool)
+                raw = engine.raw_connection()
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                # notification ที่ส่งมาระหว่างหลุดหายไปแล้ว โหลดใหม่ทั้งตารางหลัง LISTEN
+                self.reload()
+                self.connected = True
+                backoff = 1.0
+                while not self._stopping.is_set():
+                    if select.select([conn], [], [], 5.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            self._handle(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Session revocation listener disconnected: {e}")
+            finally:
+                self.connected = False
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def start(self):
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name="session-revocation-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(10.0)
+        self._thread = None
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            size = sum(1 for expires_at in self._revoked.values() if expires_at > now)
+        return {
+            "enabled": self.enabled,
+            "listener_connected": self.connected,
+            "size": size,
+            "notifications": self.notifications,
+            "reloads": self.reloads,
+            "last_lag_seconds": self.last_lag,
+            "max_lag_seconds": self.max_lag,
+        }
+
+session_revocations = SessionRevocationList(
+    enabled=settings.AUTH_STATELESS_TOKENS,
+    token_lifetime=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    sync_interval=settings.SESSION_REVOCATION_SYNC_INTERVAL_SECONDS,
+)
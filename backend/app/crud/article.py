@@ -1,78 +1,104 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Sequence
 from fastapi import HTTPException, UploadFile
-from app.models.article import Article, ArticleMedia, ArticleViewLog, Tag, Hashtag, ArticleComment
+from app.models.article import Article, ArticleMedia, ArticleViewHourly, ArticleViewDaily, Tag, Hashtag, ArticleComment, ArticleCategory, ArticleSubCategory, ArticleTag, ArticleHashtag
 from app.models.category import Category, SubCategory
 from app.models.user import User, UserSession
 from app.schemas.article import ArticleCreate, ArticleUpdate
 from app.services.minio_service import MinIOArticleService
-from datetime import datetime, timedelta
-from sqlalchemy import text
+from app.services.view_counter import view_counter
+from app.services.media_upload import UploadedMedia
+from app.services.search import build_search_query, refresh_search_vector
+from app.crud.article_loaders import ARTICLE_CARD, ARTICLE_DETAIL, ARTICLE_ADMIN
+from app.crud.article_labels import get_or_create_labels
+from app.core.response_cache import response_cache
+from app.core.pagination import encode_cursor, decode_cursor, parse_cursor_datetime
+from datetime import datetime
+from sqlalchemy import text, tuple_, func, select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from slugify import slugify
 
+ARTICLE_PAGE_SIZE_DEFAULT = 20
+ARTICLE_PAGE_SIZE_MAX = 100
+ARTICLE_SEARCH_OFFSET_MAX = 1000
+
+# sort key -> คอลัมน์ที่ใช้ทำ keyset (เรียงมาก->น้อย โดยมี id เป็นตัวตัดสินเมื่อค่าเท่ากัน)
+ARTICLE_SORT_COLUMNS = {
+    "popular": (Article.view_count, "view_count"),
+    "latest": (Article.created_at, "created_at"),
+    "rating": (Article.rating, "rating"),
+}
+
 def str_to_list(s: Optional[str]) -> List[str]:
     if not s:
         return []
     return [item.strip() for item in s.replace(',', ' ').split() if item.strip()]
 
-def get_or_create_tags(db: Session, tag_names: List[str]):
-    tags = []
-    for name in tag_names:
-        tag = db.query(Tag).filter(Tag.name == name).first()
-        if not tag:
-            tag = Tag(name=name)
-            db.add(tag)
-            db.flush()  # เพื่อให้มี ID ทันที
-        tags.append(tag)
-    return tags
-
-def get_or_create_hashtags(db: Session, hashtag_names: List[str]):
-    hashtags = []
-    for name in hashtag_names:
-        h = db.query(Hashtag).filter(Hashtag.name == name).first()
-        if not h:
-            h = Hashtag(name=name)
-            db.add(h)
-            db.flush()
-        hashtags.append(h)
-    return hashtags
+def get_or_create_tags(db: Session, tag_names: List[str]) -> List[Tag]:
+    return get_or_create_labels(db, Tag, tag_names)
 
-def create_article_with_categories(
+def get_or_create_hashtags(db: Session, hashtag_names: List[str]) -> List[Hashtag]:
+    return get_or_create_labels(db, Hashtag, hashtag_names)
+
+def validate_article_categories(
     db: Session,
-    article_data: ArticleCreate,
     category_ids: Optional[List[int]] = None,
-    subcategory_ids: Optional[List[int]] = None
-):
+    subcategory_ids: Optional[List[int]] = None,
+) -> tuple[List[Category], List[SubCategory]]:
+    """โหลด category/subcategory ตาม id คืน (categories, subcategories) หรือ 422 ถ้าไม่มีอยู่จริง/subcategory ไม่อยู่ใต้ category ที่เลือก
+
+    route ที่อัปโหลดไฟล์เรียกก่อนอัปโหลด ให้ input ผิดตอบ 422 โดยไม่ต้องอัปโหลดแล้วลบทิ้ง
+    """
     category_ids = category_ids or []
     subcategory_ids = subcategory_ids or []
 
     # ✅ ตรวจสอบ categories
-    existing_categories = db.query(Category.id).filter(Category.id.in_(category_ids)).all()
-    existing_cat_ids = {cat.id for cat in existing_categories}
+    categories = db.query(Category).filter(Category.id.in_(category_ids)).all() if category_ids else []
+    existing_cat_ids = {cat.id for cat in categories}
     missing_cat_ids = set(category_ids) - existing_cat_ids
     if missing_cat_ids:
         raise HTTPException(status_code=422, detail=f"Category IDs not found: {sorted(missing_cat_ids)}")
 
     # ✅ ตรวจสอบ subcategories
-    existing_subcategories = []
+    subcategories = []
     if subcategory_ids:
-        existing_subcategories = db.query(SubCategory).filter(SubCategory.id.in_(subcategory_ids)).all()
-        existing_sub_ids = {sub.id for sub in existing_subcategories}
+        subcategories = db.query(SubCategory).filter(SubCategory.id.in_(subcategory_ids)).all()
+        existing_sub_ids = {sub.id for sub in subcategories}
         missing_sub_ids = set(subcategory_ids) - existing_sub_ids
         if missing_sub_ids:
             raise HTTPException(status_code=422, detail=f"SubCategory IDs not found: {sorted(missing_sub_ids)}")
 
-        for sub in existing_subcategories:
+        for sub in subcategories:
             if sub.category_id not in existing_cat_ids:
                 raise HTTPException(
                     status_code=422,
                     detail=f"SubCategory '{sub.name}' does not belong to selected categories"
                 )
+    return categories, subcategories
+
+def create_article_with_categories(
+    db: Session,
+    article_data: ArticleCreate,
+    category_ids: Optional[List[int]] = None,
+    subcategory_ids: Optional[List[int]] = None,
+    article_id: Optional[int] = None,
+    media: Sequence[UploadedMedia] = ()
+):
+    """สร้างบทความพร้อม category/tag และแถว ArticleMedia ของไฟล์ที่อัปโหลดเสร็จแล้วใน transaction เดียว
+
+    article_id ใช้เมื่อจองไว้ก่อนด้วย reserve_article_id (object ใน MinIO ตั้งชื่อตาม id ก่อนบทความจะถูกสร้าง)
+    """
+    categories, subcategories = validate_article_categories(db, category_ids, subcategory_ids)
+
+    content = article_data.content
+    if content and media:
+        content = replace_media_placeholders(content, [(m.filename, m.url) for m in media])
 
     # ✅ สร้าง Article พร้อม slug ชั่วคราว
     article = Article(
+        id=article_id,
         title=article_data.title,
-        content=article_data.content,
+        content=content,
         status=article_data.status or "private",
         start_date=datetime.fromisoformat(article_data.start_date) if article_data.start_date else None,
         end_date=datetime.fromisoformat(article_data.end_date) if article_data.end_date else None,
@@ -81,10 +107,22 @@ def create_article_with_categories(
     )
 
     # ✅ ผูกความสัมพันธ์
-    article.categories = db.query(Category).filter(Category.id.in_(category_ids)).all()
-    article.subcategories = existing_subcategories
+    article.categories = categories
+    article.subcategories = subcategories
     article.tags = get_or_create_tags(db, article_data.tags or [])
     article.hashtags = get_or_create_hashtags(db, article_data.hashtags or [])
+    article.article_media = [
+        ArticleMedia(
+            filename=m.filename,
+            file_type=m.file_type,
+            url=m.url,
+            object_name=m.object_name,
+            media_type=m.media_type,
+            uploaded_at=datetime.utcnow()
+        )
+        for m in media
+    ]
+    refresh_search_vector(article)
 
     db.add(article)
     db.flush()  # ✅ ได้ article.id แล้ว แต่ยังไม่ commit
@@ -98,36 +136,13 @@ def create_article_with_categories(
 
     return article
 
-def upload_and_attach_media(db: Session, article: Article, embedded_files: List[UploadFile], attached_files: List[UploadFile], minio_service: MinIOArticleService):
-    media_refs = []
-    for file in embedded_files:
-        url = minio_service.upload_embedded_file(article.id, file)
-        media = ArticleMedia(
-            article_id=article.id,
-            filename=file.filename,
-            file_type=file.content_type,
-            url=url,
-            media_type="embedded",
-            uploaded_at=datetime.utcnow()
-        )
-        db.add(media)
-        media_refs.append((file.filename, url))
-
-    for file in attached_files:
-        url = minio_service.upload_attached_file(article.id, file)
-        media = ArticleMedia(
-            article_id=article.id,
-            filename=file.filename,
-            file_type=file.content_type,
-            url=url,
-            media_type="attached",
-            uploaded_at=datetime.utcnow()
-        )
-        db.add(media)
-        media_refs.append((file.filename, url))
-
+def reserve_article_id(db: Session) -> int:
+    """จอง id ของบทความจาก sequence ล่วงหน้า แล้วคืน connection ทันที (ใช้ตั้งชื่อ object ก่อนอัปโหลด)"""
+    article_id = db.execute(
+        select(func.nextval(func.pg_get_serial_sequence(Article.__tablename__, "id")))
+    ).scalar_one()
     db.commit()
-    return media_refs
+    return article_id
 
 def replace_media_placeholders(content: str, media_refs: List[tuple]) -> str:
     for filename, url in media_refs:
@@ -135,9 +150,9 @@ def replace_media_placeholders(content: str, media_refs: List[tuple]) -> str:
         content = content.replace(key, url)
     return content
 
-def get_article_by_slug(db: Session, slug: str):
+def get_article_by_slug(db: Session, slug: str, options: tuple = ()):
     try:
-        article = db.query(Article).filter(Article.slug == slug).first()
+        article = db.query(Article).options(*options).filter(Article.slug == slug).first()
         if not article:
             print(f"Article with slug '{slug}' not found in DB")
         return article
@@ -145,15 +160,121 @@ def get_article_by_slug(db: Session, slug: str):
         print(f"Error querying article by slug '{slug}': {e}")
         raise
 
-def list_articles(db: Session):
-    return db.query(Article).order_by(Article.view_count.desc()).all()
+def get_article_by_id(db: Session, article_id: int, options: tuple = ARTICLE_DETAIL) -> Optional[Article]:
+    # populate_existing เพื่อให้ collection ที่ถูก expire หลัง commit ถูกโหลดใหม่ใน query เดียวกัน
+    return (
+        db.query(Article)
+        .options(*options)
+        .populate_existing()
+        .filter(Article.id == article_id)
+        .first()
+    )
+
+def get_articles_by_ids(db: Session, article_ids: List[int], options: tuple = ARTICLE_CARD) -> List[Article]:
+    if not article_ids:
+        return []
+    return db.query(Article).options(*options).filter(Article.id.in_(article_ids)).all()
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, ARTICLE_PAGE_SIZE_MAX))
+
+# statement ของ query อ่านบทความสร้างแยกจากการ execute เพื่อใช้ร่วมกันทั้ง Session และ AsyncSession (crud/async_article.py)
+def build_article_list_statement(
+    limit: int,
+    cursor: Optional[str] = None,
+    sort: str = "popular",
+    status: Optional[str] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    hashtag: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    if sort not in ARTICLE_SORT_COLUMNS:
+        raise HTTPException(status_code=422, detail=f"Unsupported sort: {sort}")
+    sort_column, _ = ARTICLE_SORT_COLUMNS[sort]
+
+    stmt = select(Article).options(*ARTICLE_CARD)
+
+    if status:
+        stmt = stmt.where(Article.status == status)
+    if created_from:
+        stmt = stmt.where(Article.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(Article.created_at < created_to)
+    if category_id is not None:
+        stmt = stmt.where(
+            select(ArticleCategory.id)
+            .where(ArticleCategory.article_id == Article.id, ArticleCategory.category_id == category_id)
+            .exists()
+        )
+    if subcategory_id is not None:
+        stmt = stmt.where(
+            select(ArticleSubCategory.id)
+            .where(ArticleSubCategory.article_id == Article.id, ArticleSubCategory.subcategory_id == subcategory_id)
+            .exists()
+        )
+    if tag:
+        stmt = stmt.where(
+            select(ArticleTag.article_id)
+            .join(Tag, Tag.id == ArticleTag.tag_id)
+            .where(ArticleTag.article_id == Article.id, Tag.name == tag)
+            .exists()
+        )
+    if hashtag:
+        stmt = stmt.where(
+            select(ArticleHashtag.article_id)
+            .join(Hashtag, Hashtag.id == ArticleHashtag.hashtag_id)
+            .where(ArticleHashtag.article_id == Article.id, Hashtag.name == hashtag)
+            .exists()
+        )
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort or "id" not in payload or "v" not in payload:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        last_value = payload["v"]
+        if sort == "latest":
+            last_value = parse_cursor_datetime(last_value)
+        # row comparison ให้ Postgres ใช้ index (sort, id) ได้ตรง ๆ
+        stmt = stmt.where(tuple_(sort_column, Article.id) < tuple_(last_value, payload["id"]))
+
+    return stmt.order_by(sort_column.desc(), Article.id.desc()).limit(limit + 1)
+
+def paginate_articles(rows: List[Article], sort: str, limit: int) -> tuple[List[Article], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor({"s": sort, "v": getattr(last, ARTICLE_SORT_COLUMNS[sort][1]), "id": last.id})
+    return rows, next_cursor
+
+def list_articles(
+    db: Session,
+    limit: int = ARTICLE_PAGE_SIZE_DEFAULT,
+    cursor: Optional[str] = None,
+    sort: str = "popular",
+    status: Optional[str] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    hashtag: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> tuple[List[Article], Optional[str]]:
+    limit = clamp_page_size(limit)
+    stmt = build_article_list_statement(
+        limit, cursor, sort, status, category_id, subcategory_id, tag, hashtag, created_from, created_to
+    )
+    return paginate_articles(db.scalars(stmt).all(), sort, limit)
 
 def update_article_with_categories(db: Session, slug: str, data: ArticleUpdate, category_ids: List[int] = []):
-    article = db.query(Article).filter(Article.slug == slug).first()
+    article = db.query(Article).options(*ARTICLE_ADMIN).filter(Article.slug == slug).first()
     if not article:
         return None
 
-    for field in ["title", "slug", "content", "status", "tags", "hashtag"]:
+    for field in ["title", "slug", "content", "status"]:
         value = getattr(data, field)
         if value is not None:
             setattr(article, field, value)
@@ -164,8 +285,9 @@ def update_article_with_categories(db: Session, slug: str, data: ArticleUpdate,
         article.end_date = datetime.fromisoformat(data.end_date)
     if data.tags is not None:
         article.tags = get_or_create_tags(db, data.tags)
-    if data.hashtag is not None:
+    if data.hashtags is not None:
         article.hashtags = get_or_create_hashtags(db, data.hashtags)
+    refresh_search_vector(article)
         
     db.execute("DELETE FROM article_category WHERE article_id = :aid", {"aid": article.id})
     for cat_id in category_ids:
@@ -175,60 +297,124 @@ def update_article_with_categories(db: Session, slug: str, data: ArticleUpdate,
         )
 
     db.commit()
-    db.refresh(article)
-    return article
+    response_cache.invalidate(f"article:{article.id}")
+    return get_article_by_id(db, article.id)
 
 def delete_article(db: Session, slug: str):
+    # ไม่ต้องโหลด relationship: ลูกทั้งหมดถูกลบด้วย ON DELETE CASCADE (passive_deletes)
     article = db.query(Article).filter(Article.slug == slug).first()
     if not article:
         return None
     db.query(ArticleMedia).filter(ArticleMedia.article_id == article.id).delete()
+    article_id = article.id
     db.delete(article)
     db.commit()
+    response_cache.invalidate(f"article:{article_id}")
     return True
 
-def record_article_view(db: Session, article_id: int, user_id: int, ip_address: str):
-    one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-
-    recent_view = db.query(ArticleViewLog).filter(
-        ArticleViewLog.article_id == article_id,
-        ArticleViewLog.ip_address == ip_address,
-        ArticleViewLog.viewed_at >= one_hour_ago
-    ).first()
+def record_article_view(article_id: int, user_id: int, ip_address: str) -> bool:
+    # ไม่แตะ DB ใน request: view ถูกรวมไว้ใน buffer แล้ว flush เป็น batch (app/services/view_counter.py)
+    return view_counter.record(article_id, user_id, ip_address)
 
-    if recent_view:
-        return False  # ไม่เพิ่ม view
+def build_article_search_statement(q: str, limit: int, offset: int = 0, status: Optional[str] = None):
+    """คืน None ถ้าคำค้นไม่มีคำที่ใช้ค้นได้"""
+    ts_query = build_search_query(q)
+    if ts_query is None:
+        return None
 
-    # เพิ่ม log
-    new_log = ArticleViewLog(
-        article_id=article_id,
-        user_id=user_id,
-        ip_address=ip_address
+    # GIN index กรองเฉพาะบทความที่ match ก่อน แล้วค่อย rank เฉพาะกลุ่มนั้น
+    rank = func.ts_rank(Article.search_vector, ts_query).label("rank")
+    stmt = (
+        select(Article, rank)
+        .options(*ARTICLE_CARD)
+        .where(Article.search_vector.op("@@")(ts_query))
     )
-    db.add(new_log)
+    if status:
+        stmt = stmt.where(Article.status == status)
+    return stmt.order_by(rank.desc(), Article.id.desc()).offset(offset).limit(limit + 1)
 
-    # เพิ่ม view_count
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if article:
-        article.view_count += 1
+def paginate_search_hits(rows, offset: int, limit: int) -> tuple[List[tuple[Article, float]], Optional[int]]:
+    next_offset = offset + limit if len(rows) > limit else None
+    return [(article, float(score)) for article, score in rows[:limit]], next_offset
 
-    db.commit()
-    return True
+def search_articles(
+    db: Session,
+    q: str,
+    limit: int = ARTICLE_PAGE_SIZE_DEFAULT,
+    offset: int = 0,
+    status: Optional[str] = None,
+) -> tuple[List[tuple[Article, float]], Optional[int]]:
+    limit = clamp_page_size(limit)
+    stmt = build_article_search_statement(q, limit, offset, status)
+    if stmt is None:
+        return [], None
+    return paginate_search_hits(db.execute(stmt).all(), offset, limit)
+
+def build_article_view_stats_statement(article_id: int, granularity: str = "daily",
+                                      since: Optional[datetime] = None, until: Optional[datetime] = None):
+    # อ่านจากตาราง rollup ไม่ scan article_view_log
+    model = ArticleViewHourly if granularity == "hourly" else ArticleViewDaily
+    stmt = select(model).where(model.article_id == article_id)
+    if since:
+        stmt = stmt.where(model.bucket_start >= since)
+    if until:
+        stmt = stmt.where(model.bucket_start < until)
+    return stmt.order_by(model.bucket_start.asc())
+
+def get_article_view_stats(db: Session, article_id: int, granularity: str = "daily",
+                           since: Optional[datetime] = None, until: Optional[datetime] = None):
+    return db.scalars(build_article_view_stats_statement(article_id, granularity, since, until)).all()
+
+def _apply_rating_delta(db: Session, article_id: int, count_delta: int, score_delta: float):
+    # อัปเดตแบบ atomic ฝั่ง DB เพื่อไม่ให้ request ที่เขียนพร้อมกันทับค่ากัน
+    db.query(Article).filter(Article.id == article_id).update(
+        {
+            Article.comment_count: Article.comment_count + count_delta,
+            Article.score_sum: Article.score_sum + score_delta,
+        },
+        synchronize_session=False
+    )
+
+def _lock_article(db: Session, article_id: int):
+    # เขียน comment ของบทความเดียวกันทีละ transaction: คะแนนเดิมที่อ่านได้จึงตรงกับแถวที่จะถูกแทนที่ และ delta ไม่ซ้อนกัน
+    db.query(Article.id).filter(Article.id == article_id).with_for_update().scalar()
 
 def create_or_update_comment(db: Session, article_id: int, user_id: int, comment_text: str, score: float):
-    existing = db.query(ArticleComment).filter_by(article_id=article_id, user_id=user_id).first()
-    if existing:
-        existing.comment = comment_text
-        existing.score = score
+    _lock_article(db, article_id)
+    previous_score = db.scalar(
+        select(ArticleComment.score).where(ArticleComment.article_id == article_id, ArticleComment.user_id == user_id)
+    )
+    stmt = pg_insert(ArticleComment).values(
+        article_id=article_id,
+        user_id=user_id,
+        comment=comment_text,
+        score=score,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        constraint="_article_comment_user_uc",
+        set_={"comment": stmt.excluded.comment, "score": stmt.excluded.score},
+    ))
+    if previous_score is None:
+        _apply_rating_delta(db, article_id, 1, score)
     else:
-        new_comment = ArticleComment(
-            article_id=article_id,
-            user_id=user_id,
-            comment=comment_text,
-            score=score
-        )
-        db.add(new_comment)
+        _apply_rating_delta(db, article_id, 0, score - previous_score)
     db.commit()
+    response_cache.invalidate(f"article:{article_id}")
+
+def delete_comment(db: Session, article_id: int, user_id: int) -> bool:
+    _lock_article(db, article_id)
+    scores = db.scalars(
+        delete(ArticleComment)
+        .where(ArticleComment.article_id == article_id, ArticleComment.user_id == user_id)
+        .returning(ArticleComment.score)
+    ).all()
+    if not scores:
+        db.rollback()
+        return False
+    _apply_rating_delta(db, article_id, -len(scores), -sum(scores))
+    db.commit()
+    response_cache.invalidate(f"article:{article_id}")
+    return True
 
 def get_comments_by_article(db: Session, article_id: int):
     return db.query(ArticleComment).filter_by(article_id=article_id).order_by(ArticleComment.created_at.asc()).all()
\ No newline at end of file
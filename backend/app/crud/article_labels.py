@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Type
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.models.article import Hashtag, Tag
+
+class LabelIdCache:
+    """cache name -> id ของ tag/hashtag (LRU) ใน process นี้
+
+    tag/hashtag ไม่เคยถูกลบหรือเปลี่ยนชื่อ id ที่ cache ไว้จึงไม่มีวันเก่า
+    แต่ id ที่เพิ่ง INSERT จะเข้า cache หลัง transaction commit แล้วเท่านั้น (ดู _flush_pending_ids)
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, names: Iterable[str]) -> Dict[str, int]:
+        found = {}
+        with self._lock:
+            for name in names:
+                label_id = self._ids.get(name)
+                if label_id is not None:
+                    self._ids.move_to_end(name)
+                    found[name] = label_id
+        return found
+
+    def set_many(self, ids: Dict[str, int]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for name, label_id in ids.items():
+                self._ids[name] = label_id
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+label_id_caches = {
+    Tag: LabelIdCache(settings.LABEL_ID_CACHE_MAX_ENTRIES),
+    Hashtag: LabelIdCache(settings.LABEL_ID_CACHE_MAX_ENTRIES),
+}
+
+PENDING_KEY = "pending_label_ids"
+
+# ชื่อ cache ของ GET /v1/api/articles/tags, /hashtags ใน response_cache
+LABEL_LIST_CACHE_TAGS = {Tag: "tags", Hashtag: "hashtags"}
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending_ids(session: Session):
+    for model, ids in session.info.pop(PENDING_KEY, {}).items():
+        label_id_caches[model].set_many(ids)
+        # มีชื่อใหม่ รายการ GET /tags, /hashtags ที่ cache ไว้จึงไม่ครบ
+        response_cache.invalidate(LABEL_LIST_CACHE_TAGS[model])
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_ids(session: Session):
+    session.info.pop(PENDING_KEY, None)
+
+def normalize_label_names(names: Iterable[str]) -> List[str]:
+    """ตัดช่องว่าง ตัดค่าว่าง และตัดชื่อซ้ำโดยคงลำดับเดิม"""
+    return list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+
+def get_or_create_labels(db: Session, model: Type, names: Iterable[str]) -> List:
+    """คืน object ของ Tag/Hashtag ตามชื่อ โดยสร้างที่ยังไม่มีในคำสั่งเดียว
+
+    ชื่อที่อยู่ใน cache ไม่ต้องถาม DB เลย ที่เหลือใช้ INSERT ... ON CONFLICT DO NOTHING RETURNING
+    (ปลอดภัยเมื่อหลาย request สร้างชื่อเดียวกันพร้อมกัน) แล้ว SELECT ชื่อที่มีอยู่แล้วอีกครั้งเดียว
+    """
+    names = normalize_label_names(names)
+    if not names:
+        return []
+
+    cache = label_id_caches[model]
+    ids = cache.get_many(names)
+    missing = sorted(n for n in names if n not in ids)  # เรียงชื่อ ให้ทุก transaction lock แถวตามลำดับเดียวกัน
+
+    if missing:
+        inserted = dict(db.execute(
+            insert(model)
+            .values([{"name": n} for n in missing])
+            .on_conflict_do_nothing(index_elements=[model.name])
+            .returning(model.name, model.id)
+        ).all())
+        if inserted:
+            db.info.setdefault(PENDING_KEY, {}).setdefault(model, {}).update(inserted)
+
+        existing_names = [n for n in missing if n not in inserted]
+        existing = dict(db.execute(
+            select(model.name, model.id).where(model.name.in_(existing_names))
+        ).all()) if existing_names else {}
+        cache.set_many(existing)
+
+        ids.update(inserted)
+        ids.update(existing)
+
+    labels = []
+    for name in names:
+        # ต่อ object เข้า session จาก id/name ที่รู้แล้ว โดยไม่ต้อง SELECT ซ้ำ
+        label = model(id=ids[name], name=name)
+        make_transient_to_detached(label)
+        labels.append(db.merge(label, load=False))
+    return labels
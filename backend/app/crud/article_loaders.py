@@ -0,0 +1,32 @@
+from sqlalchemy.orm import selectinload
+from app.models.article import Article
+
+# ชุด loader options ตามรูปแบบ response ของบทความ
+# ทุก path ที่อ่าน Article เพื่อ serialize ต้องใช้ชุดใดชุดหนึ่งนี้ ไม่งั้นแต่ละ relationship จะ lazy load ทีละบทความ (N+1)
+
+# ArticleCardOut (หน้า list) ไม่มี media และ comments (average_score อ่านจาก comment_count/score_sum)
+ARTICLE_CARD = (
+    selectinload(Article.tags),
+    selectinload(Article.hashtags),
+    selectinload(Article.categories),
+    selectinload(Article.subcategories),
+)
+
+# ArticleOut (หน้าอ่านบทความ)
+ARTICLE_DETAIL = (
+    selectinload(Article.tags),
+    selectinload(Article.hashtags),
+    selectinload(Article.categories),
+    selectinload(Article.subcategories),
+    selectinload(Article.article_media),
+    selectinload(Article.comments),
+)
+
+# path ที่แก้ไข/ลบบทความ: โหลด collection ที่ถูกเขียนทับ แต่ไม่ต้องโหลด comments
+ARTICLE_ADMIN = (
+    selectinload(Article.tags),
+    selectinload(Article.hashtags),
+    selectinload(Article.categories),
+    selectinload(Article.subcategories),
+    selectinload(Article.article_media),
+)
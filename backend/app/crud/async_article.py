@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.article import (
+    ARTICLE_PAGE_SIZE_DEFAULT,
+    build_article_list_statement,
+    build_article_search_statement,
+    build_article_view_stats_statement,
+    clamp_page_size,
+    paginate_articles,
+    paginate_search_hits,
+)
+from app.models.article import Article, ArticleComment, Hashtag, Tag
+
+# เวอร์ชัน AsyncSession ของ query อ่านใน crud/article.py ใช้ statement ชุดเดียวกัน ต่างกันแค่การ execute
+
+async def get_article_by_slug(db: AsyncSession, slug: str, options: tuple = ()) -> Optional[Article]:
+    return await db.scalar(select(Article).options(*options).where(Article.slug == slug))
+
+async def list_articles(
+    db: AsyncSession,
+    limit: int = ARTICLE_PAGE_SIZE_DEFAULT,
+    cursor: Optional[str] = None,
+    sort: str = "popular",
+    status: Optional[str] = None,
+    category_id: Optional[int] = None,
+    subcategory_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    hashtag: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> tuple[List[Article], Optional[str]]:
+    limit = clamp_page_size(limit)
+    stmt = build_article_list_statement(
+        limit, cursor, sort, status, category_id, subcategory_id, tag, hashtag, created_from, created_to
+    )
+    rows = (await db.scalars(stmt)).all()
+    return paginate_articles(list(rows), sort, limit)
+
+async def search_articles(
+    db: AsyncSession,
+    q: str,
+    limit: int = ARTICLE_PAGE_SIZE_DEFAULT,
+    offset: int = 0,
+    status: Optional[str] = None,
+) -> tuple[List[tuple[Article, float]], Optional[int]]:
+    limit = clamp_page_size(limit)
+    stmt = build_article_search_statement(q, limit, offset, status)
+    if stmt is None:
+        return [], None
+    rows = (await db.execute(stmt)).all()
+    return paginate_search_hits(rows, offset, limit)
+
+async def get_article_view_stats(db: AsyncSession, article_id: int, granularity: str = "daily",
+                                 since: Optional[datetime] = None, until: Optional[datetime] = None):
+    return (await db.scalars(build_article_view_stats_statement(article_id, granularity, since, until))).all()
+
+async def get_comments_by_article(db: AsyncSession, article_id: int):
+    stmt = select(ArticleComment).where(ArticleComment.article_id == article_id).order_by(ArticleComment.created_at.asc())
+    return (await db.scalars(stmt)).all()
+
+async def get_all_tags(db: AsyncSession):
+    return (await db.scalars(select(Tag))).all()
+
+async def get_all_hashtags(db: AsyncSession):
+    return (await db.scalars(select(Hashtag))).all()
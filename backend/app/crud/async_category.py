@@ -0,0 +1,17 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.category import Category, SubCategory
+
+# CategoryResponse มี subcategories ต้อง eager load เพราะ AsyncSession lazy load ไม่ได้
+async def get_all_category(db: AsyncSession):
+    return (await db.scalars(select(Category).options(selectinload(Category.subcategories)))).all()
+
+async def get_category_by_id(db: AsyncSession, category_id: int):
+    return await db.scalar(
+        select(Category).options(selectinload(Category.subcategories)).where(Category.id == category_id)
+    )
+
+async def get_subcategory_by_id(db: AsyncSession, subcategory_id: int):
+    return await db.get(SubCategory, subcategory_id)
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.category import Category, SubCategory
 from app.schemas.category import CategoryCreate, CategoryUpdate, SubCategoryCreate, SubCategoryUpdate
+from app.core.response_cache import response_cache
 
 # Category CRUD
 def get_all_category(db: Session):
@@ -14,6 +15,7 @@ def create_category(db: Session, category: CategoryCreate):
     db_category = Category(**category.dict())
     db.add(db_category)
     db.commit()
+    response_cache.invalidate("categories", "articles")
     db.refresh(db_category)
     return db_category
 
@@ -39,6 +41,7 @@ def update_category(db: Session, category_id: int, category_data: CategoryUpdate
             sub.status = "private"
 
     db.commit()
+    response_cache.invalidate("categories", "articles")
     db.refresh(category)
     return category
 
@@ -48,6 +51,7 @@ def delete_category(db: Session, category_id: int):
         return None
     db.delete(category)
     db.commit()
+    response_cache.invalidate("categories", "articles")
     return category
 
 # SubCategory CRUD
@@ -71,6 +75,7 @@ def create_subcategory(db: Session, subcategory: SubCategoryCreate):
     db_subcategory = SubCategory(**subcategory.dict())
     db.add(db_subcategory)
     db.commit()
+    response_cache.invalidate("categories", "articles")
     db.refresh(db_subcategory)
     return db_subcategory
 
@@ -92,6 +97,7 @@ def update_subcategory(db: Session, subcategory_id: int, subcategory_data: SubCa
     for key, value in subcategory_data.dict(exclude_unset=True).items():
         setattr(subcategory, key, value)
     db.commit()
+    response_cache.invalidate("categories", "articles")
     db.refresh(subcategory)
     return subcategory
 
@@ -101,4 +107,5 @@ def delete_subcategory(db: Session, subcategory_id: int):
         return None
     db.delete(subcategory)
     db.commit()
+    response_cache.invalidate("categories", "articles")
     return subcategory
@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.models import permission as permission_models
 from app.schemas import permission as permission_schemas
+from app.core.response_cache import response_cache
+from app.core.permission_cache import role_permission_cache
 
 def get_permission_by_id(db: Session, permission_id: int) -> Optional[permission_models.Permission]:
     return db.query(permission_models.Permission).filter(permission_models.Permission.id == permission_id).first()
@@ -13,6 +15,7 @@ def create_permission(db: Session, permission: permission_schemas.PermissionCrea
     db_permission = permission_models.Permission(**permission.dict())
     db.add(db_permission)
     db.commit()
+    response_cache.invalidate("permissions")
     db.refresh(db_permission)
     return db_permission
 
@@ -22,6 +25,8 @@ def delete_permission(db: Session, permission_id: int) -> bool:
         return False
     db.delete(db_permission)
     db.commit()
+    role_permission_cache.invalidate()
+    response_cache.invalidate("permissions")
     return True
 
 def update_permission(db: Session, permission_id: int, permission_update: permission_schemas.PermissionCreate) -> Optional[permission_models.Permission]:
@@ -30,5 +35,7 @@ def update_permission(db: Session, permission_id: int, permission_update: permis
         for key, value in permission_update.dict(exclude_unset=True).items():
             setattr(db_permission, key, value)
         db.commit()
+        role_permission_cache.invalidate()
+        response_cache.invalidate("permissions")
         db.refresh(db_permission)
     return db_permission
\ No newline at end of file
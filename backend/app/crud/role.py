@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.models import role as role_models
 from app.schemas import role as role_schemas
+from app.core.response_cache import response_cache
+from app.core.permission_cache import role_permission_cache
 
 def get_role_by_id(db: Session, role_id: int) -> Optional[role_models.Role]:
     return db.query(role_models.Role).filter(role_models.Role.id == role_id).first()
@@ -13,6 +15,7 @@ def create_role(db: Session, role: role_schemas.RoleCreate) -> role_models.Role:
     db_role = role_models.Role(**role.dict())
     db.add(db_role)
     db.commit()
+    response_cache.invalidate("roles")
     db.refresh(db_role)
     return db_role
 
@@ -22,6 +25,8 @@ def delete_role(db: Session, role_id: int) -> bool:
         return False
     db.delete(db_role)
     db.commit()
+    role_permission_cache.invalidate()
+    response_cache.invalidate("roles")
     return True
 
 
@@ -31,5 +36,6 @@ def update_role(db: Session, role_id: int, role_update: role_schemas.RoleCreate)
         for key, value in role_update.dict(exclude_unset=True).items():
             setattr(db_role, key, value)
         db.commit()
+        response_cache.invalidate("roles")
         db.refresh(db_role)
     return db_role
\ No newline at end of file
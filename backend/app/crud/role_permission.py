@@ -1,7 +1,10 @@
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List, Union
 from app.models import role_permission as role_permission_models
+from app.models.role import Role
 from app.schemas import role_permission as role_permission_schemas
+from app.core.permission_cache import role_permission_cache
 
 def get_role_permission_by_id(db: Session, rp_id: int) -> Optional[role_permission_models.RolePermission]:
     return db.query(role_permission_models.RolePermission).filter(role_permission_models.RolePermission.id == rp_id).first()
@@ -12,47 +15,55 @@ def get_all_role_permissions(db: Session, skip: int = 0, limit: int = 100) -> Li
 def get_role_permissions_by_role_id(db: Session, role_id: int) -> list[role_permission_models.RolePermission]:
     return db.query(role_permission_models.RolePermission).filter(role_permission_models.RolePermission.role_id == role_id).all()
 
+# ใส่ทั้งชุดในคำสั่งเดียว แถวที่มีอยู่แล้วข้ามด้วย _role_permission_uc
+INSERT_ROLE_PERMISSIONS = text("""
+    INSERT INTO role_permissions (role_id, permission_id)
+    SELECT :role_id, unnest(CAST(:permission_ids AS integer[]))
+    ON CONFLICT (role_id, permission_id) DO NOTHING
+    RETURNING id
+""")
+
+DELETE_OTHER_ROLE_PERMISSIONS = text("""
+    DELETE FROM role_permissions
+    WHERE role_id = :role_id AND NOT (permission_id = ANY(CAST(:permission_ids AS integer[])))
+""")
+
+def _permission_id_list(permission_ids: Union[int, List[int], None]) -> List[int]:
+    if permission_ids is None:
+        return []
+    if isinstance(permission_ids, int):
+        return [permission_ids]
+    return sorted(set(permission_ids))
+
+def _load_role_permissions(db: Session, *criteria) -> List[role_permission_models.RolePermission]:
+    # โหลด permission มาพร้อมกันใน query เดียว แทน refresh/lazy load ทีละแถว
+    return (
+        db.query(role_permission_models.RolePermission)
+        .options(joinedload(role_permission_models.RolePermission.permission))
+        .filter(*criteria)
+        .order_by(role_permission_models.RolePermission.id)
+        .all()
+    )
+
 def create_role_permission(db: Session, rp: role_permission_schemas.RolePermissionCreate):
+    if not isinstance(rp.permission_id, (int, list)):
+        # fallback ถ้า type ไม่ถูกต้อง
+        raise ValueError("Invalid type for permission_id")
+
+    permission_ids = _permission_id_list(rp.permission_id)
+    created_ids = db.scalars(
+        INSERT_ROLE_PERMISSIONS, {"role_id": rp.role_id, "permission_ids": permission_ids}
+    ).all()
+    db.commit()
+    role_permission_cache.invalidate()
+
+    RolePermission = role_permission_models.RolePermission
     if isinstance(rp.permission_id, int):
-        existing = db.query(role_permission_models.RolePermission).filter_by(
-            role_id=rp.role_id,
-            permission_id=rp.permission_id
-        ).first()
-        if existing:
-            return existing
-
-        db_rp = role_permission_models.RolePermission(
-            role_id=rp.role_id,
-            permission_id=rp.permission_id
-        )
-        db.add(db_rp)
-        db.commit()
-        db.refresh(db_rp)
-        return db_rp
-
-    elif isinstance(rp.permission_id, list):
-        created = []
-        for perm_id in rp.permission_id:
-            exists = db.query(role_permission_models.RolePermission).filter_by(
-                role_id=rp.role_id,
-                permission_id=perm_id
-            ).first()
-
-            if not exists:
-                db_rp = role_permission_models.RolePermission(
-                    role_id=rp.role_id,
-                    permission_id=perm_id
-                )
-                db.add(db_rp)
-                created.append(db_rp)
-
-        db.commit()
-        for rp_item in created:
-            db.refresh(rp_item)
-        return created
-
-    # fallback ถ้า type ไม่ถูกต้อง
-    raise ValueError("Invalid type for permission_id")
+        # คืนแถวเดิมถ้ามีอยู่แล้ว เหมือนก่อนหน้า
+        return _load_role_permissions(
+            db, RolePermission.role_id == rp.role_id, RolePermission.permission_id == rp.permission_id
+        )[0]
+    return _load_role_permissions(db, RolePermission.id.in_(created_ids)) if created_ids else []
 
 def delete_role_permission(db: Session, rp_id: int) -> Optional[role_permission_schemas.RolePermissionResponse]:
     rp = db.query(role_permission_models.RolePermission)\
@@ -67,34 +78,28 @@ def delete_role_permission(db: Session, rp_id: int) -> Optional[role_permission_
 
     db.delete(rp)
     db.commit()
+    role_permission_cache.invalidate()
 
     return rp_data
 
 def update_role_permission(
     db: Session,
     role_id: int,
-    permission_ids: Union[int, List[int]]
+    permission_ids: Union[int, List[int], None]
 ) -> List[role_permission_models.RolePermission]:
-    permission_ids = [permission_ids] if isinstance(permission_ids, int) else permission_ids
-
-    db.query(role_permission_models.RolePermission).filter(
-        role_permission_models.RolePermission.role_id == role_id
-    ).delete(synchronize_session=False)
-
+    """แทนที่ permission ทั้งชุดของ role ใน transaction เดียว: ลบเฉพาะที่ไม่อยู่ในชุดใหม่ แล้วเพิ่มที่ยังไม่มี
+
+    ผู้อ่านคนอื่นเห็นชุดเก่าหรือชุดใหม่เท่านั้น ไม่มีช่วงที่ role ไม่มี permission เลย
+    """
+    permission_ids = _permission_id_list(permission_ids)
+    params = {"role_id": role_id, "permission_ids": permission_ids}
+
+    # lock แถว role ให้การแทนที่ของ role เดียวกันพร้อมกันเรียงกันทำ
+    db.execute(select(Role.id).where(Role.id == role_id).with_for_update())
+    db.execute(DELETE_OTHER_ROLE_PERMISSIONS, params)
+    if permission_ids:
+        db.execute(INSERT_ROLE_PERMISSIONS, params)
     db.commit()
+    role_permission_cache.invalidate()
 
-    new_rps = []
-    for pid in permission_ids:
-        db_rp = role_permission_models.RolePermission(
-            role_id=role_id,
-            permission_id=pid
-        )
-        db.add(db_rp)
-        new_rps.append(db_rp)
-
-    db.commit()
-    for rp in new_rps:
-        db.refresh(rp)
-
-    return new_rps
-
+    return _load_role_permissions(db, role_permission_models.RolePermission.role_id == role_id)
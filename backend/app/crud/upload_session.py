@@ -0,0 +1,102 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.models.article import ArticleMedia
+from app.models.upload_session import UploadSession
+from app.schemas.upload_session import UploadSessionCreate
+
+def build_object_name(data: UploadSessionCreate, owner_id: int) -> str:
+    ext = os.path.splitext(data.filename)[1].lower() or ".bin"
+    if data.purpose == "avatar":
+        # ต้นฉบับที่รอ avatar_pipeline ย่อ (ถูกลบหลังประมวลผลเสร็จ)
+        return f"user_{owner_id}/uploads/{uuid.uuid4()}{ext}"
+    return f"article_{data.article_id}/{data.media_type}/{uuid.uuid4()}{ext}"
+
+def create_upload_session(db: Session, data: UploadSessionCreate, user_id: int, owner_id: int,
+                          bucket: str) -> UploadSession:
+    upload = UploadSession(
+        user_id=owner_id if data.purpose == "avatar" else user_id,
+        purpose=data.purpose,
+        article_id=data.article_id if data.purpose == "article_media" else None,
+        media_type=data.media_type if data.purpose == "article_media" else None,
+        bucket=bucket,
+        object_name=build_object_name(data, owner_id),
+        filename=data.filename,
+        content_type=data.content_type,
+        size=data.size,
+        md5=data.md5.lower() if data.md5 else None,
+        status="pending",
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_SESSION_EXPIRY_SECONDS),
+    )
+    db.add(upload)
+    db.commit()
+    return upload
+
+def get_upload_session_for_update(db: Session, session_id: UUID) -> Optional[UploadSession]:
+    # lock ไว้กัน finalize ซ้อนกันสองครั้งแล้วได้ ArticleMedia ซ้ำ
+    return db.query(UploadSession).filter(UploadSession.id == session_id).with_for_update().first()
+
+def reject_upload_session(db: Session, upload: UploadSession):
+    upload.status = "rejected"
+    upload.completed_at = datetime.now(timezone.utc)
+    db.commit()
+
+def complete_article_media_session(db: Session, upload: UploadSession, url: str) -> ArticleMedia:
+    """บันทึก ArticleMedia จากไฟล์ที่อัปโหลดตรงเสร็จแล้ว ใน transaction เดียวกับการปิด session"""
+    media = ArticleMedia(
+        article_id=upload.article_id,
+        filename=upload.filename,
+        file_type=upload.content_type,
+        url=url,
+        object_name=upload.object_name,
+        media_type=upload.media_type,
+    )
+    db.add(media)
+    upload.status = "completed"
+    upload.completed_at = datetime.now(timezone.utc)
+    db.commit()
+    response_cache.invalidate(f"article:{upload.article_id}")
+    return media
+
+def complete_avatar_session(db: Session, upload: UploadSession):
+    upload.status = "completed"
+    upload.completed_at = datetime.now(timezone.utc)
+    db.commit()
+
+def claim_expired_upload_sessions(db: Session, limit: int = 500) -> List[tuple[str, str]]:
+    """ลบ session ที่หมดอายุแล้วยังไม่ finalize คืน (bucket, object_name) ที่อาจถูกอัปโหลดค้างไว้"""
+    expired = db.scalars(
+        select(UploadSession)
+        .where(UploadSession.status == "pending", UploadSession.expires_at < datetime.now(timezone.utc))
+        .order_by(UploadSession.expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    objects = [(u.bucket, u.object_name) for u in expired]
+    for upload in expired:
+        db.delete(upload)
+    db.commit()
+    return objects
+
+def purge_expired_upload_sessions():
+    """งานเบื้องหลัง: ลบ session ที่หมดอายุและไฟล์ที่อาจถูกอัปโหลดค้างไว้โดยไม่ได้ finalize"""
+    from app.db.database import SessionLocal
+    from app.services.minio_service import get_minio_article_service, get_minio_avatar_service
+
+    with SessionLocal() as db:
+        objects = claim_expired_upload_sessions(db)
+    by_bucket: dict = {}
+    for bucket, object_name in objects:
+        by_bucket.setdefault(bucket, []).append(object_name)
+    for storage in (get_minio_article_service(), get_minio_avatar_service()):
+        names = by_bucket.get(storage.bucket)
+        if names:
+            storage.delete_objects(names)
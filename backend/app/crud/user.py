@@ -1,12 +1,21 @@
+import logging
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, text, tuple_, update
+from fastapi import HTTPException
 from typing import Optional, List
 from datetime import datetime, timedelta
-from app.models.user import User, UserProfile, UserSession
+from app.models.user import User, UserProfile, UserSession, UserFavoriteArticle
 from app.models.user_setting import UserSetting
 from app.models.article import Article
-from app.schemas.user import UserCreate, UserProfileUpdate, UserUpdate
-from app.core.security import get_password_hash, verify_password, generate_secure_token, hash_token
+from app.schemas.user import UserCreate, UserProfileBase, UserProfileUpdate, UserUpdate
+from app.core.security import get_password_hash, verify_and_update_password, generate_secure_token, hash_token
+from app.core.config import settings
+from app.core.session_cache import session_cache
+from app.core.response_cache import response_cache
+from app.core.session_revocation import session_revocations
+from app.core.pagination import encode_cursor, decode_cursor, parse_cursor_datetime
+
+logger = logging.getLogger(__name__)
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
     return db.query(User).options(joinedload(User.profile)).filter(User.email == email).first()
@@ -15,40 +24,95 @@ def get_user_by_username(db: Session, username: str) -> Optional[User]:
     return db.query(User).options(joinedload(User.profile)).filter(User.username == username).first()
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-    user = db.query(User).options(joinedload(User.profile)).filter(User.id == user_id).first()
-    if not user:
+    row = db.execute(
+        select(User, has_active_session()).options(joinedload(User.profile)).where(User.id == user_id)
+    ).first()
+    if not row:
         return None
-
-    active_session = (
-        db.query(UserSession)
-        .filter(UserSession.user_id == user.id, UserSession.is_active == True)
-        .order_by(UserSession.created_at.desc())
-        .first()
-    )
-    setattr(user, "is_active", bool(active_session))
+    user, is_active = row
+    setattr(user, "is_active", is_active)
     return user
 
-def get_users_list(db: Session, skip: int = 0, limit: int = 100, 
-                   role: Optional[str] = None, is_verified: Optional[bool] = None) -> List[User]:
-    query = db.query(User).options(joinedload(User.profile))
+USER_PAGE_SIZE_MAX = 1000
+
+USER_SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "username": User.username,
+    "email": User.email,
+}
+
+def has_active_session():
+    # EXISTS ต่อแถวใช้ partial index ix_user_sessions_user_id_active แทน query แยกทีละ user
+    return (
+        select(UserSession.id)
+        .where(UserSession.user_id == User.id, UserSession.is_active.is_(True))
+        .exists()
+        .label("is_active")
+    )
 
-    if role:
-        query = query.filter(User.role == role)
+def get_users_list(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    role_id: Optional[int] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    is_verified: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+) -> tuple[List[User], Optional[str]]:
+    """รายการ user พร้อม is_active ใน query เดียว แบบ keyset ตาม (sort, id) คืน (users, next_cursor)"""
+    if sort not in USER_SORT_COLUMNS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=422, detail=f"Unsupported sort: {sort} {order}")
+    sort_column = USER_SORT_COLUMNS[sort]
+    limit = max(1, min(limit, USER_PAGE_SIZE_MAX))
+    active = has_active_session()
+
+    stmt = select(User, active).options(joinedload(User.profile))
+
+    if role_id is not None or country or city:
+        stmt = stmt.join(UserProfile, UserProfile.user_id == User.id)
+        if role_id is not None:
+            stmt = stmt.where(UserProfile.role_id == role_id)
+        if country:
+            stmt = stmt.where(UserProfile.country == country)
+        if city:
+            stmt = stmt.where(UserProfile.city == city)
     if is_verified is not None:
-        query = query.filter(User.is_verified == is_verified)
-
-    users = query.offset(skip).limit(limit).all()
-
-    for user in users:
-        active_session = (
-            db.query(UserSession)
-            .filter(UserSession.user_id == user.id, UserSession.is_active == True)
-            .order_by(UserSession.created_at.desc())
-            .first()
-        )
-        setattr(user, "is_active", bool(active_session))
-
-    return users
+        stmt = stmt.where(User.is_verified == is_verified)
+    if is_active is not None:
+        stmt = stmt.where(active if is_active else ~active)
+
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort or payload.get("o") != order or "id" not in payload or "v" not in payload:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        last_value = payload["v"]
+        if sort == "created_at":
+            last_value = parse_cursor_datetime(last_value)
+        position = tuple_(sort_column, User.id)
+        stmt = stmt.where(position > tuple_(last_value, payload["id"]) if order == "asc"
+                          else position < tuple_(last_value, payload["id"]))
+
+    if order == "asc":
+        stmt = stmt.order_by(sort_column.asc(), User.id.asc())
+    else:
+        stmt = stmt.order_by(sort_column.desc(), User.id.desc())
+    # skip คงไว้ให้ client เดิม ใช้ cursor แทนเมื่อไล่หลายหน้า
+    rows = db.execute(stmt.offset(skip).limit(limit + 1)).all()
+
+    users = []
+    for user, user_is_active in rows[:limit]:
+        setattr(user, "is_active", user_is_active)
+        users.append(user)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = users[-1]
+        next_cursor = encode_cursor({"s": sort, "o": order, "v": getattr(last, sort), "id": last.id})
+    return users, next_cursor
 
 def create_user(db: Session, user: UserCreate, created_by: Optional[int] = None):
     new_user = User(
@@ -62,18 +126,20 @@ def create_user(db: Session, user: UserCreate, created_by: Optional[int] = None)
     db.add(new_user)
     db.flush()
 
+    # profile ใน UserCreate เป็น optional แต่ทุก user ต้องมีแถว user_profiles (ว่างได้)
+    user_profile = user.profile or UserProfileBase()
     profile = UserProfile(
         user_id=new_user.id,
-        title=user.profile.title,
-        first_name=user.profile.first_name,
-        last_name=user.profile.last_name,
-        phone=user.profile.phone,
-        date_of_birth=user.profile.date_of_birth,
-        gender=user.profile.gender,
-        role_id=user.profile.role_id,
-        country=user.profile.country,
-        city=user.profile.city,
-        address=user.profile.address,
+        title=user_profile.title,
+        first_name=user_profile.first_name,
+        last_name=user_profile.last_name,
+        phone=user_profile.phone,
+        date_of_birth=user_profile.date_of_birth,
+        gender=user_profile.gender,
+        role_id=user_profile.role_id,
+        country=user_profile.country,
+        city=user_profile.city,
+        address=user_profile.address,
     )
     db.add(profile)
     db.commit()
@@ -102,8 +168,12 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     
     if not user:
         return None
-    if not verify_password(password, user.password):
+    verified, new_hash = verify_and_update_password(password, user.password)
+    if not verified:
         return None
+    if new_hash:
+        # พารามิเตอร์ของ pwd_context เปลี่ยน (หรือยังเป็น bcrypt) rehash ตอน login ที่รู้รหัสผ่านจริง
+        user.password = new_hash
     
     user.last_login = datetime.utcnow()
     db.commit()
@@ -119,6 +189,7 @@ def update_user_password(db: Session, user_id: int, new_password: str,
     user.password = get_password_hash(new_password)
     user.modified_by = modified_by
     db.commit()
+    session_cache.invalidate_user(user_id)
     return True
 
 def verify_user_email(db: Session, user_id: int, verified_by: Optional[int] = None) -> bool:
@@ -129,6 +200,7 @@ def verify_user_email(db: Session, user_id: int, verified_by: Optional[int] = No
     user.is_verified = True
     user.modified_by = verified_by
     db.commit()
+    session_cache.invalidate_user(user_id)
     return True
 
 def create_user_session(db: Session, user_id: int, device_info: str = None, ip_address: str = None, user_agent: str = None,
@@ -139,8 +211,11 @@ def create_user_session(db: Session, user_id: int, device_info: str = None, ip_a
     old_session = db.query(UserSession).filter_by(user_id=user_id, is_active=True).first()
 
     if old_session:
+        old_session_id = old_session.id
         db.delete(old_session)
+        session_revocations.record(db, [old_session_id])
         db.commit()
+        session_cache.invalidate(old_session_id)
 
     session = UserSession.create_session(
         user_id=user_id,
@@ -187,10 +262,6 @@ def refresh_user_session(db: Session, refresh_token: str) -> Optional[tuple[str,
     if not session:
         return None
     
-    session.is_active = False
-    session.refresh_expires_at = datetime.utcnow()
-    session.modified_at = datetime.utcnow()
-    
     new_session_token = generate_secure_token(32)
     new_refresh_token = generate_secure_token(32)
     
@@ -204,8 +275,13 @@ def refresh_user_session(db: Session, refresh_token: str) -> Optional[tuple[str,
         created_at=datetime.utcnow(),
         modified_at=datetime.utcnow(),
     )
+    old_session_id = session.id
+    # แถวเดิมไม่มีประโยชน์แล้ว ลบใน transaction เดียวกับการสร้างแถวใหม่ แทนการปิดทิ้งไว้ทุกครั้งที่ refresh
+    db.delete(session)
     db.add(new_session)
+    session_revocations.record(db, [old_session_id])
     db.commit()
+    session_cache.invalidate(old_session_id)
     
     return new_session_token, new_refresh_token
 
@@ -215,34 +291,102 @@ def invalidate_session(db: Session, session_token: str) -> bool:
     
     if session:
         session.invalidate()
+        session_id = session.id
+        session_revocations.record(db, [session_id])
         db.commit()
+        session_cache.invalidate(session_id)
         return True
     return False
 
+def delete_session(db: Session, session_id) -> bool:
+    deleted = db.query(UserSession).filter(UserSession.id == session_id).delete(synchronize_session=False)
+    session_revocations.record(db, [session_id])
+    db.commit()
+    session_cache.invalidate(session_id)
+    return bool(deleted)
+
 def invalidate_all_user_sessions(db: Session, user_id: int) -> int:
-    count = db.query(UserSession).filter(
-        and_(
-            UserSession.user_id == user_id,
-            UserSession.is_active == True
-        )
-    ).update({"is_active": False})
-    
+    session_ids = db.scalars(
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.is_active.is_(True))
+        .values(is_active=False)
+        .returning(UserSession.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    session_revocations.record(db, session_ids)
     db.commit()
-    return count
+    session_cache.invalidate_user(user_id)
+    return len(session_ids)
+
+# session ที่ทั้ง access และ refresh token หมดอายุแล้วใช้ต่อไม่ได้ ปิดและล้าง hash ทิ้ง
+# (session ที่ access หมดแต่ refresh ยังไม่หมดต้องคง active ไว้ให้ refresh ได้)
+DEACTIVATE_EXPIRED_SESSIONS = text("""
+    UPDATE user_sessions
+    SET is_active = false, session_token_hash = NULL, refresh_token_hash = NULL, modified_at = now()
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE is_active AND GREATEST(expires_at, refresh_expires_at) < now()
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""").columns(UserSession.id)
+
+DELETE_INACTIVE_SESSIONS = text("""
+    DELETE FROM user_sessions
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE NOT is_active AND modified_at < now() - make_interval(secs => :retention)
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
 
-def clean_expired_sessions(db: Session) -> int:
-    count = db.query(UserSession).filter(
-        and_(
-            UserSession.is_active == True,
-            or_(
-                UserSession.expires_at < datetime.utcnow(),
-                UserSession.refresh_expires_at < datetime.utcnow()
-            )
-        )
-    ).update({"is_active": False})
-    
+def clean_expired_sessions(db: Session, batch_size: int = 1000) -> int:
+    """ปิด session ที่หมดอายุแล้วไม่เกิน batch_size แถว คืนจำนวนที่ปิด"""
+    session_ids = db.scalars(DEACTIVATE_EXPIRED_SESSIONS, {"batch_size": batch_size}).all()
+    db.commit()
+    for session_id in session_ids:
+        session_cache.invalidate(session_id)
+    return len(session_ids)
+
+def delete_inactive_sessions(db: Session, retention_seconds: float, batch_size: int = 1000) -> int:
+    """ลบ session ที่ไม่ active นานเกิน retention_seconds ไม่เกิน batch_size แถว คืนจำนวนที่ลบ"""
+    result = db.execute(DELETE_INACTIVE_SESSIONS, {"retention": retention_seconds, "batch_size": batch_size})
     db.commit()
-    return count
+    return result.rowcount
+
+def _run_janitor_batches(step, max_batches: int, batch_size: int) -> int:
+    from app.db.database import SessionLocal
+    from app.db.advisory_lock import try_advisory_xact_lock
+
+    total = 0
+    for _ in range(max_batches):
+        with SessionLocal() as db:
+            # lock อยู่ถึงจบ transaction ของ batch นี้ worker อื่นที่ถึงรอบพร้อมกันจะข้ามไป
+            if not try_advisory_xact_lock(db.connection(), "user_session_janitor"):
+                return total
+            count = step(db)
+        total += count
+        if count < batch_size:
+            break
+    return total
+
+def run_session_janitor():
+    """งานเบื้องหลัง: ปิด session ที่หมดอายุ แล้วลบแถวที่ไม่ active เกิน SESSION_INACTIVE_RETENTION_HOURS
+    ทีละ batch (transaction สั้น) ไม่เกิน SESSION_JANITOR_MAX_BATCHES ต่อรอบ"""
+    batch_size = settings.SESSION_JANITOR_BATCH_SIZE
+    max_batches = settings.SESSION_JANITOR_MAX_BATCHES
+    retention = settings.SESSION_INACTIVE_RETENTION_HOURS * 3600
+
+    deactivated = _run_janitor_batches(
+        lambda db: clean_expired_sessions(db, batch_size), max_batches, batch_size
+    )
+    deleted = _run_janitor_batches(
+        lambda db: delete_inactive_sessions(db, retention, batch_size), max_batches, batch_size
+    )
+    if deactivated or deleted:
+        logger.info(f"Session janitor deactivated {deactivated} and deleted {deleted} sessions")
 
 def get_user_active_sessions(db: Session, user_id: int) -> List[UserSession]:
     return db.query(UserSession).filter(
@@ -254,8 +398,15 @@ def get_user_active_sessions(db: Session, user_id: int) -> List[UserSession]:
     ).all()
     
 def delete_user(db: Session, user: User) -> User:
+    user_id = user.id
+    db.execute(RELEASE_USER_FAVORITES, {"user_id": user_id})
+    commented_article_ids = db.scalars(RELEASE_USER_COMMENTS, {"user_id": user_id}).all()
+    session_revocations.record(db, db.scalars(select(UserSession.id).where(UserSession.user_id == user_id)).all())
     db.delete(user)
     db.commit()
+    session_cache.invalidate_user(user_id)
+    for article_id in commented_article_ids:
+        response_cache.invalidate(f"article:{article_id}")
     return user
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate, modified_by: Optional[int] = None) -> Optional[User]:
@@ -295,61 +446,155 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate, modified_by:
     user.modified_by = modified_by
     db.add(user)
     db.commit()
+    session_cache.invalidate_user(user_id)
     db.refresh(user)
     return user
 
-def update_user_avatar(db: Session, user_id: int, avatar_url: str, avatar_filename: str, 
-                      modified_by: Optional[int] = None) -> bool:
-    """อัปเดต avatar ใน UserProfile"""
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    if profile:
-        profile.avatar_url = avatar_url
-        profile.avatar_filename = avatar_filename
-        profile.modified_by = modified_by
-        db.commit()
-        return True
-    return False
+def avatar_object_names(profile: UserProfile) -> List[str]:
+    """object ใน bucket ของ avatar ปัจจุบัน (ทุกขนาด หรือไฟล์เดียวของ avatar แบบเก่า)"""
+    if profile.avatar_variants and profile.avatar_variants.get("objects"):
+        return list(profile.avatar_variants["objects"])
+    if profile.avatar_url:
+        # avatar แบบเก่าเก็บ object name ไว้ใน query string ของ url (prefix=user_<id>/<file>)
+        object_name = profile.avatar_url.split("prefix=")[-1].split("&")[0]
+        if object_name.startswith(f"user_{profile.user_id}/"):
+            return [object_name]
+    return []
+
+def swap_user_avatar(db: Session, user_id: int, avatar_url: str, avatar_filename: str, avatar_variants: dict,
+                     modified_by: Optional[int] = None) -> tuple[bool, List[str]]:
+    """สลับ avatar เป็นชุดใหม่ใน transaction เดียว คืน (replaced, object ของชุดเก่า)
+
+    lock แถว profile ไว้ ถ้า avatar ปัจจุบันมาจาก upload ที่ใหม่กว่า (requested_at) จะไม่ทับ และคืน replaced=False
+    """
+    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).with_for_update().first()
+    if not profile:
+        db.rollback()
+        return False, []
+
+    current = profile.avatar_variants or {}
+    if current.get("requested_at", "") > avatar_variants["requested_at"]:
+        db.rollback()
+        return False, []
+
+    old_objects = avatar_object_names(profile)
+    profile.avatar_url = avatar_url
+    profile.avatar_filename = avatar_filename
+    profile.avatar_variants = avatar_variants
+    profile.modified_by = modified_by
+    db.commit()
+    return True, old_objects
 
-def remove_user_avatar(db: Session, user_id: int, modified_by: Optional[int] = None) -> Optional[str]:
-    """ลบ avatar จาก UserProfile และคืนค่า file_key เก่า"""
+def remove_user_avatar(db: Session, user_id: int, modified_by: Optional[int] = None) -> List[str]:
+    """ลบ avatar จาก UserProfile และคืนรายชื่อ object เก่าที่ต้องลบออกจาก bucket"""
     profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
     if profile and profile.avatar_url:
-        # Extract file_key from URL
-        old_file_key = profile.avatar_url.split(f"/{profile.user.id}/")[-1] if "/" in profile.avatar_url else None
-        
+        old_objects = avatar_object_names(profile)
+
         profile.avatar_url = None
         profile.avatar_filename = None
+        profile.avatar_variants = None
         profile.modified_by = modified_by
         db.commit()
-        
-        return f"user_{user_id}/{old_file_key}" if old_file_key else None
-    return None
 
-def add_favorite_article(db: Session, profile: UserProfile, article_id: int) -> UserProfile:
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
-        raise ValueError("Article not found")
+        return old_objects
+    return []
 
-    fav_articles = profile.fav_article or []
+FAVORITE_PAGE_SIZE_DEFAULT = 20
+FAVORITE_PAGE_SIZE_MAX = 100
 
-    if article_id in fav_articles:
-        raise ValueError("Article already in favorites")
-
-    fav_articles.append(article_id)
-    profile.fav_article = fav_articles
-
-    db.add(profile)
-    db.commit()
-    db.refresh(profile)
-    return profile
-
-
-def remove_favorite_article(db: Session, profile: UserProfile, article_id: int) -> UserProfile:
-    if not profile.fav_article or article_id not in profile.fav_article:
-        raise ValueError("Article not in favorites")
-
-    profile.fav_article.remove(article_id)
-    db.add(profile)
+# กด/ยกเลิก favorite แบบ idempotent: เขียนแถวใน join table และ favorite_count ของบทความในคำสั่งเดียว
+# บวก/ลบ count เฉพาะเมื่อมีแถวถูกเพิ่ม/ลบจริง กดซ้ำจึงไม่ทำให้ count เพี้ยน
+ADD_FAVORITE_ARTICLE = text("""
+    WITH added AS (
+        INSERT INTO user_favorite_article (user_id, article_id)
+        SELECT :user_id, id FROM article WHERE id = :article_id
+        ON CONFLICT (user_id, article_id) DO NOTHING
+        RETURNING article_id
+    )
+    UPDATE article SET favorite_count = favorite_count + 1
+    WHERE id IN (SELECT article_id FROM added)
+    RETURNING favorite_count
+""")
+
+REMOVE_FAVORITE_ARTICLE = text("""
+    WITH removed AS (
+        DELETE FROM user_favorite_article
+        WHERE user_id = :user_id AND article_id = :article_id
+        RETURNING article_id
+    )
+    UPDATE article SET favorite_count = favorite_count - 1
+    WHERE id IN (SELECT article_id FROM removed)
+    RETURNING favorite_count
+""")
+
+# ลบ user แล้วแถว favorite หายตาม CASCADE ต้องลด count ของบทความที่ user เคยกดไว้ก่อน
+RELEASE_USER_FAVORITES = text("""
+    UPDATE article SET favorite_count = favorite_count - 1
+    WHERE id IN (SELECT article_id FROM user_favorite_article WHERE user_id = :user_id)
+""")
+
+# comment ของ user ก็หายตาม CASCADE เหมือนกัน หัก comment_count/score_sum ของบทความที่ user เคย comment ออก
+RELEASE_USER_COMMENTS = text("""
+    UPDATE article a
+    SET comment_count = a.comment_count - c.n, score_sum = a.score_sum - c.total
+    FROM (
+        SELECT article_id, count(*) AS n, sum(score) AS total
+        FROM article_comment
+        WHERE user_id = :user_id
+        GROUP BY article_id
+    ) c
+    WHERE a.id = c.article_id
+    RETURNING a.id
+""")
+
+def _set_favorite(db: Session, statement, user_id: int, article_id: int) -> Optional[int]:
+    """คืน favorite_count ล่าสุด หรือ None ถ้าไม่มีบทความนี้"""
+    params = {"user_id": user_id, "article_id": article_id}
+    favorite_count = db.scalar(statement, params)
+    if favorite_count is None:
+        # ไม่มีแถวเปลี่ยน (กดซ้ำ/ไม่เคยกด) อ่าน count ปัจจุบันแทน
+        favorite_count = db.scalar(select(Article.favorite_count).where(Article.id == article_id))
     db.commit()
-    db.refresh(profile)
-    return profile
\ No newline at end of file
+    # หน้าบทความที่ cache ไว้มี favorite_count
+    if favorite_count is not None:
+        response_cache.invalidate(f"article:{article_id}")
+    return favorite_count
+
+def add_favorite_article(db: Session, user_id: int, article_id: int) -> Optional[int]:
+    return _set_favorite(db, ADD_FAVORITE_ARTICLE, user_id, article_id)
+
+def remove_favorite_article(db: Session, user_id: int, article_id: int) -> Optional[int]:
+    return _set_favorite(db, REMOVE_FAVORITE_ARTICLE, user_id, article_id)
+
+def get_favorite_articles(
+    db: Session,
+    user_id: int,
+    limit: int = FAVORITE_PAGE_SIZE_DEFAULT,
+    cursor: Optional[str] = None,
+    options: tuple = (),
+) -> tuple[List[Article], Optional[str]]:
+    """บทความที่ user กด favorite ใหม่สุดก่อน แบบ keyset ตาม (created_at, article_id) คืน (articles, next_cursor)"""
+    limit = max(1, min(limit, FAVORITE_PAGE_SIZE_MAX))
+    stmt = (
+        select(Article, UserFavoriteArticle.created_at)
+        .join(UserFavoriteArticle, UserFavoriteArticle.article_id == Article.id)
+        .where(UserFavoriteArticle.user_id == user_id)
+        .options(*options)
+    )
+    if cursor:
+        payload = decode_cursor(cursor)
+        if "t" not in payload or "id" not in payload:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        position = tuple_(UserFavoriteArticle.created_at, UserFavoriteArticle.article_id)
+        stmt = stmt.where(position < tuple_(parse_cursor_datetime(payload["t"]), payload["id"]))
+
+    stmt = stmt.order_by(UserFavoriteArticle.created_at.desc(), UserFavoriteArticle.article_id.desc())
+    rows = db.execute(stmt.limit(limit + 1)).all()
+
+    articles = [article for article, _ in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last_article, favorited_at = rows[limit - 1]
+        next_cursor = encode_cursor({"t": favorited_at, "id": last_article.id})
+    return articles, next_cursor
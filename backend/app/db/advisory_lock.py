@@ -0,0 +1,11 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# ใช้ advisory lock ของ Postgres เลือกให้มีแค่ worker เดียวทำงาน background (maintenance/janitor) ต่อรอบ
+def try_advisory_xact_lock(conn: Connection, name: str) -> bool:
+    """พยายามถือ lock ชื่อ name จนจบ transaction ปัจจุบัน คืน False ทันทีถ้า worker อื่นถืออยู่"""
+    return bool(conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"), {"name": name}).scalar())
+
+def advisory_xact_lock(conn: Connection, name: str):
+    """รอจนได้ lock ชื่อ name แล้วถือไว้จนจบ transaction ปัจจุบัน (สำหรับ migration ที่ทุก worker ต้องรอให้เสร็จก่อน)"""
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
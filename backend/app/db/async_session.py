@@ -0,0 +1,53 @@
+from typing import AsyncGenerator
+import logging
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, track_checkout_duration
+from app.core.metrics import instrument_query_timing
+
+logger = logging.getLogger(__name__)
+
+# engine แบบ async (asyncpg) ใช้ DATABASE_URL และค่า pool ชุดเดียวกับ engine sync แค่เปลี่ยน driver
+# ใช้กับ router แบบ async def ที่เปิดเมื่อ DB_ASYNC=true (ดู app/main.py)
+def async_database_url(url: str):
+    return make_url(url).set(drivername="postgresql+asyncpg")
+
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
+    connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+    echo=False
+)
+track_checkout_duration(async_engine.sync_engine, "async")
+instrument_query_timing(async_engine.sync_engine)
+
+# expire_on_commit=False: object ที่คืนจาก route ถูก serialize หลัง commit/close ได้โดยไม่ต้อง lazy load
+# (AsyncSession lazy load ไม่ได้ ทุก relationship ที่ response ใช้ต้องอยู่ใน loader options)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Async database session error: {e}")
+            await db.rollback()
+            raise
+
+__all__ = [
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
+]
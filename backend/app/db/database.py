@@ -1,16 +1,50 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from typing import Generator
+import logging
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedQueuePool, track_checkout_duration
+from app.core.metrics import instrument_query_timing
+
+logger = logging.getLogger(__name__)
+
+# engine เดียวของทั้ง process (app/db/session.py re-export จากที่นี่)
+# connection สูงสุดต่อ worker = DB_POOL_SIZE + DB_MAX_OVERFLOW (+ pool ของ async engine ถ้าเปิด DB_ASYNC)
+def statement_timeout_options() -> str:
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        return f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return ""
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
+    connect_args={"options": statement_timeout_options()},
+    echo=False
+)
+track_checkout_duration(engine, "sync")
+instrument_query_timing(engine)
+
+@event.listens_for(engine, "connect")
+def receive_connect(dbapi_connection, connection_record):
+    logger.info("New database connection established")
 
-engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
+    except Exception as e:
+        logger.error(f"Database session error: {e}")
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,209 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+from app.models.article import Article
+from app.db.advisory_lock import advisory_xact_lock
+from app.services.view_log_partitions import prepare_view_log_storage
+from app.services.search import backfill_search_vectors
+from app.core.rate_limit import CREATE_BUCKET_TABLE
+from app.core.session_revocation import CREATE_REVOCATION_TABLE
+
+logger = logging.getLogger(__name__)
+
+def create_rating_index(conn: Connection):
+    """สร้าง ix_article_rating_id จาก Index ของ model ให้ expression ตรงกับที่ ORM compile ตอน sort=rating
+
+    index รุ่นแรก (SQL เขียนมือ) ไม่มี CAST planner ใช้ไม่ได้ ถ้ายังเป็นรุ่นนั้นอยู่ลบแล้วสร้างใหม่
+    """
+    index = next(i for i in Article.__table__.indexes if i.name == "ix_article_rating_id")
+    existing = conn.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE indexname = :name AND schemaname = current_schema()"),
+        {"name": index.name},
+    ).scalar()
+    if existing is not None and "numeric" not in existing.lower():
+        conn.execute(text(f"DROP INDEX {index.name}"))
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+# create_all สร้างเฉพาะตารางที่ยังไม่มี ส่วน index/column ที่เพิ่มทีหลังบนตารางเดิมต้องมาสั่งตรงนี้
+# ทุกคำสั่งต้อง idempotent เพราะรันทุกครั้งที่ start (แต่ละรายการเป็น SQL หรือฟังก์ชันที่รับ connection)
+MIGRATIONS = [
+    # keyset pagination ของ list_articles
+    "CREATE INDEX IF NOT EXISTS ix_article_view_count_id ON article (view_count DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_article_created_at_id ON article (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_article_status_view_count_id ON article (status, view_count DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_article_status_created_at_id ON article (status, created_at DESC, id DESC)",
+    # คอลัมน์ที่ใช้เป็น keyset ต้องไม่เป็น NULL (tuple ที่มี NULL เทียบ < ไม่ได้ แถวจะหลุดจากหน้าถัดไป)
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'article' AND column_name IN ('created_at', 'view_count') AND is_nullable = 'YES'
+        ) THEN
+            UPDATE article SET created_at = coalesce(updated_at, now() AT TIME ZONE 'utc') WHERE created_at IS NULL;
+            UPDATE article SET view_count = 0 WHERE view_count IS NULL;
+            ALTER TABLE article
+                ALTER COLUMN created_at SET DEFAULT (now() AT TIME ZONE 'utc'),
+                ALTER COLUMN created_at SET NOT NULL,
+                ALTER COLUMN view_count SET DEFAULT 0,
+                ALTER COLUMN view_count SET NOT NULL;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_article_category_category_id_article_id ON article_category (category_id, article_id)",
+    "CREATE INDEX IF NOT EXISTS ix_article_subcategory_subcategory_id_article_id ON article_subcategory (subcategory_id, article_id)",
+    "CREATE INDEX IF NOT EXISTS ix_article_tag_tag_id_article_id ON article_tag (tag_id, article_id)",
+    "CREATE INDEX IF NOT EXISTS ix_article_hashtag_hashtag_id_article_id ON article_hashtag (hashtag_id, article_id)",
+    # aggregate คะแนน comment บน article (backfill ครั้งเดียวตอนเพิ่ม column)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'article' AND column_name = 'comment_count'
+        ) THEN
+            ALTER TABLE article
+                ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0,
+                ADD COLUMN score_sum DOUBLE PRECISION NOT NULL DEFAULT 0;
+            UPDATE article a
+            SET comment_count = s.n, score_sum = s.total
+            FROM (
+                SELECT article_id, count(*) AS n, sum(score) AS total
+                FROM article_comment
+                GROUP BY article_id
+            ) s
+            WHERE a.id = s.article_id;
+        END IF;
+    END
+    $$
+    """,
+    create_rating_index,
+    # article_view_log แบบ partition รายเดือน
+    prepare_view_log_storage,
+    # สร้างบน parent แล้ว Postgres สร้างให้ทุก partition (ทั้งที่มีอยู่และที่สร้างทีหลัง)
+    "CREATE INDEX IF NOT EXISTS ix_article_view_log_viewed_at_brin ON article_view_log USING brin (viewed_at)",
+    # full-text search
+    "ALTER TABLE article ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_article_search_vector ON article USING gin (search_vector)",
+    backfill_search_vectors,
+    # bucket ของ rate limiter แบบ RATE_LIMIT_BACKEND=postgres
+    CREATE_BUCKET_TABLE,
+    # is_active ของรายการ user (EXISTS session ที่ active ต่อ user) อ่านจาก index เล็กเฉพาะ session ที่ active
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_user_id_active ON user_sessions (user_id) WHERE is_active",
+    # session_janitor (crud/user.py) หา session ที่หมดอายุ/ที่ไม่ active เก่าแล้วจาก partial index
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_active_usable_until ON user_sessions ((GREATEST(expires_at, refresh_expires_at))) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_user_sessions_inactive_modified_at ON user_sessions (modified_at) WHERE NOT is_active",
+    # session ที่ถูกเพิกถอนของโหมด AUTH_STATELESS_TOKENS
+    CREATE_REVOCATION_TABLE,
+    # keyset ของ GET /v1/api/users/ ตาม (sort, id)
+    "CREATE INDEX IF NOT EXISTS ix_users_created_at_id ON users (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_id ON users (username, id)",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_id ON users (email, id)",
+    # url ทุกขนาดของ avatar
+    "ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS avatar_variants jsonb",
+    # key ของ media ใน bucket (แถวเก่าดึงจาก prefix= ใน url แบบ console)
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'article_media' AND column_name = 'object_name'
+        ) THEN
+            ALTER TABLE article_media ADD COLUMN object_name text;
+            UPDATE article_media
+            SET object_name = split_part(split_part(url, 'prefix=', 2), '&', 1)
+            WHERE url LIKE '%prefix=%';
+        END IF;
+    END
+    $$
+    """,
+    # role_permissions ห้ามซ้ำ (ใช้เป็นเป้า ON CONFLICT ของ crud/role_permission.py) ลบแถวซ้ำเก่าก่อนเพิ่ม constraint
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = '_role_permission_uc'
+        ) THEN
+            DELETE FROM role_permissions a
+            USING role_permissions b
+            WHERE a.role_id = b.role_id
+              AND a.permission_id = b.permission_id
+              AND a.id > b.id;
+            ALTER TABLE role_permissions
+                ADD CONSTRAINT _role_permission_uc UNIQUE (role_id, permission_id);
+        END IF;
+    END
+    $$
+    """,
+    # comment ละหนึ่งแถวต่อ (article_id, user_id): เก็บแถวล่าสุด ลบแถวซ้ำ แล้วคำนวณ aggregate ของบทความใหม่
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint WHERE conname = '_article_comment_user_uc'
+        ) THEN
+            DELETE FROM article_comment a
+            USING article_comment b
+            WHERE a.article_id = b.article_id
+              AND a.user_id = b.user_id
+              AND a.id < b.id;
+            ALTER TABLE article_comment
+                ADD CONSTRAINT _article_comment_user_uc UNIQUE (article_id, user_id);
+            UPDATE article a
+            SET comment_count = coalesce(s.n, 0), score_sum = coalesce(s.total, 0)
+            FROM article x
+            LEFT JOIN (
+                SELECT article_id, count(*) AS n, sum(score) AS total
+                FROM article_comment
+                GROUP BY article_id
+            ) s ON s.article_id = x.id
+            WHERE a.id = x.id;
+        END IF;
+    END
+    $$
+    """,
+    # favorite ย้ายจาก ARRAY user_profiles.fav_article ไป user_favorite_article (ครั้งเดียว แล้วลบ column เดิม)
+    "ALTER TABLE article ADD COLUMN IF NOT EXISTS favorite_count integer NOT NULL DEFAULT 0",
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'user_profiles' AND column_name = 'fav_article'
+        ) THEN
+            INSERT INTO user_favorite_article (user_id, article_id)
+            SELECT DISTINCT p.user_id, f.article_id
+            FROM user_profiles p
+            CROSS JOIN LATERAL unnest(p.fav_article) AS f(article_id)
+            JOIN article a ON a.id = f.article_id
+            ON CONFLICT (user_id, article_id) DO NOTHING;
+            UPDATE article a
+            SET favorite_count = s.n
+            FROM (
+                SELECT article_id, count(*) AS n
+                FROM user_favorite_article
+                GROUP BY article_id
+            ) s
+            WHERE a.id = s.article_id;
+            ALTER TABLE user_profiles DROP COLUMN fav_article;
+        END IF;
+    END
+    $$
+    """,
+]
+
+def run_migrations(engine: Engine):
+    with engine.begin() as conn:
+        # backfill/แปลงตารางตอน start อาจนานกว่า DB_STATEMENT_TIMEOUT_MS ของ request ปกติ
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        # ทุก worker รัน migration ตอน start พร้อมกัน ให้ทำทีละ worker (ตัวอื่นรอจน commit แล้วเจอว่าทำไปแล้ว)
+        # กัน convert_legacy_table ถูกรันซ้อนกันและ DDL ของสอง transaction ล็อกกันเอง
+        advisory_xact_lock(conn, "schema_migrations")
+        for statement in MIGRATIONS:
+            if callable(statement):
+                statement(conn)
+            else:
+                conn.execute(text(statement))
+    logger.info(f"Applied {len(MIGRATIONS)} schema migrations")
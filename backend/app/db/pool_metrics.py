@@ -0,0 +1,94 @@
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# วัดเวลารอ connection จาก pool (รวมเวลาเปิด connection ใหม่ตอนใช้ overflow) และเวลาที่ request ถือ connection ไว้
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check out a connection from the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time a connection stays checked out before it is returned to the pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ["pool"],
+)
+
+class PoolWaitStats:
+    """ตัวเลขสรุปของเวลารอ pool ใน process นี้ สำหรับ get_connection_info (histogram อยู่ที่ prometheus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "waits": self.count,
+                "wait_avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                "wait_max_ms": round(self.max * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+
+class _InstrumentedPoolMixin:
+    metrics_label = "sync"
+    wait_stats: PoolWaitStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            self.wait_stats.timeout()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            POOL_WAIT_SECONDS.labels(self.metrics_label).observe(waited)
+            self.wait_stats.observe(waited)
+
+def instrumented_pool_class(base, label: str):
+    """สร้าง subclass ของ QueuePool/AsyncAdaptedQueuePool ที่วัดเวลารอ checkout (แต่ละ label มี stats ของตัวเอง)"""
+    return type(
+        f"Instrumented{base.__name__}",
+        (_InstrumentedPoolMixin, base),
+        {"metrics_label": label, "wait_stats": PoolWaitStats()},
+    )
+
+InstrumentedQueuePool = instrumented_pool_class(QueuePool, "sync")
+InstrumentedAsyncQueuePool = instrumented_pool_class(AsyncAdaptedQueuePool, "async")
+
+def track_checkout_duration(engine: Engine, label: str):
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            POOL_CHECKOUT_SECONDS.labels(label).observe(time.perf_counter() - started)
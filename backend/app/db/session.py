@@ -1,54 +1,15 @@
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 from contextlib import contextmanager
 from typing import Generator
 import logging
 from app.core.config import settings
+from app.db.database import engine, SessionLocal, get_db
+from app.db.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-engine = create_engine(
-    settings.database_url,
-    poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,  
-    pool_recycle=3600,   
-    echo=False  
-)
-
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
-
-@event.listens_for(engine, "connect")
-def receive_connect(dbapi_connection, connection_record):
-    logger.info("New database connection established")
-
-@event.listens_for(engine, "checkout")
-def receive_checkout(dbapi_connection, connection_record, connection_proxy):
-    logger.debug("Connection checked out from pool")
-
-@event.listens_for(engine, "checkin")
-def receive_checkin(dbapi_connection, connection_record):
-    logger.debug("Connection returned to pool")
-
-def get_db() -> Generator[Session, None, None]:
-   
-    db = SessionLocal()
-    try:
-        yield db
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
 @contextmanager
 def get_db_context() -> Generator[Session, None, None]:   
     db = SessionLocal()
@@ -67,7 +28,7 @@ class DatabaseManager:
     def health_check() -> bool:
         try:
             with get_db_context() as db:
-                db.execute("SELECT 1")
+                db.execute(text("SELECT 1"))
                 return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
@@ -79,9 +40,13 @@ class DatabaseManager:
             pool = engine.pool
             return {
                 "pool_size": pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_timeout_seconds": settings.DB_POOL_TIMEOUT_SECONDS,
                 "checked_out_connections": pool.checkedout(),
                 "overflow_connections": pool.overflow(),
-                "checked_in_connections": pool.checkedin()
+                "checked_in_connections": pool.checkedin(),
+                **InstrumentedQueuePool.wait_stats.snapshot(),
+                "async": InstrumentedAsyncQueuePool.wait_stats.snapshot() if settings.DB_ASYNC else None
             }
         except Exception as e:
             logger.error(f"Failed to get connection info: {e}")
@@ -2,13 +2,28 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from app.routes import auth, profiles, user, category, user_setting, role, permission, role_permission, article
+from app.routes import auth, profiles, user, category, user_setting, role, permission, role_permission, article, health
+from app.routes import async_article, async_category, metrics, uploads
+from app.core.config import settings
 from app.db.database import engine, Base, SessionLocal
+from app.db.migrations import run_migrations
 from sqlalchemy.orm import Session
 from app.models.permission import Permission
 from app.core.logging import setup_logging
 from app.middleware.security import SecurityHeadersMiddleware
-from app.middleware.security import RateLimitMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.core.metrics import mark_worker_dead
+from app.core.rate_limit import build_rate_limiter, PostgresRateLimitBackend
+from app.core.scheduler import PeriodicTask
+from app.crud.upload_session import purge_expired_upload_sessions
+from app.crud.user import run_session_janitor
+from app.services.view_counter import view_counter
+from app.services.view_log_partitions import maintenance_task as view_log_maintenance
+from app.core.password_hashing import password_hasher
+from app.services.avatar_pipeline import avatar_pipeline
+from app.core.permission_cache import role_permission_cache
+from app.core.session_revocation import session_revocations
 from datetime import datetime
 import uvicorn
 
@@ -18,9 +33,25 @@ logger, security_logger = setup_logging()
 try:
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created successfully")
+    run_migrations(engine)
 except Exception as e:
     logger.error(f"Error creating database tables: {e}")
 
+rate_limiter = build_rate_limiter()
+rate_limit_purge = None
+if isinstance(rate_limiter.backend, PostgresRateLimitBackend):
+    rate_limit_purge = PeriodicTask("rate-limit-purge", settings.RATE_LIMIT_IDLE_SECONDS / 4, rate_limiter.backend.purge_idle)
+
+upload_session_cleanup = PeriodicTask(
+    "upload-session-cleanup", settings.UPLOAD_SESSION_CLEANUP_INTERVAL_SECONDS, purge_expired_upload_sessions
+)
+session_janitor = PeriodicTask("session-janitor", settings.SESSION_JANITOR_INTERVAL_SECONDS, run_session_janitor)
+session_revocation_sync = None
+if session_revocations.enabled:
+    session_revocation_sync = PeriodicTask(
+        "session-revocation-sync", session_revocations.sync_interval, session_revocations.sync
+    )
+
 app = FastAPI(
     title="Secure User Management API",
     version="2.0.0",
@@ -29,18 +60,22 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Middleware setup
+# Middleware setup (add ก่อน = อยู่ชั้นใน)
+# rate limit อยู่ใน CORS: 429 ได้ header Access-Control-Allow-Origin ไปด้วย browser จึงเห็น 429 ไม่ใช่ CORS error
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 app.add_middleware(SecurityHeadersMiddleware)
-# app.add_middleware(RateLimitMiddleware)
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost", "127.0.0.1", "*.yourdomain.com"])
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(MetricsMiddleware)  # add ทีหลังสุด = ชั้นนอกสุด วัดเวลารวม middleware อื่นด้วย
 
 PERMISSIONS = [
     ("view_home", "View Home Page"),
@@ -80,10 +115,46 @@ def startup_event():
     db = SessionLocal()
     try:
         seed_permissions(db)  # <<-- seed permissions ที่คุณต้องการ
+        role_permission_cache.load(db)
     finally:
         db.close()
+    view_counter.start()
+    view_log_maintenance.start()
+    if rate_limit_purge:
+        rate_limit_purge.start()
+    upload_session_cleanup.start()
+    session_janitor.start()
+    if session_revocation_sync:
+        session_revocations.reload()  # ต้องรู้รายการเพิกถอนก่อนรับ request แรก
+        session_revocations.start()
+        session_revocation_sync.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    view_log_maintenance.stop()
+    if rate_limit_purge:
+        rate_limit_purge.stop()
+    upload_session_cleanup.stop()
+    session_janitor.stop()
+    if session_revocation_sync:
+        session_revocation_sync.stop()
+        session_revocations.stop()
+    view_counter.stop()  # flush view ที่ค้างอยู่ใน buffer ก่อนปิด
+    avatar_pipeline.shutdown()  # รอ avatar ที่รับไว้แล้วให้เสร็จ
+    password_hasher.shutdown()
+    mark_worker_dead()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if settings.DB_ASYNC:
+        from app.db.async_session import async_engine
+        await async_engine.dispose()
         
 # Include routers
+if settings.DB_ASYNC:
+    # ต้อง include ก่อน router sync ของ path เดียวกัน เพื่อให้ GET ถูก match ที่ router async ก่อน
+    app.include_router(async_article.router)
+    app.include_router(async_category.router)
 app.include_router(auth.router)
 app.include_router(profiles.router)
 app.include_router(user.router)
@@ -93,6 +164,9 @@ app.include_router(permission.router)
 app.include_router(role_permission.router)
 app.include_router(category.router)
 app.include_router(article.router)
+app.include_router(uploads.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info", access_log=True)
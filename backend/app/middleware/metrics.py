@@ -0,0 +1,73 @@
+import time
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    RequestDbStats,
+    request_db_stats,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware เก็บ metrics ต่อ request โดย label ด้วย route template (เช่น /v1/api/articles/{slug:path})
+
+    ใช้ template แทน path จริงเพื่อไม่ให้จำนวน series โตตาม slug/id, request ที่ไม่ match route ใดรวมเป็น "unmatched"
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: dict = {}
+
+    def _route_template(self, scope: Scope) -> str:
+        # Router ของ Starlette ใส่ endpoint ที่ match ลงใน scope ตอน dispatch
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(endpoint)
+        if template is None:
+            routes = getattr(scope.get("app"), "routes", [])
+            for route in routes:
+                if isinstance(route, BaseRoute) and getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            template = template or UNMATCHED_ROUTE
+            self._templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+
+            route = self._route_template(scope)
+            labels = (scope["method"], route, str(status_code))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_LATENCY.labels(*labels).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
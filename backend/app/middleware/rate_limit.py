@@ -0,0 +1,54 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.client_ip import resolve_client_ip
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimiter, retry_after_header
+
+# ASGI ล้วนเหมือน SecurityHeadersMiddleware (app/middleware/security.py)
+
+class RateLimitMiddleware:
+    """token bucket ต่อ client ตาม policy ของ route (ดู app/core/rate_limit.py), O(1) ต่อ request"""
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+        # backend ที่คุยกับ DB ต้องไม่ block event loop
+        self._blocking = not isinstance(limiter.backend, InMemoryRateLimitBackend)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.limiter.policy_for(scope["method"], scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # IP เดียวกับ get_client_ip (เชื่อ X-Forwarded-For เฉพาะจาก TRUSTED_PROXIES)
+        client_ip = resolve_client_ip(
+            scope["client"][0] if scope.get("client") else None,
+            headers.get("x-forwarded-for"),
+            headers.get("x-real-ip"),
+        )
+        authorization = headers.get("authorization")
+        key = self.limiter.client_key(policy, client_ip, authorization)
+
+        if self._blocking:
+            allowed, retry_after = await run_in_threadpool(self.limiter.take, key, policy)
+        else:
+            allowed, retry_after = self.limiter.take(key, policy)
+
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": retry_after_header(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
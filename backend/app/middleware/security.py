@@ -1,53 +1,39 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-from starlette.responses import Response
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from datetime import datetime, timedelta
-from collections import defaultdict
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, calls: int = 100, period: int = 3600):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        self.clients = defaultdict(list)
-
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        now = datetime.utcnow()
-
-        self.clients[client_ip] = [
-            ts for ts in self.clients[client_ip]
-            if now - ts < timedelta(seconds=self.period)
-        ]
-
-        if len(self.clients[client_ip]) >= self.calls:
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Rate limit exceeded"}
-            )
-
-        self.clients[client_ip].append(now)
-
-        return await call_next(request)
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next):
-        response: Response = await call_next(request)
-
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-
-        # HSTS header (only for HTTPS)
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-
-        return response
\ No newline at end of file
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# ASGI ล้วน (ไม่ใช้ BaseHTTPMiddleware) จึงไม่สร้าง task/stream เพิ่มต่อ request
+# และไม่บัฟเฟอร์ response body (StreamingResponse ยังส่งทีละ chunk ได้)
+# ไม่ import settings ของ app ให้ benchmarks/middleware_overhead.py รันได้โดยไม่ต้องตั้ง env
+
+SECURITY_HEADERS = [
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+]
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        is_https = scope.get("scheme") == "https"
+
+        async def send_with_headers(message: Message):
+            # ใส่ header ตอนเริ่มส่ง response ก่อน body ชิ้นแรก
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS:
+                    headers[name] = value
+
+                # HSTS header (only for HTTPS)
+                if is_https:
+                    headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
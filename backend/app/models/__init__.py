@@ -0,0 +1,3 @@
+# import ทุก model ไว้ที่นี่ ให้ relationship แบบชื่อ (เช่น "Role") resolve ได้เสมอ
+# ไม่ว่า module ไหนจะถูก import ก่อน (loader options ใน crud/article_loaders.py configure mapper ตั้งแต่ตอน import)
+from app.models import article, category, permission, role, role_permission, upload_session, user, user_role, user_setting  # noqa: F401
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, BigInteger, UniqueConstraint, Table, Float
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID, INET
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, BigInteger, UniqueConstraint, Table, Float, Index, Numeric, cast, literal_column, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID, INET, TSVECTOR
 from datetime import datetime
 from app.db.database import Base
 from sqlalchemy import Enum
@@ -19,17 +21,35 @@ class Article(Base):
     content = Column(Text)
     start_date = Column(DateTime, nullable=True)
     end_date = Column(DateTime, nullable=True)
-    view_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # view_count/created_at เป็น keyset ของ list_articles จึงห้ามเป็น NULL (migrations.py backfill แถวเดิม)
+    view_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # aggregate ของคะแนน comment อัปเดตใน transaction เดียวกับการเขียน comment (crud/article.py)
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    score_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    # จำนวนแถวใน user_favorite_article ของบทความนี้ อัปเดตใน transaction เดียวกับการกด/ยกเลิก favorite (crud/user.py)
+    favorite_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # title/tags/content ที่ถ่วงน้ำหนักแล้ว สำหรับ full-text search (app/services/search.py)
+    # deferred: ใช้แค่ใน WHERE/ORDER BY ของการค้นหา ไม่ต้องลาก tsvector ขนาดใหญ่มากับทุก query ของ Article
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=text("(now() AT TIME ZONE 'utc')"))
     updated_at = Column(DateTime, default=datetime.utcnow)
 
     tags = relationship("Tag", secondary="article_tag", back_populates="articles")
     hashtags = relationship("Hashtag", secondary="article_hashtag", back_populates="articles")
-    article_media = relationship("ArticleMedia", back_populates="article", cascade="all, delete-orphan")
-    view_logs = relationship("ArticleViewLog", back_populates="article", cascade="all, delete-orphan")
+    article_media = relationship("ArticleMedia", back_populates="article", cascade="all, delete-orphan", passive_deletes=True)
+    view_logs = relationship("ArticleViewLog", back_populates="article", cascade="all, delete-orphan", passive_deletes=True)
     categories = relationship("Category", secondary="article_category", back_populates="articles")
     subcategories = relationship("SubCategory", secondary="article_subcategory", back_populates="articles")
-    comments = relationship("ArticleComment", back_populates="article", cascade="all, delete-orphan")
+    comments = relationship("ArticleComment", back_populates="article", cascade="all, delete-orphan", passive_deletes=True, order_by="ArticleComment.created_at")
+
+    # index สำหรับ keyset pagination ของ list_articles (sort + id เป็น tie-breaker)
+    __table_args__ = (
+        Index("ix_article_view_count_id", view_count.desc(), id.desc()),
+        Index("ix_article_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_article_status_view_count_id", status, view_count.desc(), id.desc()),
+        Index("ix_article_status_created_at_id", status, created_at.desc(), id.desc()),
+        Index("ix_article_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     @property
     def category_names(self):
@@ -59,15 +79,29 @@ class Article(Base):
     def attached_media(self):
         return [m for m in self.media_links if m.media_type == MediaTypeEnum.attached]
     
+    @hybrid_property
+    def rating(self) -> float:
+        if not self.comment_count:
+            return 0.0
+        return self.score_sum / self.comment_count
+
+    @rating.expression
+    def rating(cls):
+        # เขียน CAST และเลข 0 ตรง ๆ ให้ SQL ที่ได้คงที่ (ไม่มี bind parameter / CAST ที่ SQLAlchemy เติมเอง)
+        # ต้องตรงกับ expression ของ ix_article_rating_id ทุกตัวอักษร planner ถึงใช้ index ได้
+        zero = literal_column("0")
+        return func.coalesce(cls.score_sum.op("/")(cast(func.nullif(cls.comment_count, zero), Numeric)), zero)
+
     @property
     def average_score(self) -> float:
-        if not self.comments:
-            return 0.0
-        return round(sum(c.score for c in self.comments) / len(self.comments), 2)
+        return round(self.rating, 2)
 
     @property
     def ordered_comments(self):
-        return sorted(self.comments, key=lambda c: c.created_at)
+        # relationship เรียงตาม created_at มาจาก query แล้ว
+        return list(self.comments)
+
+Index("ix_article_rating_id", Article.rating.desc(), Article.id.desc())
 
 class ArticleMedia(Base):
     __tablename__ = "article_media"
@@ -76,6 +110,7 @@ class ArticleMedia(Base):
     filename = Column(Text, nullable=False)
     file_type = Column(String, nullable=False)
     url = Column(Text, nullable=False)
+    object_name = Column(Text, nullable=True)  # key ใน bucket ของบทความ ใช้เซ็น URL ดาวน์โหลด
     media_type = Column(Enum(MediaTypeEnum, name="media_type_enum"), nullable=False, default="attached", index=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
@@ -85,24 +120,62 @@ class ArticleMedia(Base):
     def media(self):
         return self
 
+    @property
+    def download_url(self) -> str:
+        from app.services.media_urls import media_download_url
+        return media_download_url(self)
+
 class ArticleViewLog(Base):
+    # partition รายเดือนตาม viewed_at ตัว partition สร้าง/ลบโดย app/services/view_log_partitions.py
     __tablename__ = "article_view_log"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    ip_address = Column(INET, nullable=False, index=True)
-    viewed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    ip_address = Column(INET, nullable=False)
+    viewed_at = Column(DateTime, default=datetime.utcnow, primary_key=True)
 
     article = relationship("Article", back_populates="view_logs")
-    
+
+    __table_args__ = (
+        # ตรงกับเงื่อนไข dedup (article, ip, ช่วงเวลา) ตอน flush view
+        Index("ix_article_view_log_dedup", "article_id", "ip_address", "viewed_at"),
+        # rollup_views อ่านช่วง viewed_at ล่าสุด log เขียนต่อท้ายเรียงตามเวลา BRIN เล็กและพอ
+        Index("ix_article_view_log_viewed_at_brin", "viewed_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (viewed_at)"},
+    )
+
+class ArticleViewHourly(Base):
+    __tablename__ = "article_view_hourly"
+
+    article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    unique_ips = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_article_view_hourly_bucket_start", "bucket_start"),)
+
+class ArticleViewDaily(Base):
+    __tablename__ = "article_view_daily"
+
+    article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    unique_ips = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_article_view_daily_bucket_start", "bucket_start"),)
+
+
 class ArticleCategory(Base):
     __tablename__ = "article_category"
     id = Column(Integer, primary_key=True)
     article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"))
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"))
     
-    __table_args__ = (UniqueConstraint("article_id", "category_id", name="_article_category_uc"),)
+    __table_args__ = (
+        UniqueConstraint("article_id", "category_id", name="_article_category_uc"),
+        Index("ix_article_category_category_id_article_id", "category_id", "article_id"),
+    )
 
 class ArticleSubCategory(Base):
     __tablename__ = "article_subcategory"
@@ -113,6 +186,7 @@ class ArticleSubCategory(Base):
 
     __table_args__ = (
         UniqueConstraint("article_id", "subcategory_id", name="_article_subcategory_uc"),
+        Index("ix_article_subcategory_subcategory_id_article_id", "subcategory_id", "article_id"),
     )
 
 class Tag(Base):
@@ -134,13 +208,19 @@ class ArticleTag(Base):
     article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), primary_key=True)
     tag_id = Column(Integer, ForeignKey("tag.id", ondelete="CASCADE"), primary_key=True)
 
+    __table_args__ = (Index("ix_article_tag_tag_id_article_id", "tag_id", "article_id"),)
+
 class ArticleHashtag(Base):
     __tablename__ = "article_hashtag"
     article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), primary_key=True)
     hashtag_id = Column(Integer, ForeignKey("hashtag.id", ondelete="CASCADE"), primary_key=True)
 
+    __table_args__ = (Index("ix_article_hashtag_hashtag_id_article_id", "hashtag_id", "article_id"),)
+
 class ArticleComment(Base):
     __tablename__ = "article_comment"
+    # comment ละหนึ่งแถวต่อ user ต่อบทความ (เป้า ON CONFLICT ของ crud/article.py)
+    __table_args__ = (UniqueConstraint("article_id", "user_id", name="_article_comment_user_uc"),)
 
     id = Column(Integer, primary_key=True)
     article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.db.database import Base
+import uuid
+
+class UploadSession(Base):
+    """ไฟล์ที่ client อัปโหลดตรงเข้า MinIO ด้วย presigned URL รอ finalize (ดู routes/uploads.py)"""
+    __tablename__ = "upload_session"
+    __table_args__ = (
+        # งานล้าง session ที่หมดอายุอ่านเฉพาะแถวที่ยัง pending
+        Index("ix_upload_session_pending_expires_at", "expires_at", postgresql_where=text("status = 'pending'")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    purpose = Column(String(20), nullable=False)  # article_media | avatar
+    article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), nullable=True)
+    media_type = Column(String(20), nullable=True)  # embedded | attached (เฉพาะ article_media)
+
+    bucket = Column(String(100), nullable=False)
+    object_name = Column(Text, nullable=False, unique=True)
+    filename = Column(Text, nullable=False)
+    content_type = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    md5 = Column(String(32), nullable=True)
+
+    status = Column(String(20), nullable=False, default="pending")  # pending | completed | rejected
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,8 +1,7 @@
-from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Enum, Text, Date, ForeignKey, Integer
+from sqlalchemy import Column, BigInteger, String, Boolean, DateTime, Enum, Text, Date, ForeignKey, Integer, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import INET, UUID, ARRAY
-from sqlalchemy.ext.mutable import MutableList
+from sqlalchemy.dialects.postgresql import INET, UUID, JSONB
 from app.db.database import Base
 from pydantic import BaseModel
 import enum
@@ -72,13 +71,12 @@ class UserProfile(Base):
     
     avatar_url = Column(String(500), nullable=True) 
     avatar_filename = Column(String(255), nullable=True)
+    avatar_variants = Column(JSONB, nullable=True)  # url ทุกขนาด/format จาก avatar_pipeline
     
     country = Column(String(50), index=True)
     city = Column(String(50), index=True)
     address = Column(Text)
     
-    fav_article = Column(MutableList.as_mutable(ARRAY(BigInteger)), nullable=True)
-    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(BigInteger, ForeignKey('users.id'), nullable=True)
     modified_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -113,6 +111,19 @@ class UserProfile(Base):
         else:
             return "User"
 
+class UserFavoriteArticle(Base):
+    """บทความที่ user กด favorite (แทน ARRAY fav_article เดิมบน user_profiles)"""
+    __tablename__ = "user_favorite_article"
+    __table_args__ = (
+        # นับ/ลบ favorite ของบทความ และ keyset ของ GET /me/favorite (ใหม่สุดก่อน)
+        Index("ix_user_favorite_article_article_id", "article_id"),
+        Index("ix_user_favorite_article_user_id_created_at", "user_id", "created_at", "article_id"),
+    )
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    article_id = Column(Integer, ForeignKey("article.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
 class UserSession(Base):
     __tablename__ = "user_sessions"
 
@@ -170,4 +181,17 @@ class UserSession(Base):
 
     def invalidate(self):
         self.is_active = False
+
+# ให้ session_janitor (crud/user.py) หา session ที่ใช้ต่อไม่ได้แล้วจาก index เล็ก ไม่ scan ทั้งตาราง
+# GREATEST ข้าม NULL: session ที่ไม่มี refresh token ใช้ expires_at อย่างเดียว
+Index(
+    "ix_user_sessions_active_usable_until",
+    func.greatest(UserSession.expires_at, UserSession.refresh_expires_at),
+    postgresql_where=text("is_active"),
+)
+Index(
+    "ix_user_sessions_inactive_modified_at",
+    UserSession.modified_at,
+    postgresql_where=text("NOT is_active"),
+)
        
\ No newline at end of file
@@ -1,25 +1,37 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Body, Request
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Body, Request, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
 from slugify import slugify
 
 from app.db.session import get_db
-from app.schemas.article import ArticleCreate, ArticleOut, ArticleUpdate, ArticleMediaIn, TagOut, HashtagOut, ArticleCommentCreate, ArticleCommentOut
+from app.schemas.article import ArticleCreate, ArticleOut, ArticlePage, ArticleUpdate, ArticleMediaIn, TagOut, HashtagOut, ArticleCommentCreate, ArticleCommentOut, ArticleViewStatOut, ArticleSearchPage
 from app.crud.article import (
     create_article_with_categories,
-    upload_and_attach_media,
-    replace_media_placeholders,
+    validate_article_categories,
+    reserve_article_id,
     str_to_list,
     list_articles,
     update_article_with_categories,
     delete_article,
     get_article_by_slug,
+    get_article_by_id,
     create_or_update_comment,
+    delete_comment,
     get_comments_by_article,
-    record_article_view
+    record_article_view,
+    get_article_view_stats,
+    search_articles,
+    ARTICLE_PAGE_SIZE_DEFAULT,
+    ARTICLE_PAGE_SIZE_MAX,
+    ARTICLE_SEARCH_OFFSET_MAX
 )
+from app.crud.article_loaders import ARTICLE_DETAIL
 from app.services.minio_service import get_minio_article_service
+from app.services.media_upload import upload_article_media, discard_uploaded_media
+from app.services.search import highlight_snippet
+from app.services.media_urls import prime_article_media_urls
+from app.core.response_cache import response_cache
 from app.models.article import Article, Tag, Hashtag
 from app.routes.auth import get_current_user
 from app.models.user import User
@@ -27,12 +39,20 @@ from app.models.user import User
 router = APIRouter(prefix="/v1/api/articles", tags=["Articles"], dependencies=[Depends(get_current_user)])
 
 @router.get("/tags", response_model=List[TagOut])
-def get_all_tags(db: Session = Depends(get_db)):
-    return db.query(Tag).all()
+def get_all_tags(request: Request, db: Session = Depends(get_db)):
+    key = response_cache.key_for("tags", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, db.query(Tag).all(), List[TagOut])
+    return cached.response(request)
 
 @router.get("/hashtags", response_model=List[HashtagOut])
-def get_all_hashtags(db: Session = Depends(get_db)):
-    return db.query(Hashtag).all()
+def get_all_hashtags(request: Request, db: Session = Depends(get_db)):
+    key = response_cache.key_for("hashtags", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, db.query(Hashtag).all(), List[HashtagOut])
+    return cached.response(request)
 
 @router.post("/", response_model=ArticleOut)
 def create_article_with_media(
@@ -94,21 +114,75 @@ def create_article_with_media(
         subcategory_ids=subcategory_ids_list  
     )
 
-    article = create_article_with_categories(db, article_data, category_ids_list, subcategory_ids_list)
+    # ตรวจ category ก่อนอัปโหลด input ผิดจะได้ 422 โดยไม่มีไฟล์ค้างใน MinIO (ตรวจซ้ำอีกรอบตอนสร้างใน transaction)
+    validate_article_categories(db, category_ids_list, subcategory_ids_list)
 
+    # อัปโหลดไฟล์ก่อนโดยไม่ถือ connection ของ DB ไว้ แล้วค่อยบันทึกบทความ+media ใน transaction เดียว
+    article_id = reserve_article_id(db)
     minio_service = get_minio_article_service()
-    media_refs = upload_and_attach_media(db, article, embedded_files or [], attached_files or [], minio_service)
+    media = upload_article_media(minio_service, article_id, embedded_files, attached_files)
 
-    if content:
-        article.content = replace_media_placeholders(content, media_refs)
+    try:
+        article = create_article_with_categories(
+            db, article_data, category_ids_list, subcategory_ids_list,
+            article_id=article_id, media=media
+        )
+    except Exception:
+        db.rollback()
+        discard_uploaded_media(minio_service, [m.object_name for m in media])
+        raise
 
-    db.commit()
-    db.refresh(article)
+    article = get_article_by_id(db, article.id, ARTICLE_DETAIL)
+    prime_article_media_urls([article])
     return article
 
-@router.get("/", response_model=List[ArticleOut])
-def list_all_articles(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return list_articles(db)
+@router.get("/search", response_model=ArticleSearchPage)
+def search_all_articles(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(ARTICLE_PAGE_SIZE_DEFAULT, ge=1, le=ARTICLE_PAGE_SIZE_MAX),
+    offset: int = Query(0, ge=0, le=ARTICLE_SEARCH_OFFSET_MAX),
+    status: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    hits, next_offset = search_articles(db, q, limit=limit, offset=offset, status=status)
+    return {
+        "items": [
+            {"article": article, "rank": rank, "snippet": highlight_snippet(article.content, q)}
+            for article, rank in hits
+        ],
+        "next_offset": next_offset,
+        "limit": limit,
+    }
+
+@router.get("/", response_model=ArticlePage)
+def list_all_articles(
+    limit: int = Query(ARTICLE_PAGE_SIZE_DEFAULT, ge=1, le=ARTICLE_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    sort: Literal["popular", "latest", "rating"] = Query("popular"),
+    status: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    subcategory_id: Optional[int] = Query(None),
+    tag: Optional[str] = Query(None),
+    hashtag: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    items, next_cursor = list_articles(
+        db,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        status=status,
+        category_id=category_id,
+        subcategory_id=subcategory_id,
+        tag=tag,
+        hashtag=hashtag,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
 
 @router.post("/comment/{slug:path}", response_model=dict)
 def comment_article(
@@ -130,6 +204,20 @@ def comment_article(
     )
     return {"detail": "Comment submitted successfully"}
 
+@router.delete("/comment/{slug:path}", response_model=dict)
+def delete_article_comment(
+    slug: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    article = get_article_by_slug(db, slug)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    if not delete_comment(db, article_id=article.id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return {"detail": "Comment deleted successfully"}
+
 @router.get("/comments/{slug:path}", response_model=List[ArticleCommentOut])
 def get_article_comments(slug: str, db: Session = Depends(get_db)):
     print("Received slug:", slug)
@@ -139,6 +227,19 @@ def get_article_comments(slug: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Article not found")
     return get_comments_by_article(db, article.id)
 
+@router.get("/views/{slug:path}", response_model=List[ArticleViewStatOut])
+def get_article_views(
+    slug: str,
+    granularity: Literal["hourly", "daily"] = Query("daily"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db)
+):
+    article = get_article_by_slug(db, slug)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return get_article_view_stats(db, article.id, granularity, since, until)
+
 @router.get("/{slug:path}", response_model=ArticleOut)
 def get_article(
     slug: str,
@@ -146,15 +247,22 @@ def get_article(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    article = get_article_by_slug(db, slug)
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
+    key = response_cache.key_for("article", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        article = get_article_by_slug(db, slug, ARTICLE_DETAIL)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        prime_article_media_urls([article])
+        cached = response_cache.store(
+            key, article, ArticleOut, tags=("articles", f"article:{article.id}"), meta={"article_id": article.id}
+        )
 
     ip_address = request.client.host
 
-    record_article_view(db, article.id, current_user.id, ip_address)
+    record_article_view(cached.meta["article_id"], current_user.id, ip_address)
 
-    return article
+    return cached.response(request)
 
 @router.put("/{slug:path}", response_model=ArticleOut)
 def update_article_route(
@@ -215,6 +323,7 @@ def update_article_route(
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
 
+    prime_article_media_urls([article])
     return article
 
 @router.delete("/{slug:path}")
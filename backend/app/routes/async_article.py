@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+from datetime import datetime
+
+from app.db.async_session import get_async_db
+from app.schemas.article import ArticleOut, ArticlePage, TagOut, HashtagOut, ArticleCommentOut, ArticleViewStatOut, ArticleSearchPage
+from app.crud import async_article as crud
+from app.crud.article import record_article_view, ARTICLE_PAGE_SIZE_DEFAULT, ARTICLE_PAGE_SIZE_MAX, ARTICLE_SEARCH_OFFSET_MAX
+from app.crud.article_loaders import ARTICLE_DETAIL
+from app.services.search import highlight_snippet
+from app.services.media_urls import prime_article_media_urls
+from app.core.response_cache import response_cache
+from app.routes.auth import get_current_user_async
+from app.models.user import User
+
+# GET endpoint ของ routes/article.py แบบ async def (เปิดเมื่อ DB_ASYNC=true)
+# ถูก include ก่อน router เดิม จึงรับ GET ไปทั้งหมด ส่วน POST/PUT/DELETE ยังตกไปที่ router sync เดิม
+router = APIRouter(prefix="/v1/api/articles", tags=["Articles"], dependencies=[Depends(get_current_user_async)])
+
+@router.get("/tags", response_model=List[TagOut])
+async def get_all_tags(request: Request, db: AsyncSession = Depends(get_async_db)):
+    key = response_cache.key_for("tags", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, await crud.get_all_tags(db), List[TagOut])
+    return cached.response(request)
+
+@router.get("/hashtags", response_model=List[HashtagOut])
+async def get_all_hashtags(request: Request, db: AsyncSession = Depends(get_async_db)):
+    key = response_cache.key_for("hashtags", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, await crud.get_all_hashtags(db), List[HashtagOut])
+    return cached.response(request)
+
+@router.get("/search", response_model=ArticleSearchPage)
+async def search_all_articles(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(ARTICLE_PAGE_SIZE_DEFAULT, ge=1, le=ARTICLE_PAGE_SIZE_MAX),
+    offset: int = Query(0, ge=0, le=ARTICLE_SEARCH_OFFSET_MAX),
+    status: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    hits, next_offset = await crud.search_articles(db, q, limit=limit, offset=offset, status=status)
+    return {
+        "items": [
+            {"article": article, "rank": rank, "snippet": highlight_snippet(article.content, q)}
+            for article, rank in hits
+        ],
+        "next_offset": next_offset,
+        "limit": limit,
+    }
+
+@router.get("/", response_model=ArticlePage)
+async def list_all_articles(
+    limit: int = Query(ARTICLE_PAGE_SIZE_DEFAULT, ge=1, le=ARTICLE_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    sort: Literal["popular", "latest", "rating"] = Query("popular"),
+    status: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    subcategory_id: Optional[int] = Query(None),
+    tag: Optional[str] = Query(None),
+    hashtag: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    items, next_cursor = await crud.list_articles(
+        db,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        status=status,
+        category_id=category_id,
+        subcategory_id=subcategory_id,
+        tag=tag,
+        hashtag=hashtag,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+@router.get("/comments/{slug:path}", response_model=List[ArticleCommentOut])
+async def get_article_comments(slug: str, db: AsyncSession = Depends(get_async_db)):
+    article = await crud.get_article_by_slug(db, slug)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return await crud.get_comments_by_article(db, article.id)
+
+@router.get("/views/{slug:path}", response_model=List[ArticleViewStatOut])
+async def get_article_views(
+    slug: str,
+    granularity: Literal["hourly", "daily"] = Query("daily"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    article = await crud.get_article_by_slug(db, slug)
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return await crud.get_article_view_stats(db, article.id, granularity, since, until)
+
+@router.get("/{slug:path}", response_model=ArticleOut)
+async def get_article(
+    slug: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    key = response_cache.key_for("article", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        article = await crud.get_article_by_slug(db, slug, ARTICLE_DETAIL)
+        if not article:
+            raise HTTPException(status_code=404, detail="Article not found")
+        prime_article_media_urls([article])
+        cached = response_cache.store(
+            key, article, ArticleOut, tags=("articles", f"article:{article.id}"), meta={"article_id": article.id}
+        )
+
+    # buffer ใน memory ไม่แตะ DB เรียกจาก event loop ได้
+    record_article_view(cached.meta["article_id"], current_user.id, request.client.host)
+
+    return cached.response(request)
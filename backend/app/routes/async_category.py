@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_session import get_async_db
+import app.crud.async_category as crud
+import app.schemas.category as schemas
+from app.routes.auth import get_current_user_async
+from app.core.response_cache import response_cache
+
+# GET endpoint ของ routes/category.py แบบ async def (เปิดเมื่อ DB_ASYNC=true)
+router = APIRouter(
+    prefix="/v1/api/categories",
+    tags=["Categories"],
+    dependencies=[Depends(get_current_user_async)]
+)
+
+@router.get("/", response_model=list[schemas.CategoryResponse])
+async def read_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
+    key = response_cache.key_for("categories", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, await crud.get_all_category(db), list[schemas.CategoryResponse])
+    return cached.response(request)
+
+@router.get("/subcategories/{subcategory_id}", response_model=schemas.SubCategoryResponse)
+async def get_subcategory_by_id(subcategory_id: int, db: AsyncSession = Depends(get_async_db)):
+    subcategory = await crud.get_subcategory_by_id(db, subcategory_id)
+    if not subcategory:
+        raise HTTPException(status_code=404, detail="SubCategory not found")
+    return subcategory
+
+@router.get("/{category_id}", response_model=schemas.CategoryResponse)
+async def read_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    category = await crud.get_category_by_id(db, category_id)
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    return category
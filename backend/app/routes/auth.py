@@ -1,8 +1,11 @@
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
+from app.db.async_session import get_async_db
 from app.schemas.user import (
     UserCreate, Token, UserSafeResponse, 
     RefreshTokenRequest, SessionResponse, 
@@ -10,6 +13,10 @@ from app.schemas.user import (
 from app.crud import user as crud_user
 from app.core.security import create_access_token, validate_password_strength
 from app.core.config import settings
+from app.core.client_ip import resolve_client_ip
+from app.core.session_cache import session_cache
+from app.core.session_revocation import session_revocations
+from app.core.permission_cache import role_permission_cache
 from app.models.user import User, UserSession
 from jose import jwt, JWTError
 from uuid import UUID
@@ -54,15 +61,11 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 def get_client_ip(request: Request) -> str:
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip
-    
-    return request.client.host
+    return resolve_client_ip(
+        request.client.host if request.client else None,
+        request.headers.get("X-Forwarded-For"),
+        request.headers.get("X-Real-IP"),
+    )
 
 def get_device_info(request: Request) -> dict:
     user_agent = request.headers.get("User-Agent", "Unknown")
@@ -181,29 +184,116 @@ def refresh_token(refresh_request: RefreshTokenRequest, request: Request, db: Se
         )
     )
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _snapshot_user(user: User) -> dict:
+    # ไม่เก็บ password hash ไว้ใน cache ถ้ามีใครอ่าน user.password จะถูกโหลดจาก DB ตอนนั้นเอง
+    columns = {c.key: getattr(user, c.key) for c in User.__table__.columns if c.key != "password"}
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "role_id": user.profile.role_id if user.profile else None,
+        "user": columns,
+    }
+
+def _detached_user(snapshot: dict) -> User:
+    # merge(load=False) เข้ากับ session ของ request นี้โดยไม่ SELECT (relationship ยัง lazy load ได้ตามปกติ)
+    user = User(**snapshot["user"])
+    make_transient_to_detached(user)
+    return user
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_access_token(token: str) -> tuple[str, UUID]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
+        return username, UUID(payload.get("session_id"))
+    except (JWTError, TypeError, ValueError):
+        raise _credentials_exception()
 
-        session_id = UUID(payload.get("session_id"))
-        session = db.query(UserSession).filter_by(id=session_id, is_active=True).first()
-        if not session:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+def _remember_current_user(request: Request, user: User, snapshot: dict) -> User:
+    request.state.current_user = user
+    request.state.current_role_id = snapshot["role_id"]
+    return user
 
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    # ประกาศ dependency ซ้ำทั้งระดับ router และ endpoint ก็ตรวจแค่ครั้งเดียวต่อ request
+    current = getattr(request.state, "current_user", None)
+    if current is not None:
+        return current
+
+    username, session_id = _decode_access_token(token)
+    credentials_exception = _credentials_exception()
+    # โหมด stateless: JWT ผ่าน signature + exp แล้ว เช็กแค่รายการที่ถูกเพิกถอนใน memory ไม่อ่าน user_sessions
+    stateless = session_revocations.enabled
+    if stateless and session_revocations.is_revoked(session_id):
         raise credentials_exception
-    return user
+
+    snapshot = session_cache.get(session_id)
+    if snapshot is not None and snapshot["username"] == username:
+        user = db.merge(_detached_user(snapshot), load=False)
+    else:
+        if not stateless:
+            session = db.query(UserSession).filter_by(id=session_id, is_active=True).first()
+            if not session:
+                raise credentials_exception
+
+        user = db.query(User).options(joinedload(User.profile)).filter(User.username == username).first()
+        if user is None:
+            raise credentials_exception
+        snapshot = _snapshot_user(user)
+        session_cache.set(session_id, snapshot)
+
+    return _remember_current_user(request, user, snapshot)
+
+async def get_current_user_async(
+    request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user สำหรับ router แบบ async (DB_ASYNC) ใช้ session cache ชุดเดียวกัน"""
+    current = getattr(request.state, "current_user", None)
+    if current is not None:
+        return current
+
+    username, session_id = _decode_access_token(token)
+    stateless = session_revocations.enabled
+    if stateless and session_revocations.is_revoked(session_id):
+        raise _credentials_exception()
+
+    snapshot = session_cache.get(session_id)
+    if snapshot is not None and snapshot["username"] == username:
+        user = await db.merge(_detached_user(snapshot), load=False)
+    else:
+        if not stateless:
+            active = await db.scalar(
+                select(UserSession.id).where(UserSession.id == session_id, UserSession.is_active.is_(True))
+            )
+            if active is None:
+                raise _credentials_exception()
+
+        user = await db.scalar(select(User).options(joinedload(User.profile)).where(User.username == username))
+        if user is None:
+            raise _credentials_exception()
+        snapshot = _snapshot_user(user)
+        session_cache.set(session_id, snapshot)
+
+    return _remember_current_user(request, user, snapshot)
+
+def require_permission(name: str):
+    """dependency ตรวจว่า role ของผู้เรียกมี permission ชื่อ name จาก map ใน memory (ไม่ query ต่อ request)"""
+    def check_permission(
+        request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
+    ) -> User:
+        role_id = getattr(request.state, "current_role_id", None)
+        if name not in role_permission_cache.permissions_for(db, role_id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Missing permission: {name}")
+        return current_user
+    return check_permission
 
 @router.post("/logout")
 def logout_user(
@@ -212,14 +302,8 @@ def logout_user(
     db: Session = Depends(get_db)
 ):
     session_id = UUID(jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])["session_id"])
-    session = db.query(UserSession).filter_by(id=session_id).first()
-
-    if session:
-        session.session_token_hash = None 
-        session.refresh_token_hash = None
-        session.is_active = False
-        session.modified_at = datetime.utcnow()
-        db.commit()
+    # session ที่ logout แล้วใช้ต่อไม่ได้ ลบทิ้งเลยแทนการเก็บแถวที่ไม่มี hash ไว้ในตาราง
+    crud_user.delete_session(db, session_id)
 
     return {"message": f"User '{current_user.username}' logged out successfully"}
 
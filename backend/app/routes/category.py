@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 import app.crud.category as crud
 import app.schemas.category as schemas
 from app.routes.auth import get_current_user
 from app.models.user import User
+from app.core.response_cache import response_cache
 
 router = APIRouter(
     prefix="/v1/api/categories",
@@ -15,10 +16,15 @@ router = APIRouter(
 # Categories
 @router.get("/", response_model=list[schemas.CategoryResponse])
 def read_categories(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return crud.get_all_category(db)
+    key = response_cache.key_for("categories", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, crud.get_all_category(db), list[schemas.CategoryResponse])
+    return cached.response(request)
 
 @router.get("/{category_id}", response_model=schemas.CategoryResponse)
 def read_category(
@@ -1,7 +1,15 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.session import db_manager
+from app.services.view_counter import view_counter
+from app.core.password_hashing import password_hasher
+from app.services.media_urls import signed_url_cache
+from app.services.avatar_pipeline import avatar_pipeline
+from app.core.permission_cache import role_permission_cache
+from app.core.session_revocation import session_revocations
+from app.core.response_cache import response_cache
 
 router = APIRouter(prefix="/v1/api/health", tags=["Health Check"])
 
@@ -13,7 +21,7 @@ def health_check():
 def database_health_check(db: Session = Depends(get_db)):
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        db.execute(text("SELECT 1"))
         db_health = db_manager.health_check()
         connection_info = db_manager.get_connection_info()
         
@@ -27,4 +35,32 @@ def database_health_check(db: Session = Depends(get_db)):
             "status": "unhealthy",
             "database": "disconnected",
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+@router.get("/views")
+def view_counter_stats():
+    return view_counter.stats()
+
+@router.get("/password-hashing")
+def password_hash_pool_stats():
+    return password_hasher.stats()
+
+@router.get("/response-cache")
+def response_cache_stats():
+    return response_cache.stats()
+
+@router.get("/permission-cache")
+def permission_cache_stats():
+    return role_permission_cache.stats()
+
+@router.get("/session-revocations")
+def session_revocation_stats():
+    return session_revocations.stats()
+
+@router.get("/avatar-pipeline")
+def avatar_pipeline_stats():
+    return avatar_pipeline.stats()
+
+@router.get("/media-urls")
+def media_url_cache_stats():
+    return signed_url_cache.stats()
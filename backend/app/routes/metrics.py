@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from app.core.metrics import render_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+# Prometheus text format, รวมค่าทุก worker เมื่อตั้ง PROMETHEUS_MULTIPROC_DIR
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 import app.crud.permission as crud
 import app.schemas.permission as schemas
 from app.routes.auth import get_current_user
 from app.models.user import User
+from app.core.response_cache import response_cache
 
 router = APIRouter(prefix="/v1/api/permissions", tags=["Permission"])
 
 @router.get("/", response_model=list[schemas.PermissionResponse])
-def get_all_permissions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return crud.get_all_permissions(db)
+def get_all_permissions(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    key = response_cache.key_for("permissions", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, crud.get_all_permissions(db), list[schemas.PermissionResponse])
+    return cached.response(request)
 
 @router.post("/", response_model=schemas.PermissionResponse)
 def create_permission(permission: schemas.PermissionCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import Optional, List
 from app.db.database import get_db
-from app.schemas.user import UserProfileResponse, UserProfileUpdate
+from app.schemas.user import UserProfileResponse, UserProfileUpdate, FavoriteArticleStatus
 from app.schemas.article import ArticleOut
 from app.crud import user as crud_user
 from app.models.user import User
 from app.models.article import Article  
 from app.routes.auth import get_current_user
-from app.services.minio_service import MinIOAvatarService, get_minio_avatar_service, validate_avatar_image, resize_avatar
-from app.crud.user import remove_user_avatar, update_user_avatar
+from app.services.minio_service import MinIOAvatarService, get_minio_avatar_service
+from app.services.avatar_pipeline import avatar_pipeline, read_avatar_upload
+from app.crud.user import remove_user_avatar
+from app.crud.article_loaders import ARTICLE_DETAIL
+from app.services.media_urls import prime_article_media_urls
 import urllib.parse
 from fastapi.responses import JSONResponse
 
@@ -38,8 +41,7 @@ def update_my_profile(
     address: Optional[str] = Form(None),
     file: UploadFile = File(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    minio_service: MinIOAvatarService = Depends(get_minio_avatar_service)
+    db: Session = Depends(get_db)
 ):
     # โหลดโปรไฟล์ปัจจุบัน
     profile = crud_user.get_user_by_id(db, current_user.id).profile
@@ -69,38 +71,9 @@ def update_my_profile(
         db.commit()
         db.refresh(profile)
 
-    # ถ้ามีไฟล์รูป
+    # ถ้ามีไฟล์รูป ย่อ/อัปโหลดเบื้องหลัง avatar_url เปลี่ยนเมื่อเสร็จ
     if file:
-        if not file.content_type or not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Only image files are allowed for avatar")
-
-        file.file.seek(0)
-        file_content = file.file.read()
-        is_valid, error_msg, dimensions = validate_avatar_image(file_content, max_size_mb=5)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        if dimensions and (dimensions[0] > 400 or dimensions[1] > 400):
-            file_content = resize_avatar(file_content, max_width=400, max_height=400)
-
-        try:
-            old_file_key = remove_user_avatar(db, current_user.id, modified_by=current_user.id)
-            if old_file_key:
-                minio_service.delete_avatar(old_file_key)
-
-            file_key, file_url = minio_service.upload_avatar_from_bytes(
-                user_id=current_user.id,
-                file_content=file_content,
-                filename=file.filename,
-                content_type=file.content_type
-            )
-
-            update_user_avatar(db, current_user.id, file_url, file.filename, modified_by=current_user.id)
-            db.commit()
-            profile = crud_user.get_user_by_id(db, current_user.id).profile
-
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to upload avatar: {str(e)}")
+        avatar_pipeline.submit(current_user.id, read_avatar_upload(file), file.filename, modified_by=current_user.id)
 
     return UserProfileResponse.from_orm(profile)
 
@@ -135,8 +108,7 @@ def update_user_profile_by_id(
     address: Optional[str] = Form(None),
     file: UploadFile = File(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    minio_service: MinIOAvatarService = Depends(get_minio_avatar_service)
+    db: Session = Depends(get_db)
 ):
     # ❗ ตัวอย่างการตรวจสอบสิทธิ์ (เปิดใช้ถ้าต้องการจำกัดเฉพาะ admin)
     # if current_user.role != "admin":
@@ -168,48 +140,18 @@ def update_user_profile_by_id(
         db.commit()
         db.refresh(profile)
 
-    # ✅ อัปโหลด avatar ถ้ามี
+    # ✅ อัปโหลด avatar ถ้ามี (ทำเบื้องหลัง)
     if file:
-        if not file.content_type or not file.content_type.startswith("image/"):
-            raise HTTPException(status_code=400, detail="Only image files are allowed for avatar")
-
-        file.file.seek(0)
-        file_content = file.file.read()
-        is_valid, error_msg, dimensions = validate_avatar_image(file_content, max_size_mb=5)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        if dimensions and (dimensions[0] > 400 or dimensions[1] > 400):
-            file_content = resize_avatar(file_content, max_width=400, max_height=400)
-
-        try:
-            old_file_key = remove_user_avatar(db, user_id=user_id, modified_by=current_user.id)
-            if old_file_key:
-                minio_service.delete_avatar(old_file_key)
-
-            file_key, file_url = minio_service.upload_avatar_from_bytes(
-                user_id=user_id,
-                file_content=file_content,
-                filename=file.filename,
-                content_type=file.content_type
-            )
-
-            update_user_avatar(db, user_id, file_url, file.filename, modified_by=current_user.id)
-            db.commit()
-            profile = crud_user.get_user_by_id(db, user_id).profile
-
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to upload avatar: {str(e)}")
+        avatar_pipeline.submit(user_id, read_avatar_upload(file), file.filename, modified_by=current_user.id)
 
     return UserProfileResponse.from_orm(profile)
 
-@router.post("/avatar/{user_id}", response_model=UserProfileResponse)
+@router.post("/avatar/{user_id}", response_model=UserProfileResponse, status_code=status.HTTP_202_ACCEPTED)
 def upload_user_avatar(
     user_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    minio_service: MinIOAvatarService = Depends(get_minio_avatar_service)
+    current_user: User = Depends(get_current_user)
 ):
     # ตรวจสอบสิทธิ์ (admin หรือเจ้าของ)
     if current_user.id != user_id and current_user.profile.role_name != "admin":
@@ -218,39 +160,10 @@ def upload_user_avatar(
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    
-    if not file.content_type or not file.content_type.startswith('image/'):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only image files are allowed for avatar")
-    
-    file.file.seek(0)
-    file_content = file.file.read()
-    
-    is_valid, error_msg, dimensions = validate_avatar_image(file_content, max_size_mb=5)
-    if not is_valid:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
-    
-    if dimensions and (dimensions[0] > 400 or dimensions[1] > 400):
-        file_content = resize_avatar(file_content, max_width=400, max_height=400)
-    
-    try:
-        old_file_key = remove_user_avatar(db, user_id, modified_by=current_user.id)
-        if old_file_key:
-            minio_service.delete_avatar(old_file_key)
-        
-        file_key, file_url = minio_service.upload_avatar_from_bytes(
-            user_id=user_id,
-            file_content=file_content,
-            filename=file.filename,
-            content_type=file.content_type
-        )
-        
-        update_user_avatar(db, user_id, file_url, file.filename, modified_by=current_user.id)
-        
-        updated_user = crud_user.get_user_by_id(db, user_id)
-        return UserProfileResponse.from_orm(updated_user.profile)
-        
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to upload avatar: {str(e)}")
+
+    # 202: profile ที่ตอบกลับยังเป็น avatar เดิม รูปใหม่ (ทุกขนาดใน avatar_variants) จะขึ้นเมื่อประมวลผลเสร็จ
+    avatar_pipeline.submit(user_id, read_avatar_upload(file), file.filename, modified_by=current_user.id)
+    return UserProfileResponse.from_orm(user.profile)
         
 @router.get("/avatar/{user_id}")
 def get_user_avatar(user_id: int, db: Session = Depends(get_db)):
@@ -260,7 +173,7 @@ def get_user_avatar(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
 
     full_url = user.profile.avatar_url
-    return JSONResponse(content={"avatar_url": full_url})
+    return JSONResponse(content={"avatar_url": full_url, "avatar_variants": user.profile.avatar_variants})
     
 @router.delete("/avatar/{user_id}")
 def delete_user_avatar(
@@ -272,64 +185,49 @@ def delete_user_avatar(
     if current_user.id != user_id and current_user.profile.role_name != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete avatar for this user")
     
-    old_file_key = remove_user_avatar(db, user_id, modified_by=current_user.id)
-    if not old_file_key:
+    old_objects = remove_user_avatar(db, user_id, modified_by=current_user.id)
+    if not old_objects:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No avatar found to delete")
     
-    minio_service.delete_avatar(old_file_key)
+    minio_service.delete_objects(old_objects)
     
     return {"message": "Avatar deleted successfully"}
 
 @router.get("/me/favorite", response_model=List[ArticleOut])
 def get_favorite_articles(
+    response: Response,
+    limit: int = Query(crud_user.FAVORITE_PAGE_SIZE_DEFAULT, ge=1, le=crud_user.FAVORITE_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    profile = current_user.profile
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    if not profile.fav_article:
-        return []
-
-    articles = (
-        db.query(Article)
-        .filter(Article.id.in_(profile.fav_article))
-        .all()
+    articles, next_cursor = crud_user.get_favorite_articles(
+        db, current_user.id, limit=limit, cursor=cursor, options=ARTICLE_DETAIL
     )
-
+    # body ยังเป็น list เหมือนเดิม cursor ของหน้าถัดไปส่งทาง header (เหมือน GET /v1/api/users/)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    prime_article_media_urls(articles)
     return articles
 
-@router.post("/me/favorite/{article_id}", response_model=UserProfileResponse)
+@router.post("/me/favorite/{article_id}", response_model=FavoriteArticleStatus)
 def add_favorite_article_route(
     article_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    profile = current_user.profile
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    try:
-        profile = crud_user.add_favorite_article(db, profile, article_id)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    favorite_count = crud_user.add_favorite_article(db, current_user.id, article_id)
+    if favorite_count is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return FavoriteArticleStatus(article_id=article_id, favorited=True, favorite_count=favorite_count)
 
-    return profile
-
-@router.delete("/me/favorite/{article_id}", response_model=UserProfileResponse)
+@router.delete("/me/favorite/{article_id}", response_model=FavoriteArticleStatus)
 def remove_favorite_article_route(
     article_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    profile = current_user.profile
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    try:
-        profile = crud_user.remove_favorite_article(db, profile, article_id)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-    return profile
\ No newline at end of file
+    favorite_count = crud_user.remove_favorite_article(db, current_user.id, article_id)
+    if favorite_count is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return FavoriteArticleStatus(article_id=article_id, favorited=False, favorite_count=favorite_count)
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 import app.crud.role as crud
 import app.schemas.role as schemas
 from app.routes.auth import get_current_user
 from app.models.user import User
+from app.core.response_cache import response_cache
 
 router = APIRouter(prefix="/v1/api/roles", tags=["Role"])
 
 @router.get("/", response_model=list[schemas.RoleResponse])
-def get_all_roles(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return crud.get_all_roles(db)
+def get_all_roles(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    key = response_cache.key_for("roles", request)
+    cached = response_cache.lookup(key)
+    if cached is None:
+        cached = response_cache.store(key, crud.get_all_roles(db), list[schemas.RoleResponse])
+    return cached.response(request)
 
 @router.get("/{role_id}", response_model=schemas.RoleResponse)
 def get_role(role_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from uuid import UUID
+from datetime import datetime, timezone
+from app.db.database import get_db
+from app.core.config import settings
+from app.schemas.upload_session import UploadSessionCreate, UploadSessionResponse, UploadSessionComplete
+from app.crud import upload_session as crud
+from app.models.article import Article
+from app.models.user import User
+from app.routes.auth import get_current_user
+from app.services.minio_service import (
+    MinIOServiceBase, get_minio_article_service, get_minio_avatar_service, validate_avatar_image
+)
+from app.services.minio_untils import generate_upload_url, generate_upload_post_policy
+from app.services.avatar_pipeline import avatar_pipeline
+
+# client อัปโหลดไฟล์ตรงเข้า MinIO ด้วย presigned URL แล้วเรียก complete ให้ API ตรวจและบันทึก
+# ข้อมูลไฟล์จึงไม่ผ่าน worker ของ API เลย
+router = APIRouter(prefix="/v1/api/uploads", tags=["Uploads"])
+
+# อ่านแค่ส่วนหัวของรูปพอให้ PIL รู้ format/ขนาด
+AVATAR_HEADER_BYTES = 64 * 1024
+
+def _storage_for(purpose: str) -> MinIOServiceBase:
+    return get_minio_avatar_service() if purpose == "avatar" else get_minio_article_service()
+
+def _max_size_for(purpose: str) -> int:
+    max_mb = settings.AVATAR_MAX_SIZE_MB if purpose == "avatar" else settings.UPLOAD_MAX_SIZE_MB
+    return max_mb * 1024 * 1024
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    data: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    owner_id = current_user.id
+    if data.purpose == "avatar":
+        if not data.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="Only image files are allowed for avatar")
+        if data.user_id is not None and data.user_id != current_user.id:
+            if current_user.profile.role_name != "admin":
+                raise HTTPException(status_code=403, detail="Not authorized to upload avatar for this user")
+            owner_id = data.user_id
+    else:
+        if data.article_id is None or data.media_type is None:
+            raise HTTPException(status_code=422, detail="article_id and media_type are required for article_media")
+        if not db.query(Article.id).filter(Article.id == data.article_id).first():
+            raise HTTPException(status_code=404, detail="Article not found")
+
+    max_size = _max_size_for(data.purpose)
+    if data.size > max_size:
+        raise HTTPException(status_code=400, detail=f"File size exceeds {max_size // (1024 * 1024)}MB")
+
+    storage = _storage_for(data.purpose)
+    upload = crud.create_upload_session(db, data, current_user.id, owner_id, storage.bucket)
+
+    expiry = settings.UPLOAD_SESSION_EXPIRY_SECONDS
+    post_url, post_fields = generate_upload_post_policy(
+        storage.bucket, upload.object_name, upload.content_type, max_size, expiry
+    )
+    response = UploadSessionResponse.model_validate(upload)
+    response.put_url = generate_upload_url(storage.bucket, upload.object_name, expiry)
+    response.post_url = post_url
+    response.post_fields = post_fields
+    return response
+
+@router.post("/sessions/{session_id}/complete", response_model=UploadSessionComplete)
+def complete_upload_session(
+    session_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    upload = crud.get_upload_session_for_update(db, session_id)
+    if not upload or (upload.user_id != current_user.id and current_user.profile.role_name != "admin"):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if upload.status != "pending":
+        raise HTTPException(status_code=409, detail=f"Upload session already {upload.status}")
+    if upload.expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=410, detail="Upload session expired")
+
+    storage = _storage_for(upload.purpose)
+    stat = storage.stat_object(upload.object_name)
+    if stat is None:
+        raise HTTPException(status_code=400, detail="File has not been uploaded yet")
+
+    # ETag ของ object ที่ PUT/POST ครั้งเดียวคือ md5 ของเนื้อไฟล์ (multipart มี '-' ตรวจไม่ได้)
+    etag = (stat.etag or "").strip('"')
+    error = None
+    if stat.size != upload.size or stat.size > _max_size_for(upload.purpose):
+        error = "Uploaded file size does not match"
+    elif (stat.content_type or "").split(";")[0] != upload.content_type:
+        error = "Uploaded file type does not match"
+    elif upload.md5 and "-" not in etag and etag != upload.md5:
+        error = "Uploaded file checksum does not match"
+    elif upload.purpose == "avatar":
+        is_valid, error_msg, _ = validate_avatar_image(storage.read_object(upload.object_name, AVATAR_HEADER_BYTES))
+        if not is_valid:
+            error = error_msg
+
+    if error:
+        storage.delete_object(upload.object_name)
+        crud.reject_upload_session(db, upload)
+        raise HTTPException(status_code=400, detail=error)
+
+    if upload.purpose == "article_media":
+        url = storage.get_public_url(upload.object_name)
+        media = crud.complete_article_media_session(db, upload, url)
+        return UploadSessionComplete(id=upload.id, status=upload.status, article_media_id=media.id, url=url)
+
+    # ต้นฉบับอยู่ใน bucket แล้ว ย่อ/สลับ avatar เบื้องหลังเหมือน upload แบบเดิม
+    # submit ก่อนปิด session ถ้าคิวเต็ม (503) client เรียก complete ซ้ำได้
+    avatar_pipeline.submit_object(upload.user_id, upload.object_name, upload.filename, modified_by=current_user.id)
+    crud.complete_avatar_session(db, upload)
+    return UploadSessionComplete(id=upload.id, status=upload.status)
@@ -1,5 +1,5 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from typing import List, Optional, Literal
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Response
 from fastapi.responses import RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 from app.db.database import get_db
@@ -8,26 +8,45 @@ from app.models.user import User, UserSession
 from app.routes.auth import get_current_user
 from app.crud import user as crud_user
 from app.core.security import verify_password, get_password_hash, validate_password_strength
-from app.services.minio_service import MinIOAvatarService, get_minio_avatar_service, validate_avatar_image, resize_avatar
-from app.crud.user import remove_user_avatar, update_user_avatar
+from app.services.minio_service import MinIOAvatarService, get_minio_avatar_service
+from app.services.avatar_pipeline import avatar_pipeline, read_avatar_upload
+from app.crud.user import remove_user_avatar
 import urllib.parse
 from fastapi.responses import JSONResponse
 router = APIRouter(prefix="/v1/api/users", tags=["User Management"])
 
 @router.get("/", response_model=List[UserResponse])
 def list_users(
+    response: Response,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    limit: int = Query(100, ge=1, le=crud_user.USER_PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    sort: Literal["created_at", "username", "email"] = Query("created_at"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    role_id: Optional[int] = Query(None),
+    country: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
     is_verified: Optional[bool] = Query(None),
+    is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    users = crud_user.get_users_list(
-        db=db, 
-        skip=skip, 
-        limit=limit, 
-        is_verified=is_verified
+    users, next_cursor = crud_user.get_users_list(
+        db=db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        order=order,
+        role_id=role_id,
+        country=country,
+        city=city,
+        is_verified=is_verified,
+        is_active=is_active,
     )
+    # body ยังเป็น list เหมือนเดิม cursor ของหน้าถัดไปส่งทาง header
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -180,13 +199,12 @@ def create_user_by_authenticated_user(
         session_id=None
     )
 
-@router.post("/avatar/{user_id}", response_model=UserResponse)
+@router.post("/avatar/{user_id}", response_model=UserResponse, status_code=status.HTTP_202_ACCEPTED)
 def upload_user_avatar(
     user_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    minio_service: MinIOAvatarService = Depends(get_minio_avatar_service)
+    current_user: User = Depends(get_current_user)
 ):
     if current_user.id != user_id and current_user.profile.role_name != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to upload avatar for this user")
@@ -194,38 +212,10 @@ def upload_user_avatar(
     user = crud_user.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only image files are allowed for avatar")
-
-    file.file.seek(0)
-    file_content = file.file.read()
-
-    is_valid, error_msg, dimensions = validate_avatar_image(file_content, max_size_mb=5)
-    if not is_valid:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
 
-    if dimensions and (dimensions[0] > 400 or dimensions[1] > 400):
-        file_content = resize_avatar(file_content, max_width=400, max_height=400)
-
-    try:
-        old_file_key = remove_user_avatar(db, user_id, modified_by=current_user.id)
-        if old_file_key:
-            minio_service.delete_avatar(old_file_key)
-
-        file_key, file_url = minio_service.upload_avatar_from_bytes(
-            user_id=user_id,
-            file_content=file_content,
-            filename=file.filename,
-            content_type=file.content_type
-        )
-
-        update_user_avatar(db, user_id, file_url, file.filename, modified_by=current_user.id)
-        updated_user = crud_user.get_user_by_id(db, user_id)
-        return updated_user
-
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to upload avatar: {str(e)}")
+    # ย่อ/อัปโหลดเบื้องหลัง (ดู app/services/avatar_pipeline.py) avatar ใน response ยังเป็นของเดิม
+    avatar_pipeline.submit(user_id, read_avatar_upload(file), file.filename, modified_by=current_user.id)
+    return user
 
 @router.get("/avatar/{user_id}")
 def get_user_avatar(
@@ -236,7 +226,7 @@ def get_user_avatar(
     user = crud_user.get_user_by_id(db, user_id)
     if not user or not user.profile or not user.profile.avatar_url:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar not found")
-    return {"avatar_url": user.profile.avatar_url}
+    return {"avatar_url": user.profile.avatar_url, "avatar_variants": user.profile.avatar_variants}
 
 @router.delete("/avatar/{user_id}")
 def delete_user_avatar(
@@ -248,9 +238,9 @@ def delete_user_avatar(
     if current_user.id != user_id and current_user.profile.role_name != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete avatar for this user")
     
-    old_file_key = remove_user_avatar(db, user_id, modified_by=current_user.id)
-    if not old_file_key:
+    old_objects = remove_user_avatar(db, user_id, modified_by=current_user.id)
+    if not old_objects:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No avatar found to delete")
     
-    minio_service.delete_avatar(old_file_key)
+    minio_service.delete_objects(old_objects)
     return {"message": "Avatar deleted successfully"}
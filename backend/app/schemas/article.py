@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, Field, AliasChoices
 from typing import Optional, List, Union
 from datetime import datetime
 from fastapi import Form, File, UploadFile
@@ -27,7 +27,8 @@ class MediaFileOut(BaseModel):
     id: int
     filename: str
     file_type: str
-    url: str
+    # ArticleMedia.download_url (presigned/CDN ที่ cache ไว้) ถ้ามี ไม่งั้น url ที่บันทึกไว้
+    url: str = Field(validation_alias=AliasChoices("download_url", "url"))
     uploaded_at: datetime
     class Config:
         orm_mode = True
@@ -86,11 +87,60 @@ class ArticleOut(ArticleCreate):
     subcategories: List[SubCategoryResponse] = [] 
     media_links: List[ArticleMediaOut] = []
     average_score: Optional[float] = None
+    comment_count: int = 0
+    favorite_count: int = 0
     comments: List[ArticleCommentOut] = []
     
     class Config:
         orm_mode = True
 
+class ArticleViewStatOut(BaseModel):
+    bucket_start: datetime
+    views: int
+    unique_ips: int
+
+    class Config:
+        orm_mode = True
+
+class ArticleCardOut(BaseModel):
+    id: int
+    title: str
+    slug: str
+    status: str
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    view_count: int
+    tags: List[TagOut] = []
+    hashtags: List[HashtagOut] = []
+    categories: List[CategoryBase] = []
+    subcategories: List[SubCategoryResponse] = []
+    average_score: Optional[float] = None
+    comment_count: int = 0
+    favorite_count: int = 0
+
+    class Config:
+        orm_mode = True
+
+class ArticlePage(BaseModel):
+    items: List[ArticleCardOut] = []
+    next_cursor: Optional[str] = None
+    limit: int
+
+    class Config:
+        orm_mode = True
+
+class ArticleSearchHit(BaseModel):
+    article: ArticleCardOut
+    rank: float
+    snippet: Optional[str] = None
+
+class ArticleSearchPage(BaseModel):
+    items: List[ArticleSearchHit] = []
+    next_offset: Optional[int] = None
+    limit: int
+
 class ArticleFormIn(BaseModel):
     title: str = Form(...)
     slug: str = Form(...)
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Literal
+from datetime import datetime
+from uuid import UUID
+
+class UploadSessionCreate(BaseModel):
+    purpose: Literal["article_media", "avatar"]
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    md5: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{32}$")  # ตรวจกับ ETag ของ object ตอน finalize
+    article_id: Optional[int] = None
+    media_type: Optional[Literal["embedded", "attached"]] = None
+    user_id: Optional[int] = None  # avatar ของ user อื่น (admin) ไม่ส่ง = ของตัวเอง
+
+class UploadSessionResponse(BaseModel):
+    id: UUID
+    purpose: str
+    object_name: str
+    status: str
+    expires_at: datetime
+    put_url: Optional[str] = None
+    post_url: Optional[str] = None
+    post_fields: Optional[dict] = None
+
+    class Config:
+        from_attributes = True
+
+class UploadSessionComplete(BaseModel):
+    id: UUID
+    status: str
+    article_media_id: Optional[int] = None
+    url: Optional[str] = None
@@ -41,9 +41,9 @@ class UserProfileUpdate(BaseModel):
 
 class UserProfileResponse(UserProfileBase):
     role_name: Optional[str] = None
-    fav_article: Optional[List[int]] = None
     avatar_url: Optional[str] = None
     avatar_filename: Optional[str] = None
+    avatar_variants: Optional[dict] = None
     full_name: str
     display_name: str
     created_at: datetime
@@ -52,6 +52,11 @@ class UserProfileResponse(UserProfileBase):
     class Config:
         from_attributes = True
 
+class FavoriteArticleStatus(BaseModel):
+    article_id: int
+    favorited: bool
+    favorite_count: int
+
 class UserResponse(UserBase):
     id: int
     is_verified: bool
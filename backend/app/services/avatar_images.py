@@ -0,0 +1,41 @@
+import io
+from typing import List, Tuple
+
+from PIL import Image, ImageOps
+
+# ขนาด (px ด้านยาวสุด) และ format ที่สร้างให้ทุก avatar, avatar_url เดิมชี้ไปที่ AVATAR_DEFAULT_RENDITION
+AVATAR_SIZES = (400, 128, 48)
+AVATAR_FORMATS = (("webp", "image/webp"), ("jpeg", "image/jpeg"))
+AVATAR_DEFAULT_RENDITION = (400, "jpeg")
+
+# โมดูลนี้ถูก import ใน process ลูกของ avatar_pipeline จึงพึ่งแค่ PIL
+def render_avatar_renditions(file_content: bytes) -> List[Tuple[int, str, bytes]]:
+    """decode รูปครั้งเดียวแล้วย่อเป็นทุกขนาดใน AVATAR_SIZES x AVATAR_FORMATS คืน [(size, format, bytes)]
+
+    หมุนตาม EXIF orientation ก่อน แล้ว encode ใหม่โดยไม่ส่ง exif/icc/comment ต่อ (ตัด metadata ทิ้งทั้งหมด)
+    """
+    image = Image.open(io.BytesIO(file_content))
+    # JPEG ให้ libjpeg decode ที่ scale เล็กลงได้เลย (ไม่ต่ำกว่าขนาดใหญ่สุดที่ต้องใช้)
+    image.draft("RGB", (AVATAR_SIZES[0], AVATAR_SIZES[0]))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+
+    renditions = []
+    current = image
+    for size in AVATAR_SIZES:
+        # ย่อต่อจากขนาดก่อนหน้า (เรียงจากใหญ่ไปเล็ก) ถูกกว่าย่อจากต้นฉบับทุกครั้ง
+        current = current.copy()
+        current.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt, _ in AVATAR_FORMATS:
+            output = io.BytesIO()
+            if fmt == "jpeg":
+                flat = current
+                if has_alpha:
+                    flat = Image.new("RGB", current.size, (255, 255, 255))
+                    flat.paste(current, mask=current.getchannel("A"))
+                flat.save(output, format="JPEG", quality=85, optimize=True, progressive=True)
+            else:
+                current.save(output, format="WEBP", quality=80, method=4)
+            renditions.append((size, fmt, output.getvalue()))
+    return renditions
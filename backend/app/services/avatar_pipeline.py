@@ -0,0 +1,188 @@
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.services.avatar_images import AVATAR_DEFAULT_RENDITION, AVATAR_FORMATS, render_avatar_renditions
+from app.services.minio_service import MinIOAvatarService, get_minio_avatar_service, validate_avatar_image
+
+logger = logging.getLogger(__name__)
+
+def read_avatar_upload(file: UploadFile) -> bytes:
+    """อ่านไฟล์และตรวจแค่ header ของรูป (ไม่ decode ทั้งรูป) ไม่ผ่านตอบ 400 ทันที"""
+    if not file.content_type or not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only image files are allowed for avatar")
+
+    file.file.seek(0)
+    file_content = file.file.read()
+    is_valid, error_msg, _ = validate_avatar_image(file_content, max_size_mb=settings.AVATAR_MAX_SIZE_MB)
+    if not is_valid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
+    return file_content
+
+class AvatarPipeline:
+    """ประมวลผล avatar นอก request: ย่อรูปใน process pool, อัปโหลดทุกขนาดพร้อมกัน แล้วสลับ avatar ของ profile
+
+    request แค่ตรวจ header แล้ว submit (ตอบกลับทันที) ส่วน avatar_url/avatar_variants เปลี่ยนเมื่องานเสร็จ
+    - รับงานค้างได้ไม่เกิน queue_size ถ้าเต็มตอบ 503
+    - workers = 0 คือย่อรูปใน thread ของงานเลย (ไม่มี process pool)
+    """
+
+    def __init__(self, workers: int, queue_size: int, upload_concurrency: int):
+        self.workers = workers
+        self.capacity = queue_size
+        self.in_flight = 0
+        self._slots_lock = threading.Lock()
+        self._jobs = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="avatar-job")
+        self._uploads = ThreadPoolExecutor(max_workers=upload_concurrency, thread_name_prefix="avatar-upload")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.completed_total = 0
+        self.failed_total = 0
+        self.rejected_total = 0
+
+    def _acquire(self) -> bool:
+        with self._slots_lock:
+            if self.in_flight >= self.capacity:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self):
+        with self._slots_lock:
+            self.in_flight -= 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn แทน fork เพราะ process หลักมี thread อื่นวิ่งอยู่ (เหมือน password_hashing)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Avatar pipeline started with {self.workers} workers")
+            return self._executor
+
+    def submit(self, user_id: int, file_content: bytes, filename: str, modified_by: Optional[int] = None):
+        self._enqueue(self._process, user_id, file_content, filename, modified_by)
+
+    def submit_object(self, user_id: int, object_name: str, filename: str, modified_by: Optional[int] = None):
+        """เหมือน submit แต่ต้นฉบับอยู่ใน bucket แล้ว (อัปโหลดตรงผ่าน presigned URL) อ่านใน thread ของงาน"""
+        self._enqueue(self._process_object, user_id, object_name, filename, modified_by)
+
+    def _enqueue(self, fn, user_id: int, source, filename: str, modified_by: Optional[int]):
+        if not self._acquire():
+            self.rejected_total += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many avatar uploads in progress, please retry",
+                headers={"Retry-After": "5"},
+            )
+        # ใช้เวลาที่รับ upload ตัดสินว่างานไหนใหม่กว่า เมื่อ upload ของ user เดียวกันเสร็จไม่เรียงลำดับ
+        requested_at = datetime.now(timezone.utc).isoformat()
+        try:
+            future = self._jobs.submit(fn, user_id, source, filename, modified_by, requested_at)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+    def _render(self, file_content: bytes) -> List[Tuple[int, str, bytes]]:
+        if self.workers <= 0:
+            return render_avatar_renditions(file_content)
+        return self._get_executor().submit(render_avatar_renditions, file_content).result()
+
+    def _upload(self, minio_service: MinIOAvatarService, user_id: int,
+                renditions: List[Tuple[int, str, bytes]]) -> Tuple[dict, str, List[str]]:
+        batch_id = uuid.uuid4().hex
+        content_types = dict(AVATAR_FORMATS)
+        futures = {
+            (size, fmt): self._uploads.submit(
+                minio_service.upload_avatar_rendition, user_id, batch_id, size, fmt, content, content_types[fmt]
+            )
+            for size, fmt, content in renditions
+        }
+        wait(futures.values(), return_when=FIRST_EXCEPTION)
+        if any(f.done() and f.exception() is not None for f in futures.values()):
+            for f in futures.values():
+                f.cancel()
+            wait(futures.values())
+            uploaded = [f.result()[0] for f in futures.values() if not f.cancelled() and f.exception() is None]
+            minio_service.delete_objects(uploaded)
+            raise next(f.exception() for f in futures.values() if not f.cancelled() and f.exception() is not None)
+
+        urls: dict = {}
+        for (size, fmt), future in futures.items():
+            urls.setdefault(str(size), {})[fmt] = future.result()[1]
+        default_size, default_fmt = AVATAR_DEFAULT_RENDITION
+        objects = [future.result()[0] for future in futures.values()]
+        return urls, urls[str(default_size)][default_fmt], objects
+
+    def _process(self, user_id: int, file_content: bytes, filename: str,
+                 modified_by: Optional[int], requested_at: str):
+        from app.crud.user import swap_user_avatar
+
+        try:
+            renditions = self._render(file_content)
+            minio_service = get_minio_avatar_service()
+            urls, avatar_url, objects = self._upload(minio_service, user_id, renditions)
+
+            variants = {"requested_at": requested_at, "renditions": urls, "objects": objects}
+            with SessionLocal() as db:
+                replaced, old_objects = swap_user_avatar(db, user_id, avatar_url, filename, variants, modified_by)
+
+            # ลบของเก่าหลัง commit แล้วเท่านั้น ถ้างานนี้แพ้งานที่ใหม่กว่าก็ลบของตัวเองทิ้งแทน
+            stale = old_objects if replaced else objects
+            if stale:
+                failed = minio_service.delete_objects(stale)
+                if failed:
+                    logger.error(f"Orphaned avatar objects left in bucket: {failed}")
+            self.completed_total += 1
+        except Exception as e:
+            self.failed_total += 1
+            logger.error(f"Avatar processing failed for user {user_id}: {e}")
+
+    def _process_object(self, user_id: int, object_name: str, filename: str,
+                        modified_by: Optional[int], requested_at: str):
+        minio_service = get_minio_avatar_service()
+        try:
+            file_content = minio_service.read_object(object_name)
+        except Exception as e:
+            self.failed_total += 1
+            logger.error(f"Avatar processing failed for user {user_id}: {e}")
+            return
+        self._process(user_id, file_content, filename, modified_by, requested_at)
+        # ต้นฉบับไม่ถูกเก็บ (ใช้เฉพาะ rendition ที่ตัด metadata แล้ว)
+        minio_service.delete_object(object_name)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "completed_total": self.completed_total,
+            "failed_total": self.failed_total,
+            "rejected_total": self.rejected_total,
+        }
+
+    def shutdown(self):
+        # รองานที่รับไว้แล้วให้จบก่อน (ผู้ใช้ได้ 202 ไปแล้ว) จึงปิด process pool
+        self._jobs.shutdown(wait=True)
+        self._uploads.shutdown(wait=True)
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+avatar_pipeline = AvatarPipeline(
+    workers=settings.AVATAR_PROCESS_WORKERS,
+    queue_size=settings.AVATAR_QUEUE_SIZE,
+    upload_concurrency=settings.MEDIA_UPLOAD_CONCURRENCY,
+)
@@ -0,0 +1,73 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import List, NamedTuple
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.services.minio_service import MinIOArticleService
+
+logger = logging.getLogger(__name__)
+
+# pool ร่วมของทั้ง process จำกัดจำนวน put_object ที่วิ่งพร้อมกันไปยัง MinIO
+_upload_executor = ThreadPoolExecutor(
+    max_workers=settings.MEDIA_UPLOAD_CONCURRENCY,
+    thread_name_prefix="media-upload",
+)
+
+class UploadedMedia(NamedTuple):
+    filename: str
+    file_type: str
+    media_type: str
+    object_name: str
+    url: str
+
+def upload_article_media(minio_service: MinIOArticleService, article_id: int,
+                         embedded_files: List[UploadFile], attached_files: List[UploadFile]) -> List[UploadedMedia]:
+    """อัปโหลดไฟล์ทั้งหมดของบทความพร้อมกัน แบบทั้งหมดหรือไม่มีเลย
+
+    ถ้าไฟล์ใดล้มเหลว จะรอให้งานที่วิ่งอยู่จบ ลบ object ที่อัปโหลดไปแล้วทิ้ง แล้ว raise 502
+    ไม่แตะ DB เลย ผู้เรียกควรคืน connection ก่อนเรียก และบันทึก ArticleMedia หลังอัปโหลดเสร็จ
+    """
+    jobs = [(f, "embedded") for f in embedded_files] + [(f, "attached") for f in attached_files]
+    if not jobs:
+        return []
+
+    futures = [
+        _upload_executor.submit(minio_service.upload_article_file, article_id, file, media_type)
+        for file, media_type in jobs
+    ]
+    wait(futures, return_when=FIRST_EXCEPTION)
+
+    failed = [f for f in futures if f.done() and f.exception() is not None]
+    if failed:
+        for f in futures:
+            f.cancel()
+        wait(futures)  # งานที่เริ่มไปแล้วยกเลิกไม่ได้ ต้องรอจบก่อนจึงจะรู้ว่ามี object อะไรต้องลบ
+        uploaded = [f.result()[0] for f in futures if not f.cancelled() and f.exception() is None]
+        discard_uploaded_media(minio_service, uploaded)
+        logger.error(f"Article {article_id} media upload failed: {failed[0].exception()}")
+        raise HTTPException(status_code=502, detail="Failed to upload article media")
+
+    return [
+        UploadedMedia(
+            filename=file.filename,
+            file_type=file.content_type,
+            media_type=media_type,
+            object_name=future.result()[0],
+            url=future.result()[1],
+        )
+        for (file, media_type), future in zip(jobs, futures)
+    ]
+
+def discard_uploaded_media(minio_service: MinIOArticleService, object_names: List[str]):
+    """ลบ object ที่อัปโหลดแล้วแต่ไม่ได้ถูกบันทึกลง DB (เช่น transaction ของบทความล้มเหลว)"""
+    if not object_names:
+        return
+    try:
+        failed = minio_service.delete_objects(object_names)
+    except Exception as e:
+        failed = object_names
+        logger.error(f"Failed to clean up uploaded media: {e}")
+    if failed:
+        logger.error(f"Orphaned article media objects left in bucket: {failed}")
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from app.core.config import settings
+from app.services.minio_untils import public_endpoint, public_minio_client
+
+class SignedUrlCache:
+    """URL ดาวน์โหลดของ object ใน MinIO ต่อ (bucket, object_name) เซ็นครั้งเดียวแล้วใช้ซ้ำจนใกล้หมดอายุ
+
+    mode = "presigned": presigned GET อายุ ttl วินาที เซ็นกับ host สาธารณะ (MINIO_PUBLIC_URL/MINIO_PUBLIC_HOST)
+        ทุก URL ในช่วงเวลาเดียวกันเซ็นด้วยเวลาเริ่ม window เดียวกัน (ttl - margin) จึงได้ URL เหมือนกันทุก worker
+        client/CDN cache ได้ และยังเหลืออายุอย่างน้อย margin วินาทีเสมอตอนส่งออกไป
+    mode = "public": bucket เปิดอ่านได้ (เช่นหลัง CDN) คืน MINIO_PUBLIC_URL/bucket/object ไม่ต้องเซ็น
+    ไม่มี host สาธารณะ (endpoint = None) ใช้ไม่ได้ media_download_url จะคืน url ที่บันทึกไว้แทน
+    """
+
+    def __init__(self, mode: str, public_url: Optional[str], endpoint: Optional[Tuple[str, bool]],
+                 ttl: int, margin: int, max_entries: int):
+        self.mode = mode
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.endpoint = endpoint
+        self.ttl = ttl
+        self.window = max(ttl - margin, 1)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.signed = 0
+
+    @property
+    def available(self) -> bool:
+        return self.endpoint is not None
+
+    def _sign(self, bucket: str, object_name: str, now: float) -> Tuple[float, str]:
+        if self.mode == "public":
+            host, secure = self.endpoint or (settings.MINIO_ENDPOINT, settings.MINIO_SECURE)
+            base = self.public_url or f"{'https' if secure else 'http'}://{host}"
+            return float("inf"), f"{base}/{bucket}/{quote(object_name)}"
+
+        window_start = int(now // self.window) * self.window
+        url = public_minio_client.presigned_get_object(
+            bucket,
+            object_name,
+            expires=timedelta(seconds=self.ttl),
+            request_date=datetime.fromtimestamp(window_start, timezone.utc),
+        )
+        return window_start + self.window, url
+
+    def url_for(self, bucket: str, object_name: str) -> str:
+        return self.urls_for(bucket, [object_name])[object_name]
+
+    def urls_for(self, bucket: str, object_names: Iterable[str]) -> Dict[str, str]:
+        """URL ของหลาย object ใน bucket เดียว ตัวที่ไม่อยู่ใน cache เซ็นรวดเดียว"""
+        now = time.time()
+        urls: Dict[str, str] = {}
+        missing: List[str] = []
+        with self._lock:
+            for name in object_names:
+                entry = self._entries.get((bucket, name))
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end((bucket, name))
+                    urls[name] = entry[1]
+                    self.hits += 1
+                elif name not in urls:
+                    missing.append(name)
+
+        if missing:
+            signed = {name: self._sign(bucket, name, now) for name in dict.fromkeys(missing)}
+            with self._lock:
+                for name, entry in signed.items():
+                    self._entries[(bucket, name)] = entry
+                    self._entries.move_to_end((bucket, name))
+                    urls[name] = entry[1]
+                self.signed += len(signed)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return urls
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "available": self.available, "size": len(self._entries), "hits": self.hits, "signed": self.signed}
+
+signed_url_cache = SignedUrlCache(
+    mode=settings.MEDIA_URL_MODE,
+    public_url=settings.MINIO_PUBLIC_URL,
+    endpoint=public_endpoint(),
+    ttl=settings.MEDIA_SIGNED_URL_TTL_SECONDS,
+    margin=settings.MEDIA_SIGNED_URL_MARGIN_SECONDS,
+    max_entries=settings.MEDIA_SIGNED_URL_CACHE_MAX_ENTRIES,
+)
+
+def media_download_url(media) -> str:
+    """URL ที่ส่งให้ client ของ ArticleMedia แถวเก่าที่ไม่มี object_name หรือไม่ได้ตั้ง host สาธารณะใช้ url ที่บันทึกไว้"""
+    if not media.object_name or not signed_url_cache.available:
+        return media.url
+    return signed_url_cache.url_for(settings.MINIO_ARTICLE_BUCKET, media.object_name)
+
+def prime_article_media_urls(articles: Iterable) -> None:
+    """เซ็น URL ของ media ทุกชิ้นของบทความที่จะส่งออกในรอบเดียว ก่อน serialize เป็น ArticleOut"""
+    names = [
+        media.object_name
+        for article in articles if article is not None
+        for media in article.media_links if media.object_name
+    ]
+    if names and signed_url_cache.available:
+        signed_url_cache.urls_for(settings.MINIO_ARTICLE_BUCKET, names)
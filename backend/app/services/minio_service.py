@@ -10,6 +10,9 @@ import os
 from typing import Optional
 from functools import lru_cache
 from dotenv import load_dotenv
+from app.core.metrics import TimedClient
+from app.core.config import settings
+from urllib.parse import quote
 load_dotenv()
 
 class MinIOServiceBase:
@@ -20,12 +23,13 @@ class MinIOServiceBase:
         self.secret_key = secret_key
         self.bucket = bucket
 
-        self.client = Minio(
+        # ทุก call ไป MinIO ถูกจับเวลาลง minio_call_duration_seconds
+        self.client = TimedClient(Minio(
             self.endpoint,
             access_key=self.access_key,
             secret_key=self.secret_key,
             secure=secure
-        )
+        ))
         self._ensure_bucket_exists()
 
     def _ensure_bucket_exists(self):
@@ -43,10 +47,45 @@ class MinIOServiceBase:
             print(f"Error deleting object {object_name}: {e}")
             return False
 
+    def delete_objects(self, object_names: list[str]) -> list[str]:
+        """ลบหลาย object ในคำขอเดียว คืนรายชื่อที่ลบไม่สำเร็จ"""
+        from minio.deleteobjects import DeleteObject
+
+        if not object_names:
+            return []
+        # remove_objects เป็น lazy iterator ต้องวนอ่านผลถึงจะลบจริง
+        errors = self.client.remove_objects(self.bucket, [DeleteObject(name) for name in object_names])
+        failed = []
+        for error in errors:
+            print(f"Error deleting object {error.name}: {error}")
+            failed.append(error.name)
+        return failed
+
+    def stat_object(self, object_name: str):
+        """metadata ของ object (size, etag, content_type) หรือ None ถ้ายังไม่มี"""
+        try:
+            return self.client.stat_object(self.bucket, object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            raise
+
+    def read_object(self, object_name: str, length: int = 0) -> bytes:
+        """อ่าน object (length > 0 = อ่านแค่ length byte แรก)"""
+        response = self.client.get_object(self.bucket, object_name, offset=0, length=length)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
     def get_public_url(self, object_name: str) -> str:
-        public_host = os.getenv("MINIO_PUBLIC_HOST", self.endpoint)
-        print("DEBUG - public_host:", public_host)
-        # return f"http://{public_host}/{self.bucket}/{object_name}"
+        """URL ถาวรที่บันทึกลง DB ถ้ากำหนด MINIO_PUBLIC_URL (CDN/reverse proxy) ชี้ไปที่นั่นตรง ๆ
+
+        URL ที่ส่งให้ client จริงของ media บทความมาจาก app/services/media_urls.py
+        """
+        if settings.MINIO_PUBLIC_URL:
+            return f"{settings.MINIO_PUBLIC_URL.rstrip('/')}/{self.bucket}/{quote(object_name)}"
         return f"http://localhost:9001/api/v1/buckets/{self.bucket}/objects/download?preview=true&prefix={object_name}&version_id=null"
 
 class MinIOAvatarService(MinIOServiceBase):
@@ -89,6 +128,22 @@ class MinIOAvatarService(MinIOServiceBase):
         except S3Error as e:
             raise Exception(f"Failed to upload avatar: {e}")
         
+    def upload_avatar_rendition(self, user_id: int, batch_id: str, size: int, fmt: str,
+                                content: bytes, content_type: str) -> tuple[str, str]:
+        """อัปโหลดรูป avatar หนึ่งขนาดจาก avatar_pipeline คืน (object_name, url)"""
+        object_name = f"user_{user_id}/{batch_id}/{size}.{fmt}"
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket,
+                object_name=object_name,
+                data=io.BytesIO(content),
+                length=len(content),
+                content_type=content_type
+            )
+            return object_name, self.get_public_url(object_name)
+        except S3Error as e:
+            raise Exception(f"Failed to upload avatar: {e}")
+
     def delete_avatar(self, avatar_url: str) -> bool:
         from urllib.parse import urlparse
 
@@ -129,39 +184,34 @@ class MinIOArticleService(MinIOServiceBase):
         super().__init__(**kwargs)
 
     def upload_embedded_file(self, article_id: int, file: UploadFile) -> str:
-        # ดึงนามสกุลไฟล์แบบ `.jpg`, `.png`, ฯลฯ
-        ext = os.path.splitext(file.filename)[1] or ".bin"
-        object_name = f"article_{article_id}/embedded/{uuid.uuid4()}{ext}"
-
-        try:
-            self.client.put_object(
-                self.bucket,
-                object_name,
-                file.file,
-                length=-1,
-                part_size=10 * 1024 * 1024,
-                content_type=file.content_type
-            )
-            return self.get_public_url(object_name)
-        except S3Error as e:
-            raise Exception(f"Failed to upload embedded file: {e}")
+        return self.upload_article_file(article_id, file, "embedded")[1]
 
     def upload_attached_file(self, article_id: int, file: UploadFile) -> str:
-        ext = file.filename.split('.')[-1] if '.' in file.filename else 'bin'
-        object_name = f"article_{article_id}/attached/{uuid.uuid4()}.{ext}"
+        return self.upload_article_file(article_id, file, "attached")[1]
 
+    def upload_article_file(self, article_id: int, file: UploadFile, media_type: str) -> tuple[str, str]:
+        """อัปโหลดไฟล์ของบทความแบบ stream จาก UploadFile (ไม่อ่านทั้งไฟล์เข้า memory) คืน (object_name, url)"""
+        if media_type == "embedded":
+            # ดึงนามสกุลไฟล์แบบ `.jpg`, `.png`, ฯลฯ
+            ext = os.path.splitext(file.filename)[1] or ".bin"
+        else:
+            ext = "." + (file.filename.split('.')[-1] if '.' in file.filename else 'bin')
+        object_name = f"article_{article_id}/{media_type}/{uuid.uuid4()}{ext}"
+
+        # รู้ขนาดไฟล์ก็ส่งไปเลย ไม่รู้ (-1) minio จะอ่านทีละ part_size
+        size = getattr(file, "size", None)
         try:
             self.client.put_object(
                 self.bucket,
                 object_name,
                 file.file,
-                length=-1,
+                length=size if size is not None else -1,
                 part_size=10 * 1024 * 1024,
                 content_type=file.content_type
             )
-            return self.get_public_url(object_name)
+            return object_name, self.get_public_url(object_name)
         except S3Error as e:
-            raise Exception(f"Failed to upload attached file: {e}")
+            raise Exception(f"Failed to upload {media_type} file: {e}")
 
 @lru_cache()
 def get_minio_avatar_service() -> MinIOAvatarService:
@@ -199,26 +249,3 @@ def validate_avatar_image(file_content: bytes, max_size_mb: int = 5) -> tuple[bo
 
     except Exception as e:
         return False, f"Invalid image file: {str(e)}", None
-
-def resize_avatar(file_content: bytes, max_width: int = 400, max_height: int = 400, quality: int = 85) -> bytes:
-    try:
-        image = Image.open(io.BytesIO(file_content))
-
-        ratio = min(max_width / image.width, max_height / image.height)
-        if ratio < 1:
-            new_size = (int(image.width * ratio), int(image.height * ratio))
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-        output = io.BytesIO()
-        format = image.format if image.format in ['JPEG', 'PNG'] else 'JPEG'
-
-        if format == 'JPEG':
-            image = image.convert('RGB')
-            image.save(output, format=format, quality=quality, optimize=True)
-        else:
-            image.save(output, format=format, optimize=True)
-
-        return output.getvalue()
-
-    except Exception as e:
-        raise Exception(f"Failed to resize avatar: {str(e)}")
@@ -1,17 +1,69 @@
 from minio import Minio
-from datetime import timedelta
+from minio.datatypes import PostPolicy
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
 import os
+from typing import Optional, Tuple
 
-minio_client = Minio(
-    endpoint=os.getenv("MINIO_ENDPOINT"),
+from app.core.config import settings
+
+MINIO_SECURE = os.getenv("MINIO_SECURE", "false").lower() == "true"
+
+def public_endpoint() -> Optional[Tuple[str, bool]]:
+    """(host, secure) ที่ browser เข้าถึง MinIO ได้ จาก MINIO_PUBLIC_URL หรือ MINIO_PUBLIC_HOST ไม่กำหนดทั้งคู่ = None"""
+    if settings.MINIO_PUBLIC_URL:
+        parsed = urlparse(settings.MINIO_PUBLIC_URL)
+        return parsed.netloc, parsed.scheme == "https"
+    if settings.MINIO_PUBLIC_HOST:
+        host = settings.MINIO_PUBLIC_HOST
+        internal_port = urlparse(f"//{settings.MINIO_ENDPOINT}").port
+        if ":" not in host and internal_port:
+            # docker-compose กำหนดแค่ IP ของเครื่อง ใช้ port เดียวกับ MINIO_ENDPOINT (publish 9000:9000)
+            host = f"{host}:{internal_port}"
+        return host, settings.MINIO_SECURE
+    return None
+
+# SigV4 เซ็น host ด้วย URL ที่ส่งให้ client ต้องเซ็นกับ host สาธารณะ ไม่ใช่ MINIO_ENDPOINT (ชื่อใน docker network)
+# presign คำนวณในเครื่องล้วน client นี้จึงไม่ต้องต่อถึง host สาธารณะได้จากฝั่ง API
+PUBLIC_ENDPOINT, PUBLIC_SECURE = public_endpoint() or (os.getenv("MINIO_ENDPOINT"), MINIO_SECURE)
+
+public_minio_client = Minio(
+    endpoint=PUBLIC_ENDPOINT,
     access_key=os.getenv("MINIO_ACCESS_KEY"),
     secret_key=os.getenv("MINIO_SECRET_KEY"),
-    secure=False  # เปลี่ยนเป็น True ถ้าใช้ https
+    secure=PUBLIC_SECURE,  # MINIO_SECURE=true ถ้าใช้ https
+    # กำหนด region ไว้ presign จะคำนวณในเครื่องเลย ไม่ต้องถาม bucket location จาก MinIO ก่อน
+    region=os.getenv("MINIO_REGION", "us-east-1"),
 )
 
-def generate_signed_url(bucket: str, object_name: str, expiry_minutes: int = 10):
-    return minio_client.presigned_get_object(
+def generate_signed_url(bucket: str, object_name: str, expiry_minutes: Optional[int] = None):
+    """presigned GET ไม่ระบุ expiry_minutes = ใช้ URL จาก cache (อายุตาม MEDIA_SIGNED_URL_TTL_SECONDS)"""
+    if expiry_minutes is None:
+        from app.services.media_urls import signed_url_cache
+        return signed_url_cache.url_for(bucket, object_name)
+    return public_minio_client.presigned_get_object(
         bucket_name=bucket,
         object_name=object_name,
         expires=timedelta(minutes=expiry_minutes)
     )
+
+def generate_upload_url(bucket: str, object_name: str, expiry_seconds: int) -> str:
+    """URL สำหรับ PUT ไฟล์ตรงเข้า MinIO (ขนาด/ชนิดไฟล์ตรวจตอน finalize)"""
+    return public_minio_client.presigned_put_object(
+        bucket_name=bucket,
+        object_name=object_name,
+        expires=timedelta(seconds=expiry_seconds)
+    )
+
+def generate_upload_post_policy(bucket: str, object_name: str, content_type: str,
+                                max_size: int, expiry_seconds: int) -> tuple[str, dict]:
+    """form POST ตรงเข้า MinIO คืน (url, fields) MinIO เองปฏิเสธไฟล์ที่ key/Content-Type/ขนาดไม่ตรง policy"""
+    policy = PostPolicy(bucket, datetime.now(timezone.utc) + timedelta(seconds=expiry_seconds))
+    policy.add_equals_condition("key", object_name)
+    policy.add_equals_condition("Content-Type", content_type)
+    policy.add_content_length_range_condition(1, max_size)
+    fields = public_minio_client.presigned_post_policy(policy)
+    fields["key"] = object_name
+    fields["Content-Type"] = content_type
+    scheme = "https" if PUBLIC_SECURE else "http"
+    return f"{scheme}://{PUBLIC_ENDPOINT}/{bucket}", fields
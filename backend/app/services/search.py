@@ -0,0 +1,138 @@
+import html
+import logging
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, cast, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres ไม่มี parser ภาษาไทย (ไม่มีช่องว่างระหว่างคำ) จึงแยกข้อความไทยเป็น token เองฝั่ง Python
+# แล้วเก็บเป็น lexeme ตรง ๆ ด้วย array_to_tsvector ส่วนข้อความอื่นใช้ text search config ปกติ
+THAI_RUN = re.compile(r"[\u0e00-\u0e7f]+")
+WORD = re.compile(r"[\u0e00-\u0e7f]+|[^\W_]+")
+TAG = re.compile(r"<[^>]+>")
+
+SNIPPET_LENGTH = 200
+
+def strip_html(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return html.unescape(TAG.sub(" ", value))
+
+def _ngrams(run: str, size: int) -> List[str]:
+    if len(run) <= size:
+        return [run]
+    return [run[i:i + size] for i in range(len(run) - size + 1)]
+
+@lru_cache()
+def _thai_tokenizer() -> Callable[[str], List[str]]:
+    size = settings.SEARCH_NGRAM_SIZE
+    if settings.SEARCH_THAI_TOKENIZER == "pythainlp":
+        try:
+            from pythainlp.tokenize import word_tokenize
+            return lambda run: [w for w in word_tokenize(run, keep_whitespace=False) if w.strip()]
+        except ImportError:
+            logger.warning("pythainlp is not installed, falling back to n-gram Thai tokenizer")
+    return lambda run: _ngrams(run, size)
+
+def split_text(value: str) -> Tuple[str, List[str]]:
+    """แยกเป็น (ข้อความที่ไม่ใช่ภาษาไทยสำหรับ to_tsvector, token ภาษาไทย)"""
+    tokenize = _thai_tokenizer()
+    thai_tokens = []
+    for run in THAI_RUN.findall(value):
+        thai_tokens.extend(tokenize(run))
+    return THAI_RUN.sub(" ", value).lower(), thai_tokens
+
+def _weighted(value: str, weight: str):
+    other, thai_tokens = split_text(value)
+    vector = func.to_tsvector(settings.SEARCH_TS_CONFIG, other)
+    if thai_tokens:
+        vector = vector.op("||")(func.array_to_tsvector(literal(sorted(set(thai_tokens)), ARRAY(String))))
+    return func.setweight(vector, weight)
+
+def build_search_vector(title: str, content: Optional[str], tag_names: Iterable[str], hashtag_names: Iterable[str]):
+    """tsvector ของบทความ: title (A) > tags/hashtags (B) > เนื้อหา (C)"""
+    labels = " ".join(list(tag_names) + list(hashtag_names))
+    return (
+        _weighted(title or "", "A")
+        .op("||")(_weighted(labels, "B"))
+        .op("||")(_weighted(strip_html(content), "C"))
+    )
+
+def build_search_query(q: str):
+    """แปลงคำค้นเป็น tsquery (ทุกคำต้องเจอ, คำที่ไม่ใช่ภาษาไทยจับแบบ prefix) คืน None ถ้าไม่มีคำที่ใช้ค้นได้"""
+    other, thai_tokens = split_text(q)
+    words = WORD.findall(other)
+
+    query = None
+    if words:
+        terms = [f"{w}:*" for w in words]
+        query = func.to_tsquery(settings.SEARCH_TS_CONFIG, literal(" & ".join(terms)))
+    if thai_tokens:
+        # token ไทยมีแต่อักษรไทย ใส่ quote เป็น lexeme ตรง ๆ ได้เลย
+        quoted = " & ".join(f"'{t}'" for t in dict.fromkeys(thai_tokens))
+        thai_query = cast(literal(quoted), TSQUERY)
+        query = thai_query if query is None else query.op("&&")(thai_query)
+    return query
+
+def highlight_snippet(content: Optional[str], q: str, length: int = SNIPPET_LENGTH) -> Optional[str]:
+    """ตัดข้อความรอบคำที่ค้นเจอคำแรกแล้วครอบคำค้นด้วย <b> (ทำฝั่ง Python เพราะ ts_headline แยกคำไทยไม่ได้)"""
+    text_value = " ".join(strip_html(content).split())
+    if not text_value:
+        return None
+
+    terms = sorted({t for t in WORD.findall(q) if t.strip()}, key=len, reverse=True)
+    lowered = text_value.lower()
+    first = min((i for i in (lowered.find(t.lower()) for t in terms) if i >= 0), default=0)
+
+    start = max(0, first - length // 4)
+    snippet = text_value[start:start + length]
+    escaped = html.escape(snippet)
+    if terms:
+        pattern = re.compile("|".join(re.escape(html.escape(t)) for t in terms), re.IGNORECASE)
+        escaped = pattern.sub(lambda m: f"<b>{m.group(0)}</b>", escaped)
+
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + length < len(text_value) else ""
+    return f"{prefix}{escaped}{suffix}"
+
+def refresh_search_vector(article):
+    """คำนวณ search_vector ใหม่จาก title/content/tags ปัจจุบัน (ถูกเขียนตอน flush)"""
+    article.search_vector = build_search_vector(
+        article.title, article.content, article.tag_names, article.hashtag_names
+    )
+
+def backfill_search_vectors(conn, batch_size: int = 500):
+    """migration: เติม search_vector ให้บทความเดิมที่ยังไม่มี"""
+    from sqlalchemy.orm import Session, load_only, selectinload
+    from app.models.article import Article
+
+    db = Session(bind=conn)
+    try:
+        while True:
+            articles = (
+                db.query(Article)
+                # โหลดแค่ column ที่ใช้ เพราะ migration นี้รันก่อน ALTER ที่เพิ่ม column อื่นของ article
+                .options(
+                    load_only(Article.id, Article.title, Article.content),
+                    selectinload(Article.tags),
+                    selectinload(Article.hashtags),
+                )
+                .filter(Article.search_vector.is_(None))
+                .order_by(Article.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not articles:
+                break
+            for article in articles:
+                refresh_search_vector(article)
+            db.flush()
+            db.expunge_all()
+    finally:
+        db.close()
@@ -0,0 +1,255 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Hashable, List, Optional
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, cast, column, exists, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.config import settings
+from app.core.metrics import (
+    VIEW_FLUSH_FAILURES, VIEWS_BUFFERED, VIEWS_DROPPED, VIEWS_DUPLICATE, VIEWS_FLUSHED, VIEWS_PENDING
+)
+from app.core.scheduler import PeriodicTask
+from app.models.article import Article, ArticleViewLog
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+class ViewDedupStore(ABC):
+    """เก็บ key (article, ip, ชั่วโมง) ที่นับ view ไปแล้ว
+
+    ต่อ backend อื่น (เช่น store ที่แชร์กันหลาย worker) ได้โดย implement mark_seen
+    """
+
+    @abstractmethod
+    def mark_seen(self, key: Hashable) -> bool:
+        """คืน True ถ้า key นี้ยังไม่เคยเห็น (และบันทึกไว้แล้ว), False ถ้าซ้ำ"""
+
+class InMemoryViewDedupStore(ViewDedupStore):
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark_seen(self, key: Hashable) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys[key] = None
+            # key เรียงตามเวลาที่เข้ามา ตัดอันเก่าสุดทิ้งเมื่อเต็ม
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+            return True
+
+class ViewCounterBuffer:
+    """รวม view ไว้ในหน่วยความจำแล้ว flush ลง DB เป็น batch (write-behind)
+
+    - นับ view ไม่ซ้ำต่อ (article, ip, ชั่วโมง)
+    - flush ทุก interval หรือเมื่อ buffer เต็ม max_batch
+    - ถ้า flush ล้มเหลว ข้อมูลจะถูกคืนเข้า buffer เพื่อลองใหม่ (at-least-once) และ flush รอบสุดท้ายตอน shutdown
+    - buffer รับได้ไม่เกิน max_pending (เช่นตอน DB ล่มนาน) เกินนั้นทิ้ง view เก่าสุดและนับเป็น dropped
+    - แถวที่ DB ปฏิเสธ (DataError/IntegrityError เช่น IP ผิดรูปแบบ, ไม่มี partition) ถูกแยกออกด้วยการแบ่งครึ่ง batch
+      แล้วทิ้งเฉพาะแถวนั้น ไม่ให้ batch เดิมล้มซ้ำทุกรอบ
+    """
+
+    def __init__(self, engine_factory: Callable[[], Engine], dedup_store: ViewDedupStore,
+                 flush_interval: float, max_batch: int, max_pending: int):
+        self._engine_factory = engine_factory
+        self.dedup_store = dedup_store
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._logs: List[dict] = []
+        self._task = PeriodicTask("article-view-flush", flush_interval, self.flush)
+
+        self.buffered_total = 0
+        self.duplicate_total = 0
+        self.flushed_views_total = 0
+        self.flushed_logs_total = 0
+        self.flush_failures_total = 0
+        self.dropped_total = 0
+        self.last_flush_at: Optional[datetime] = None
+
+    def record(self, article_id: int, user_id: int, ip_address: str, viewed_at: Optional[datetime] = None) -> bool:
+        viewed_at = viewed_at or datetime.utcnow()
+        hour = viewed_at.replace(minute=0, second=0, microsecond=0)
+        if not self.dedup_store.mark_seen((article_id, ip_address, hour)):
+            with self._lock:
+                self.duplicate_total += 1
+            VIEWS_DUPLICATE.inc()
+            return False
+
+        with self._lock:
+            if len(self._logs) >= self.max_pending:
+                self.dropped_total += 1
+                VIEWS_DROPPED.labels("buffer_full").inc()
+                return False
+            self._logs.append({
+                "article_id": article_id,
+                "user_id": user_id,
+                "ip_address": ip_address,
+                "viewed_at": viewed_at,
+            })
+            self.buffered_total += 1
+            full = len(self._logs) >= self.max_batch
+        VIEWS_BUFFERED.inc()
+        VIEWS_PENDING.inc()
+
+        if full:
+            self._task.wake()
+        return True
+
+    def flush(self) -> int:
+        """เขียน view ที่ค้างทีละ max_batch แถว (หนึ่ง transaction ต่อชุด) คืนจำนวน view ที่นับเพิ่ม
+
+        ชุดที่เขียนไม่ได้ (เช่นต่อ DB ไม่ได้) คืนเข้า buffer พร้อมชุดที่ยังไม่ได้ลอง แล้วหยุดรอรอบหน้า
+        ชุดที่ commit ไปแล้วไม่ถูกเขียนซ้ำ
+        """
+        with self._flush_lock:
+            with self._lock:
+                logs = self._logs
+                self._logs = []
+
+            flushed = 0
+            batch_size = max(self.max_batch, 1)
+            for start in range(0, len(logs), batch_size):
+                batch = logs[start:start + batch_size]
+                try:
+                    inserted, rejected = self._write(batch)
+                except Exception as e:
+                    self._requeue(logs[start:], e)
+                    break
+                flushed += self._record_flushed(batch, inserted, rejected)
+            return flushed
+
+    def _requeue(self, logs: List[dict], error: Exception):
+        with self._lock:
+            self._logs[:0] = logs
+            self.flush_failures_total += 1
+            overflow = len(self._logs) - self.max_pending
+            if overflow > 0:
+                del self._logs[:overflow]
+                self.dropped_total += overflow
+        VIEW_FLUSH_FAILURES.inc()
+        if overflow > 0:
+            VIEWS_DROPPED.labels("buffer_full").inc(overflow)
+            VIEWS_PENDING.dec(overflow)
+        logger.error(f"Failed to flush {len(logs)} article views, will retry: {error}")
+
+    def _record_flushed(self, logs: List[dict], inserted: Counter, rejected: int) -> int:
+        flushed = sum(inserted.values())
+        with self._lock:
+            self.flushed_views_total += flushed
+            self.flushed_logs_total += len(logs) - rejected
+            self.duplicate_total += len(logs) - rejected - flushed
+            self.dropped_total += rejected
+            self.last_flush_at = datetime.utcnow()
+        VIEWS_FLUSHED.inc(flushed)
+        VIEWS_DUPLICATE.inc(len(logs) - rejected - flushed)
+        if rejected:
+            VIEWS_DROPPED.labels("rejected").inc(rejected)
+        VIEWS_PENDING.dec(len(logs))
+        return flushed
+
+    def _write(self, logs: List[dict]) -> tuple[Counter, int]:
+        """เขียน logs ใน transaction เดียว ถ้า DB ปฏิเสธข้อมูลบางแถว แบ่งครึ่งหาแถวนั้นแล้วทิ้ง คืน (inserted, จำนวนที่ทิ้ง)
+
+        error อื่น (เช่นต่อ DB ไม่ได้) ส่งต่อให้ flush คืนชุดนี้เข้า buffer ครึ่งที่เขียนสำเร็จแล้วจะถูกข้ามด้วย dedup ตอนลองใหม่
+        """
+        try:
+            with self._engine_factory().begin() as conn:
+                inserted = self._insert_logs(conn, logs)
+                if inserted:
+                    self._increment_counts(conn, inserted)
+            return inserted, 0
+        except (DataError, IntegrityError) as e:
+            if len(logs) == 1:
+                logger.error(f"Dropping article view rejected by the database {logs[0]}: {e}")
+                return Counter(), 1
+        middle = len(logs) // 2
+        left, left_rejected = self._write(logs[:middle])
+        right, right_rejected = self._write(logs[middle:])
+        return left + right, left_rejected + right_rejected
+
+    def _insert_logs(self, conn, logs: List[dict]) -> Counter:
+        rows = values(
+            column("article_id", Integer),
+            column("user_id", BigInteger),
+            column("ip_address", String),
+            column("viewed_at", DateTime),
+            name="v",
+        ).data([(r["article_id"], r["user_id"], r["ip_address"], r["viewed_at"]) for r in logs])
+        ip_address = cast(rows.c.ip_address, INET)
+        hour = func.date_trunc("hour", rows.c.viewed_at, type_=DateTime)
+
+        # บทความ/ผู้ใช้อาจถูกลบระหว่างรอ flush ข้ามแถวนั้นไปแทนที่จะทำให้ทั้ง batch ล้ม
+        # และกันซ้ำกับ view ที่ worker อื่น/รอบก่อนหน้าบันทึกไว้แล้วในชั่วโมงเดียวกัน (ix_article_view_log_dedup)
+        source = (
+            select(rows.c.article_id, rows.c.user_id, ip_address, rows.c.viewed_at)
+            .where(exists().where(Article.id == rows.c.article_id))
+            .where(exists().where(User.id == rows.c.user_id))
+            .where(~exists().where(
+                ArticleViewLog.article_id == rows.c.article_id,
+                ArticleViewLog.ip_address == ip_address,
+                ArticleViewLog.viewed_at >= hour,
+                ArticleViewLog.viewed_at < hour + timedelta(hours=1),
+            ))
+        )
+        result = conn.execute(
+            insert(ArticleViewLog)
+            .from_select(["article_id", "user_id", "ip_address", "viewed_at"], source)
+            .returning(ArticleViewLog.article_id)
+        )
+        return Counter(result.scalars().all())
+
+    def _increment_counts(self, conn, counts: Counter):
+        deltas = values(column("id", Integer), column("n", Integer), name="d").data(list(counts.items()))
+        conn.execute(
+            update(Article)
+            .where(Article.id == deltas.c.id)
+            .values(view_count=func.coalesce(Article.view_count, 0) + deltas.c.n)
+        )
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._logs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._logs),
+                "buffered_total": self.buffered_total,
+                "duplicate_total": self.duplicate_total,
+                "flushed_views_total": self.flushed_views_total,
+                "flushed_logs_total": self.flushed_logs_total,
+                "flush_failures_total": self.flush_failures_total,
+                "dropped_total": self.dropped_total,
+                "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            }
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        self._task.stop()
+        self.flush()
+        if self.pending():
+            logger.error(f"{self.pending()} article views could not be flushed on shutdown")
+
+def _default_engine() -> Engine:
+    from app.db.session import engine
+    return engine
+
+view_counter = ViewCounterBuffer(
+    engine_factory=_default_engine,
+    dedup_store=InMemoryViewDedupStore(max_keys=settings.VIEW_DEDUP_MAX_KEYS),
+    flush_interval=settings.VIEW_FLUSH_INTERVAL_SECONDS,
+    max_batch=settings.VIEW_FLUSH_MAX_BATCH,
+    max_pending=settings.VIEW_BUFFER_MAX_PENDING,
+)
@@ -0,0 +1,159 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.core.scheduler import PeriodicTask
+from app.db.advisory_lock import try_advisory_xact_lock
+from app.models.article import ArticleViewLog
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = ArticleViewLog.__tablename__
+LEGACY_TABLE = f"{PARENT_TABLE}_legacy"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + (d.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+def ensure_partitions(conn: Connection, start: date, months_ahead: int) -> List[str]:
+    """สร้าง partition รายเดือนตั้งแต่เดือนของ start ถึงเดือนปัจจุบัน + months_ahead"""
+    month = _month_start(start)
+    last = _add_months(_month_start(datetime.utcnow().date()), months_ahead)
+    created = []
+    while month <= last:
+        upper = _add_months(month, 1)
+        name = partition_name(month)
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if not exists:
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            created.append(name)
+        month = upper
+    if created:
+        logger.info(f"Created article_view_log partitions: {created}")
+    return created
+
+def list_partitions(conn: Connection) -> List[Tuple[str, date]]:
+    rows = conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = :parent
+    """), {"parent": PARENT_TABLE}).scalars().all()
+
+    partitions = []
+    for name in rows:
+        suffix = name[len(PARTITION_PREFIX):] if name.startswith(PARTITION_PREFIX) else ""
+        try:
+            partitions.append((name, datetime.strptime(suffix, "%Y%m").date()))
+        except ValueError:
+            continue  # partition ที่ไม่ได้สร้างโดยโมดูลนี้ ไม่ยุ่ง
+    return sorted(partitions, key=lambda p: p[1])
+
+def drop_expired_partitions(conn: Connection, retention_months: int) -> List[str]:
+    """ลบทั้ง partition ที่ข้อมูลทั้งเดือนเก่ากว่า retention (ถูกกว่า DELETE ทีละแถวมาก)"""
+    cutoff = _add_months(_month_start(datetime.utcnow().date()), -retention_months)
+    dropped = []
+    for name, month in list_partitions(conn):
+        if _add_months(month, 1) <= cutoff:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped expired article_view_log partitions: {dropped}")
+    return dropped
+
+def rollup_views(conn: Connection):
+    """สรุปยอด view รายชั่วโมง/รายวันจาก log ดิบ คำนวณช่วงล่าสุดซ้ำได้ (upsert) เผื่อ view ที่ flush มาช้า"""
+    now = datetime.utcnow()
+    hour_since = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+    day_since = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    conn.execute(text("""
+        INSERT INTO article_view_hourly (article_id, bucket_start, views, unique_ips)
+        SELECT article_id, date_trunc('hour', viewed_at), count(*), count(DISTINCT ip_address)
+        FROM article_view_log
+        WHERE viewed_at >= :since
+        GROUP BY 1, 2
+        ON CONFLICT (article_id, bucket_start)
+        DO UPDATE SET views = EXCLUDED.views, unique_ips = EXCLUDED.unique_ips
+    """), {"since": hour_since})
+
+    conn.execute(text("""
+        INSERT INTO article_view_daily (article_id, bucket_start, views, unique_ips)
+        SELECT article_id, date_trunc('day', viewed_at), count(*), count(DISTINCT ip_address)
+        FROM article_view_log
+        WHERE viewed_at >= :since
+        GROUP BY 1, 2
+        ON CONFLICT (article_id, bucket_start)
+        DO UPDATE SET views = EXCLUDED.views, unique_ips = EXCLUDED.unique_ips
+    """), {"since": day_since})
+
+    # rollup รายชั่วโมงเก็บเท่าอายุ log ดิบ รายวันเก็บถาวร
+    hourly_cutoff = _add_months(_month_start(now.date()), -settings.VIEW_LOG_RETENTION_MONTHS)
+    conn.execute(text("DELETE FROM article_view_hourly WHERE bucket_start < :cutoff"), {"cutoff": hourly_cutoff})
+
+def convert_legacy_table(conn: Connection):
+    """ย้ายตาราง article_view_log แบบเดิม (ไม่ partition) มาเป็นตาราง partition ครั้งเดียว"""
+    relkind = conn.execute(text(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = :name AND n.nspname = current_schema()"
+    ), {"name": PARENT_TABLE}).scalar()
+    if relkind != "r":
+        return
+
+    logger.info("Converting article_view_log to a partitioned table")
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+    # ชื่อ index/sequence เป็น global ใน schema ต้องย้ายออกก่อนสร้างตารางใหม่
+    conn.execute(text(f"ALTER INDEX IF EXISTS {PARENT_TABLE}_pkey RENAME TO {LEGACY_TABLE}_pkey"))
+    conn.execute(text(f"ALTER SEQUENCE IF EXISTS {PARENT_TABLE}_id_seq RENAME TO {LEGACY_TABLE}_id_seq"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_article_view_log_ip_address"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_article_view_log_viewed_at"))
+
+    ArticleViewLog.__table__.create(conn)
+
+    oldest = conn.execute(text(f"SELECT min(viewed_at) FROM {LEGACY_TABLE}")).scalar()
+    ensure_partitions(conn, (oldest or datetime.utcnow()).date(), settings.VIEW_LOG_PARTITIONS_AHEAD)
+
+    conn.execute(text(f"""
+        INSERT INTO {PARENT_TABLE} (article_id, user_id, ip_address, viewed_at)
+        SELECT article_id, user_id, ip_address, viewed_at
+        FROM {LEGACY_TABLE}
+        WHERE viewed_at IS NOT NULL
+    """))
+    conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+def prepare_view_log_storage(conn: Connection):
+    """ขั้นตอน migration ตอน start: แปลงตารางเดิม (ถ้ามี) และสร้าง partition ล่วงหน้า"""
+    convert_legacy_table(conn)
+    ensure_partitions(conn, datetime.utcnow().date(), settings.VIEW_LOG_PARTITIONS_AHEAD)
+
+def run_maintenance():
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        if not try_advisory_xact_lock(conn, "article_view_log_maintenance"):
+            return
+        conn.execute(text("SET LOCAL statement_timeout = 0"))  # rollup ไม่อยู่ใต้ timeout ของ request
+        ensure_partitions(conn, datetime.utcnow().date(), settings.VIEW_LOG_PARTITIONS_AHEAD)
+        drop_expired_partitions(conn, settings.VIEW_LOG_RETENTION_MONTHS)
+        rollup_views(conn)
+
+maintenance_task = PeriodicTask(
+    "article-view-log-maintenance",
+    settings.VIEW_LOG_MAINTENANCE_INTERVAL_SECONDS,
+    run_maintenance,
+)
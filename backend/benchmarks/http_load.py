@@ -0,0 +1,132 @@
+"""Load test สำหรับเทียบ router sync (threadpool) กับ async (DB_ASYNC=true)
+
+ใช้แค่ stdlib: แต่ละ client เปิด keep-alive connection ของตัวเองแล้วยิง GET วนจนครบจำนวน
+
+วิธีเทียบ (รัน server ทีละแบบ ด้วยจำนวน worker และ pool เท่ากัน):
+
+    RATE_LIMIT_ENABLED=false DB_ASYNC=false uvicorn app.main:app --workers 4
+    python benchmarks/http_load.py --label sync --token <access_token> --path /v1/api/articles/
+
+    RATE_LIMIT_ENABLED=false DB_ASYNC=true uvicorn app.main:app --workers 4
+    python benchmarks/http_load.py --label async --token <access_token> --path /v1/api/articles/
+
+ค่า default คือ 500 client พร้อมกัน ตัวเลขที่ใช้เทียบคือ req/s และ p99
+
+ทุก client ใช้ token เดียวกัน จึงตกอยู่ใน bucket ต่อ user เดียวของ rate limiter
+(RATE_LIMIT_DEFAULT_CAPACITY=120, 10 req/s) ยิงเกินนั้นจะได้ 429 แทนที่จะวัด DB ได้
+ให้รัน server ด้วย RATE_LIMIT_ENABLED=false ตอนวัด
+
+DB_ASYNC ครอบเฉพาะ GET ของ articles/categories (POST/PUT/DELETE และ router อื่นยังเป็น sync)
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    status = int(status_line.split()[1])
+
+    length, chunked, close = 0, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name == "connection" and value == "close":
+            close = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+
+    if close:
+        raise ConnectionResetError("server closed keep-alive connection")
+    return status
+
+async def _client(host: str, port: int, request: bytes, remaining: list, latencies: list, errors: dict):
+    reader = writer = None
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            started = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run(url: str, path: str, token: str, concurrency: int, total: int, warmup: int) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    headers = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: keep-alive", "Accept: application/json"]
+    if token:
+        headers.append(f"Authorization: Bearer {token}")
+    request = ("\r\n".join(headers) + "\r\n\r\n").encode()
+
+    if warmup:
+        await asyncio.gather(*[_client(host, port, request, [warmup // concurrency + 1], [], {}) for _ in range(concurrency)])
+
+    latencies, errors = [], {}
+    remaining = [total]
+    started = time.perf_counter()
+    await asyncio.gather(*[_client(host, port, request, remaining, latencies, errors) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/v1/api/articles/")
+    parser.add_argument("--token", default="", help="access token (Bearer)")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--label", default="")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.path, args.token, args.concurrency, args.requests, args.warmup))
+    result = {"label": args.label, "path": args.path, "concurrency": args.concurrency, **result}
+    print(json.dumps(result, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
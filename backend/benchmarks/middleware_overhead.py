@@ -0,0 +1,114 @@
+"""วัด overhead ต่อ request ของ middleware stack (CORS, TrustedHost, GZip, security headers)
+
+เรียก ASGI app ตรง ๆ ใน process (ไม่ผ่าน network/uvicorn) จึงเห็นเฉพาะต้นทุนของ middleware
+เทียบ 3 แบบ: ไม่มี middleware, stack เดิม (SecurityHeaders แบบ BaseHTTPMiddleware), stack ปัจจุบัน (ASGI ล้วน)
+
+    cd backend && python benchmarks/middleware_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.middleware.trustedhost import TrustedHostMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.security import SECURITY_HEADERS, SecurityHeadersMiddleware
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """สำเนาของ implementation เดิม (ก่อนเปลี่ยนเป็น ASGI ล้วน) ไว้ใช้เทียบเท่านั้น"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS:
+            response.headers[name] = value
+        if request.url.scheme == "https":
+            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        return response
+
+async def endpoint(request):
+    return JSONResponse({"status": "ok", "items": list(range(20))})
+
+def build_app(security_headers_cls=None) -> Starlette:
+    # ลำดับเดียวกับ app/main.py (add_middleware ตัวหลังอยู่นอกสุด -> ในรายการนี้ตัวแรกอยู่นอกสุด)
+    middleware = []
+    if security_headers_cls is not None:
+        middleware = [
+            Middleware(GZipMiddleware, minimum_size=1000),
+            Middleware(TrustedHostMiddleware, allowed_hosts=["localhost", "127.0.0.1", "*.yourdomain.com"]),
+            Middleware(security_headers_cls),
+            Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], allow_credentials=True),
+        ]
+    return Starlette(routes=[Route("/", endpoint)], middleware=middleware)
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/",
+    "raw_path": b"/",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"localhost"), (b"origin", b"http://localhost:3000"), (b"accept-encoding", b"gzip")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+
+async def call(app):
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    response_complete = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # เหมือน server จริง: receive ถัดไปรอจน client ได้ response ครบแล้วตัดการเชื่อมต่อ
+        # (BaseHTTPMiddleware ฟัง disconnect ระหว่างส่ง body ถ้าคืน http.request ซ้ำจะวนไม่จบ)
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    await app(dict(SCOPE), receive, send)
+
+async def measure(app, requests: int, warmup: int) -> float:
+    for _ in range(warmup):
+        await call(app)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+async def main_async(requests: int, warmup: int):
+    results = {}
+    for label, cls in (("bare", None), ("base_http_middleware", LegacySecurityHeadersMiddleware), ("pure_asgi", SecurityHeadersMiddleware)):
+        results[label] = round(await measure(build_app(cls), requests, warmup), 2)
+
+    bare = results["bare"]
+    print(json.dumps({
+        "us_per_request": results,
+        "stack_overhead_us": {k: round(v - bare, 2) for k, v in results.items() if k != "bare"},
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.warmup))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+def _settings_available() -> bool:
+    try:
+        from app.core.config import settings  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+# app/core/config.py ต้องการ env (DATABASE_URL, SECRET_KEY, MINIO_* ...) ตั้งแต่ตอน import
+requires_settings = pytest.mark.skipif(
+    not _settings_available(), reason="app settings are not configured"
+)
+
+# test ที่ยิง endpoint จริงต้องมี PostgreSQL (DATABASE_URL)
+requires_database = pytest.mark.skipif(
+    not os.environ.get("DATABASE_URL") or not _settings_available(), reason="DATABASE_URL is not set"
+)
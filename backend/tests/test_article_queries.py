@@ -0,0 +1,138 @@
+"""จำนวน SQL ต่อ request ของ endpoint อ่านบทความต้องคงที่ ไม่โตตามจำนวนบทความ/relationship (กัน N+1 กลับมา)"""
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import requires_database
+
+pytestmark = requires_database
+
+ARTICLE_COUNT = 12
+
+# เพดานจำนวน statement ต่อ request (รวม SELECT ของ selectinload ทุก relationship)
+MAX_LIST_QUERIES = 5
+MAX_DETAIL_QUERIES = 8
+MAX_SEARCH_QUERIES = 5
+
+@pytest.fixture(scope="module")
+def app_env():
+    from app.main import app
+    from app.db.database import engine
+
+    return app, engine
+
+@pytest.fixture(scope="module")
+def seeded(app_env):
+    from app.db.database import SessionLocal
+    from app.models.article import Article, ArticleComment, ArticleMedia, Hashtag, Tag
+    from app.models.category import Category, SubCategory
+    from app.models.user import User
+    from app.services.search import refresh_search_vector
+
+    prefix = f"qc{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    users = [User(username=f"{prefix}u{i}", email=f"{prefix}u{i}@example.com", password="x") for i in range(3)]
+    category = Category(name=f"{prefix}-cat")
+    subcategory = SubCategory(name=f"{prefix}-sub", category=category)
+    tags = [Tag(name=f"{prefix}-tag{i}") for i in range(3)]
+    hashtags = [Hashtag(name=f"{prefix}-hash{i}") for i in range(3)]
+    db.add_all(users + [category, subcategory] + tags + hashtags)
+    db.flush()
+
+    articles = []
+    for i in range(ARTICLE_COUNT):
+        article = Article(
+            title=f"{prefix} article {i}",
+            slug=f"{prefix}-article-{i}",
+            status="public",
+            content=f"<p>{prefix} body {i}</p>",
+            tags=tags,
+            hashtags=hashtags,
+            categories=[category],
+            subcategories=[subcategory],
+            article_media=[
+                ArticleMedia(filename=f"f{j}.png", file_type="image/png", url=f"http://media/f{j}.png", media_type="attached")
+                for j in range(2)
+            ],
+            comment_count=len(users),
+            score_sum=4.0 * len(users),
+        )
+        article.comments = [ArticleComment(user_id=u.id, comment="ok", score=4.0) for u in users]
+        refresh_search_vector(article)
+        articles.append(article)
+    db.add_all(articles)
+    db.commit()
+
+    yield {"prefix": prefix, "user": users[0], "slugs": [a.slug for a in articles], "tag": tags[0].name}
+
+    db.query(Article).filter(Article.slug.like(f"{prefix}-%")).delete(synchronize_session=False)
+    db.query(SubCategory).filter(SubCategory.id == subcategory.id).delete()
+    db.query(Category).filter(Category.id == category.id).delete()
+    db.query(Tag).filter(Tag.name.like(f"{prefix}-%")).delete(synchronize_session=False)
+    db.query(Hashtag).filter(Hashtag.name.like(f"{prefix}-%")).delete(synchronize_session=False)
+    db.query(User).filter(User.username.like(f"{prefix}%")).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+@pytest.fixture(scope="module")
+def client(app_env, seeded):
+    from fastapi.testclient import TestClient
+    from app.routes.auth import get_current_user
+
+    app, _ = app_env
+    app.dependency_overrides[get_current_user] = lambda: seeded["user"]
+    # ไม่เข้า lifespan: งานเบื้องหลัง (flush view ฯลฯ) จะยิง SQL ปนกับที่นับ
+    yield TestClient(app, base_url="http://localhost")
+    app.dependency_overrides.pop(get_current_user, None)
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _queries_for(client, engine, url):
+    with count_queries(engine) as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response, statements
+
+def test_list_query_count_is_constant(app_env, client, seeded):
+    _, engine = app_env
+    tag = seeded["tag"]
+    small, small_statements = _queries_for(client, engine, f"/v1/api/articles/?tag={tag}&limit=2")
+    large, large_statements = _queries_for(client, engine, f"/v1/api/articles/?tag={tag}&limit={ARTICLE_COUNT}")
+
+    assert len(small.json()["items"]) == 2
+    assert len(large.json()["items"]) == ARTICLE_COUNT
+    assert len(large_statements) == len(small_statements)
+    assert len(large_statements) <= MAX_LIST_QUERIES, large_statements
+
+def test_detail_query_count_is_bounded(app_env, client, seeded):
+    _, engine = app_env
+    response, statements = _queries_for(client, engine, f"/v1/api/articles/{seeded['slugs'][0]}")
+
+    body = response.json()
+    assert len(body["media_links"]) == 2
+    assert len(body["comments"]) == 3
+    assert len(statements) <= MAX_DETAIL_QUERIES, statements
+
+def test_search_query_count_is_constant(app_env, client, seeded):
+    _, engine = app_env
+    prefix = seeded["prefix"]
+    small, small_statements = _queries_for(client, engine, f"/v1/api/articles/search?q={prefix}&limit=2")
+    large, large_statements = _queries_for(client, engine, f"/v1/api/articles/search?q={prefix}&limit={ARTICLE_COUNT}")
+
+    assert len(small.json()["items"]) == 2
+    assert len(large.json()["items"]) == ARTICLE_COUNT
+    assert len(large_statements) == len(small_statements)
+    assert len(large_statements) <= MAX_SEARCH_QUERIES, large_statements
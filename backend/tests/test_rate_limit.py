@@ -0,0 +1,109 @@
+"""token bucket ของ InMemoryRateLimitBackend และการหา IP ของ client หลัง proxy"""
+import pytest
+
+from tests.conftest import requires_settings
+
+pytestmark = requires_settings
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def policy():
+    from app.core.rate_limit import RateLimitPolicy
+
+    return RateLimitPolicy("test", capacity=3, refill_per_second=1.0)
+
+def _backend(clock, max_keys=100):
+    from app.core.rate_limit import InMemoryRateLimitBackend
+
+    return InMemoryRateLimitBackend(max_keys=max_keys, clock=clock)
+
+def test_backend_is_abstract():
+    from app.core.rate_limit import RateLimitBackend
+
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+def test_burst_up_to_capacity_then_rejects(clock, policy):
+    backend = _backend(clock)
+
+    assert [backend.take("k", policy)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = backend.take("k", policy)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+def test_refills_over_time_but_not_above_capacity(clock, policy):
+    backend = _backend(clock)
+    for _ in range(3):
+        backend.take("k", policy)
+
+    clock.advance(0.5)
+    allowed, retry_after = backend.take("k", policy)
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert backend.take("k", policy)[0]
+
+    clock.advance(60)
+    assert [backend.take("k", policy)[0] for _ in range(4)] == [True, True, True, False]
+
+def test_keys_have_separate_buckets(clock, policy):
+    backend = _backend(clock)
+    for _ in range(3):
+        backend.take("a", policy)
+
+    assert not backend.take("a", policy)[0]
+    assert backend.take("b", policy)[0]
+
+def test_least_recently_used_key_is_evicted(clock, policy):
+    backend = _backend(clock, max_keys=2)
+    for _ in range(3):
+        backend.take("a", policy)
+    backend.take("b", policy)
+    backend.take("c", policy)
+
+    # "a" หลุดไปแล้ว กลับมาได้ bucket เต็มใหม่
+    assert len(backend._buckets) == 2
+    assert backend.take("a", policy)[0]
+
+@pytest.mark.parametrize(
+    "peer, forwarded_for, real_ip, expected",
+    [
+        # ไม่ได้มาจาก proxy ของเรา: ไม่เชื่อ header
+        ("203.0.113.7", "198.51.100.1", "198.51.100.2", "203.0.113.7"),
+        # ผ่าน proxy ที่ไว้ใจ: hop ขวาสุดที่ไม่ใช่ proxy
+        ("10.0.0.2", "198.51.100.1", None, "198.51.100.1"),
+        ("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.5", None, "198.51.100.1"),
+        ("10.0.0.2", None, "198.51.100.2", "198.51.100.2"),
+        ("10.0.0.2", None, None, "10.0.0.2"),
+        # ค่าที่ไม่ใช่ IP: หยุดที่ hop สุดท้ายที่เชื่อได้
+        ("10.0.0.2", "evil, 10.0.0.5", None, "10.0.0.5"),
+        (None, "198.51.100.1", None, "unknown"),
+    ],
+)
+def test_resolve_client_ip(peer, forwarded_for, real_ip, expected):
+    from app.core.client_ip import parse_trusted_proxies, resolve_client_ip
+
+    proxies = parse_trusted_proxies("10.0.0.0/8")
+    assert resolve_client_ip(peer, forwarded_for, real_ip, proxies) == expected
+
+def test_cors_preflight_and_exempt_paths_are_not_limited(policy):
+    from app.core.rate_limit import RateLimiter
+
+    limiter = RateLimiter(_backend(FakeClock()), policy, [], exempt_prefixes=("/metrics",))
+    assert limiter.policy_for("OPTIONS", "/v1/api/articles/") is None
+    assert limiter.policy_for("GET", "/metrics") is None
+    assert limiter.policy_for("GET", "/v1/api/articles/") is policy
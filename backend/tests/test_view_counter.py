@@ -0,0 +1,48 @@
+"""ViewCounterBuffer.flush เขียนทีละ max_batch และคืนเฉพาะชุดที่เขียนไม่สำเร็จเข้า buffer"""
+from collections import Counter
+
+from tests.conftest import requires_settings
+
+pytestmark = requires_settings
+
+def _buffer(fail_on_call=None, max_batch=3, max_pending=100):
+    from app.services.view_counter import InMemoryViewDedupStore, ViewCounterBuffer
+
+    class RecordingBuffer(ViewCounterBuffer):
+        def __init__(self):
+            super().__init__(lambda: None, InMemoryViewDedupStore(1000), 60.0, max_batch, max_pending)
+            self.batches = []
+            self.calls = 0
+
+        def _write(self, logs):
+            self.calls += 1
+            self.batches.append([log["article_id"] for log in logs])
+            if self.calls == fail_on_call:
+                raise ConnectionError("database is down")
+            return Counter(log["article_id"] for log in logs), 0
+
+    return RecordingBuffer()
+
+def _record(buffer, count):
+    for i in range(count):
+        buffer.record(i, 1, f"10.0.0.{i}")
+
+def test_flush_writes_in_batches_of_max_batch():
+    buffer = _buffer()
+    _record(buffer, 7)
+
+    assert buffer.flush() == 7
+    assert buffer.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert buffer.stats()["pending"] == 0
+
+def test_failed_batch_and_rest_are_requeued_committed_batches_are_not():
+    buffer = _buffer(fail_on_call=2)
+    _record(buffer, 7)
+
+    assert buffer.flush() == 3
+    assert buffer.stats()["pending"] == 4
+    assert buffer.flush_failures_total == 1
+
+    buffer.batches.clear()
+    assert buffer.flush() == 4
+    assert buffer.batches == [[3, 4, 5], [6]]